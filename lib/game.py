@@ -48,6 +48,15 @@ Returns true if the bid is correct, false otherwise"""
     return count >= bid[0]
 
 
+def check_bid_count(bid, face_count) :
+    """Determine if the bid provided is correct using a face count rather
+than a dice map.
+The face_count should be a callable returning the number of dice showing a
+face across all players, such as GameData.get_face_count, so the bid is
+answered with one lookup.
+Returns true if the bid is correct, false otherwise"""
+    return face_count(bid[1]) >= bid[0]
+
 def get_winner(dice_map) :
     """Determine the winner of a round based on a dice map.
 If there is no clear winner of the dicemap then return None"""
@@ -81,7 +90,16 @@ of a challenge to set the bid to None"""
 def reshuffle_dice(players, face_vals, game, 
     dice_roller=roll_set_of_dice) :
     """Reshuffle the dice between rounds, using the game to find out
-the number of dice each player in players currently has"""
+the number of dice each player in players currently has.
+If the dice roller provides roll_hands (such as a DiceRNG) then the dice
+for all players are rolled in one call"""
+    roll_hands = getattr(dice_roller, "roll_hands", None)
+    if roll_hands is not None :
+        counts = [game.num_of_dice(player) for player in players]
+        hands = roll_hands(counts, face_vals)
+        for player, new_dice in zip(players, hands) :
+            game.set_dice(player, new_dice)
+        return
     for player in players :
         total_dice = game.num_of_dice(player)
         new_dice = dice_roller(total_dice, face_vals)
@@ -97,13 +115,29 @@ game objects."""
                  bid_checker=check_bids, 
                  win_checker=get_winner,
                  bid_reset=bid_reset, 
-                 dice_reshuffle=reshuffle_dice) :
+                 dice_reshuffle=reshuffle_dice,
+                 engine=None) :
         self.plays = data
         self.bid_checker = bid_checker
         self.win_checker = win_checker
         self.win_handler = win_handler
         self.bid_reset = bid_reset
         self.reshuffle = dice_reshuffle
+        # A shared TransitionEngine, when given, runs the rules in place of
+        # the state objects acting upon the facade, which may be replaced 
+        # with a ProxyDispatcher so that game views see the changes
+        self.engine = engine
+        self.facade = self
+        # With the default bid checker use the data store's face counts
+        # where it keeps them rather than building a dice map
+        self.face_count = None
+        if bid_checker is check_bids :
+            self.face_count = getattr(data, "get_face_count", None)
+        # Likewise use the data store's record of the last player holding
+        # dice with the default win checker
+        self.survivor = None
+        if win_checker is get_winner :
+            self.survivor = getattr(data, "get_survivor", None)
 
     def set_state(self, state) :
         """Set the current game state"""
@@ -120,7 +154,10 @@ An active player can make bids and challenge"""
 
     def start_game(self) :
         """Start a new game"""
-        self.get_state().on_game_start()
+        if self.engine is not None :
+            self.engine.on_game_start(self.facade)
+        else :
+            self.get_state().on_game_start()
 
     def activate_players(self) :
         """Make all players active"""
@@ -129,6 +166,8 @@ An active player can make bids and challenge"""
     def get_winning_player(self) :
         """Return the game winner.
 If there is more than one possible winner then return None"""
+        if self.survivor is not None :
+            return self.survivor()
         return self.win_checker(self.plays.get_dice_map())
 
     def end_game(self, winner) :
@@ -145,11 +184,7 @@ If there is more than one possible winner then return None"""
 
     def get_next_player(self) :
         """Return the next player who will go after the current player"""
-        players = self.plays.get_players()
-        index = players.index(self.get_current_player()) + 1
-        if index >= len(players) :
-            index = 0
-        return players[index]
+        return self.plays.get_next_player(self.get_current_player())
 
     def add_player(self, player) :
         """Add a player to the game"""
@@ -195,6 +230,8 @@ game"""
     def true_bid(self, bid) :
         """Return whether a bid is true. A true bid is a bid that will
 result in a win for the bidder"""
+        if self.face_count is not None :
+            return check_bid_count(bid, self.face_count)
         return self.bid_checker(bid, self.plays.get_dice_map())
 
     def get_dice_map(self) :
@@ -203,20 +240,16 @@ result in a win for the bidder"""
 
     def remove_dice(self, player) :
         """Remove a single dice from a player"""
-        dice = self.plays.get_dice(player)
-        dice = dice[:-1]
-        self.plays.set_dice(player, dice)
+        self.plays.remove_dice(player)
 
     def get_previous_player(self) :
         """Return the player who went previously"""
-        players = self.plays.get_players()
-        index = players.index(self.get_current_player()) - 1
-        if index < 0 :
-            index = len(players) - 1
-        return players[index]
+        return self.plays.get_previous_player(self.get_current_player())
 
     def finished(self) :
         """Return whether the game is over"""
+        if self.survivor is not None :
+            return self.survivor() is not None
         return self.win_checker(
               self.plays.get_dice_map()) is not None
 
@@ -242,7 +275,10 @@ with the current player"""
 
     def make_bid(self, bid) :
         """Make a bid for the current player in a tuple format"""
-        self.get_state().on_bid(self.get_current_player(), bid)
+        if self.engine is not None :
+            self.engine.on_bid(self.facade, self.get_current_player(), bid)
+        else :
+            self.get_state().on_bid(self.get_current_player(), bid)
 
     def make_challenge(self, challenged=None, challenger=None) :
         """Register a challange against a certain player. 
@@ -252,7 +288,10 @@ with the current player"""
             challenged = self.get_previous_player()
         if challenger is None :
             challenger = self.get_current_player()
-        self.get_state().on_challenge(challenger, challenged)
+        if self.engine is not None :
+            self.engine.on_challenge(self.facade, challenger, challenged)
+        else :
+            self.get_state().on_challenge(challenger, challenged)
 
     def get_face_values(self) :
         """Return the highest and lowest faces on the dice"""
@@ -0,0 +1,274 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+
+
+This module searches archives of game logs, see game_log, without reading
+whole files into memory. Each log is memory mapped and a sidecar index 
+file, named after the log with ".idx" added, holds the position of every 
+snapshot, added player, game start and challenge in the log. The index 
+also holds the face and outcome of each challenge so that challenges can 
+be picked out without reading the log itself. The index is brought up to
+date whenever the log has grown since it was last indexed.
+
+The index is a header of the magic "LDIX", a version, the length of log
+indexed and the number of entries, then an entry for each record of the 
+record type, the position of the record, the bid face and flags, all 
+little endian."""
+
+import mmap
+import os
+import struct
+
+import game
+import game_log
+import game_snapshot
+
+MAGIC = b"LDIX"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sBQQ")
+_ENTRY = struct.Struct("<BQBB")
+
+# The number of entries written to the index at a time
+_CHUNK = 4096
+
+_HAS_BID = 1
+_TRUE_BID = 2
+
+# The records kept in the index
+_INDEXED = (game_log.SNAPSHOT, game_log.ADD_PLAYER, game_log.GAME_START, 
+            game_log.CHALLENGE)
+
+class Challenge(object) :
+    """A challenge read from an archive. game is the number of the game in
+the log, counting from 0, or -1 if the challenge came before any game 
+start in the log"""
+    __slots__ = ("offset", "game", "winner", "loser", "dice_map", "bid", 
+                 "true_bid")
+
+    def __init__(self, offset, game, winner, loser, dice_map, bid, 
+                 true_bid) :
+        self.offset = offset
+        self.game = game
+        self.winner = winner
+        self.loser = loser
+        self.dice_map = dice_map
+        self.bid = bid
+        self.true_bid = true_bid
+
+
+class GameArchive(object) :
+    """Reads one game log through a memory map and its sidecar index"""
+
+    def __init__(self, path) :
+        self.path = path
+        self.index_path = path + ".idx"
+        self.log = open(path, "rb")
+        self.map = None
+        self.update_index()
+
+    def close(self) :
+        """Close the log and its index"""
+        if self.map is not None :
+            self.map.close()
+            self.map = None
+        self.log.close()
+
+    def _map_log(self) :
+        """Map the whole of the log into memory, returning its length"""
+        if self.map is not None :
+            self.map.close()
+            self.map = None
+        size = os.fstat(self.log.fileno()).st_size
+        if size :
+            self.map = mmap.mmap(self.log.fileno(), size, 
+                                 access=mmap.ACCESS_READ)
+        return size
+
+    def _read_header(self) :
+        """Return the length of log covered by the index and the number of
+entries, both 0 if there is no usable index"""
+        try :
+            with open(self.index_path, "rb") as index :
+                header = index.read(_HEADER.size)
+        except IOError :
+            return 0, 0
+        if len(header) < _HEADER.size :
+            return 0, 0
+        magic, version, length, count = _HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION :
+            return 0, 0
+        return length, count
+
+    def update_index(self) :
+        """Index any records added to the log since it was last indexed. If
+the index does not match the log it is built again"""
+        size = self._map_log()
+        indexed, count = self._read_header()
+        if indexed > size :
+            indexed, count = 0, 0
+        if indexed == 0 :
+            with open(self.index_path, "wb") as index :
+                index.write(_HEADER.pack(MAGIC, VERSION, 0, 0))
+        if indexed == size :
+            return
+        players = self._players_at(indexed)
+        with open(self.index_path, "r+b") as index :
+            # Entries after the count in the header were left by an update
+            # that did not finish
+            index.seek(_HEADER.size + count * _ENTRY.size)
+            index.truncate()
+            indexed, added = self._scan(indexed, size, players, index)
+            index.flush()
+            index.seek(0)
+            index.write(_HEADER.pack(MAGIC, VERSION, indexed, 
+                                     count + added))
+
+    def _scan(self, offset, size, players, index) :
+        """Write the index entries for the complete records from offset on
+to index, players being the players known at offset. Returns the position 
+after the last complete record and the number of entries written"""
+        log = self.map
+        entries = list()
+        added = 0
+        frame = game_log.FRAME
+        while offset + frame.size <= size :
+            length, record = frame.unpack_from(log, offset)
+            end = offset + 4 + length
+            if end > size :
+                break
+            if record in _INDEXED :
+                payload = log[offset + frame.size:end]
+                face, flags = 0, 0
+                if record == game_log.SNAPSHOT :
+                    players = game_snapshot.restore(payload).get_all_players()
+                elif record == game_log.ADD_PLAYER :
+                    players.append(payload.decode("utf-8"))
+                elif record == game_log.CHALLENGE :
+                    face, flags = self._outcome(payload, players)
+                entries.append(_ENTRY.pack(record, offset, face, flags))
+                if len(entries) == _CHUNK :
+                    index.write(b"".join(entries))
+                    added = added + len(entries)
+                    del entries[:]
+            offset = end
+        index.write(b"".join(entries))
+        return offset, added + len(entries)
+
+    def _outcome(self, payload, players) :
+        """Return the bid face and flags kept in the index for a challenge"""
+        winner, loser, dice_map, bid = \
+            game_log.read_challenge(payload, players)
+        if bid is None :
+            return 0, 0
+        flags = _HAS_BID
+        if game.check_bids(bid, dice_map) :
+            flags = flags | _TRUE_BID
+        return bid[1], flags
+
+    def _entries(self) :
+        """Generate the record type, position, face and flags of each index
+entry"""
+        length, count = self._read_header()
+        size = _HEADER.size + count * _ENTRY.size
+        if not count :
+            return
+        with open(self.index_path, "rb") as index :
+            entries = mmap.mmap(index.fileno(), size, 
+                                access=mmap.ACCESS_READ)
+            try :
+                unpack = _ENTRY.unpack_from
+                offset = _HEADER.size
+                while offset < size :
+                    yield unpack(entries, offset)
+                    offset = offset + _ENTRY.size
+            finally :
+                entries.close()
+
+    def _payload(self, offset) :
+        """Return the values of the record at offset"""
+        length, record = game_log.FRAME.unpack_from(self.map, offset)
+        return self.map[offset + game_log.FRAME.size:offset + 4 + length]
+
+    def _players_at(self, offset) :
+        """Return the players known to the log just before offset using the 
+index"""
+        players = list()
+        for record, position, face, flags in self._entries() :
+            if position >= offset :
+                break
+            if record == game_log.SNAPSHOT :
+                players = game_snapshot.restore(
+                    self._payload(position)).get_all_players()
+            elif record == game_log.ADD_PLAYER :
+                players.append(self._payload(position).decode("utf-8"))
+        return players
+
+    def games(self) :
+        """Return the position of each game start in the log"""
+        return [position for record, position, face, flags 
+                in self._entries() if record == game_log.GAME_START]
+
+    def challenges(self, face=None, true_bid=None) :
+        """Generate the challenges in the log as Challenge objects. If face
+is given only challenges of bids on that face are generated, and if 
+true_bid is given only challenges where the truth of the bid matches"""
+        players = list()
+        game_number = -1
+        for record, position, bid_face, flags in self._entries() :
+            if record == game_log.CHALLENGE :
+                if face is not None and \
+                    (not flags & _HAS_BID or bid_face != face) :
+                    continue
+                if true_bid is not None and \
+                    bool(flags & _TRUE_BID) != bool(true_bid) :
+                    continue
+                winner, loser, dice_map, bid = game_log.read_challenge(
+                    self._payload(position), players)
+                yield Challenge(position, game_number, winner, loser, 
+                                dice_map, bid, bool(flags & _TRUE_BID))
+            elif record == game_log.GAME_START :
+                game_number = game_number + 1
+            elif record == game_log.SNAPSHOT :
+                players = game_snapshot.restore(
+                    self._payload(position)).get_all_players()
+            else :
+                players.append(self._payload(position).decode("utf-8"))
+
+
+def find_challenges(paths, face=None, true_bid=None) :
+    """Generate the matching challenges across the logs in paths as 
+(path, Challenge) pairs, see GameArchive.challenges"""
+    for path in paths :
+        archive = GameArchive(path)
+        try :
+            for challenge in archive.challenges(face, true_bid) :
+                yield path, challenge
+        finally :
+            archive.close()
+
+
+if __name__ == "__main__" :
+    pass
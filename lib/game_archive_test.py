@@ -0,0 +1,170 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+Test searching archives of game logs"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import game
+import game_archive
+import game_log
+import game_log_test
+import game_state
+
+class GameArchiveTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "games.log")
+        self.rand = random.Random(5)
+
+    def tearDown(self) :
+        shutil.rmtree(self.directory)
+
+    def write_games(self, path, games, seed=1) :
+        """Log games whole games to path"""
+        dispatcher, data, writer = game_log_test.logged_game(
+            open(path, "ab"), players=3, seed=seed, fsync=False)
+        for _ in range(games) :
+            dispatcher.start_game()
+            while dispatcher.get_state() != game_state.START :
+                game_log_test.play_turn(dispatcher, self.rand)
+        writer.close()
+
+    def logged_challenges(self, path) :
+        """Return the winner, loser, dice map and bid of every challenge 
+read from the whole log"""
+        with open(path, "rb") as stream :
+            return [args for event, args in game_log.read_events(stream)
+                    if event == "on_challenge"]
+
+    def found(self, challenges) :
+        return [(c.winner, c.loser, c.dice_map, c.bid) for c in challenges]
+
+    def testFindingAllChallenges(self) :
+        self.write_games(self.path, 3)
+        archive = game_archive.GameArchive(self.path)
+        try :
+            challenges = list(archive.challenges())
+            expected = self.logged_challenges(self.path)
+            self.assertTrue(len(expected) > 3)
+            self.assertEquals(expected, self.found(challenges))
+            for challenge in challenges :
+                self.assertEquals(game.check_bids(challenge.bid, 
+                    challenge.dice_map), challenge.true_bid)
+            self.assertEquals(3, len(archive.games()))
+            self.assertEquals([0, 1, 2], 
+                sorted(set(challenge.game for challenge in challenges)))
+        finally :
+            archive.close()
+
+    def testFilteringChallenges(self) :
+        self.write_games(self.path, 5)
+        archive = game_archive.GameArchive(self.path)
+        try :
+            expected = [args for args in self.logged_challenges(self.path)
+                        if args[3][1] == 6 and 
+                        game.check_bids(args[3], args[2])]
+            self.assertTrue(expected)
+            found = archive.challenges(face=6, true_bid=True)
+            self.assertEquals(expected, self.found(found))
+            false_bids = list(archive.challenges(true_bid=False))
+            self.assertTrue(false_bids)
+            self.assertTrue(not any(c.true_bid for c in false_bids))
+        finally :
+            archive.close()
+
+    def testIndexFollowsGrowingLog(self) :
+        self.write_games(self.path, 1)
+        game_archive.GameArchive(self.path).close()
+        first = os.path.getsize(self.path + ".idx")
+        self.write_games(self.path, 2, seed=2)
+        archive = game_archive.GameArchive(self.path)
+        try :
+            self.assertTrue(os.path.getsize(self.path + ".idx") > first)
+            self.assertEquals(self.logged_challenges(self.path), 
+                              self.found(archive.challenges()))
+            self.assertEquals(3, len(archive.games()))
+        finally :
+            archive.close()
+
+    def testBrokenIndexIsRebuilt(self) :
+        self.write_games(self.path, 2)
+        game_archive.GameArchive(self.path).close()
+        with open(self.path + ".idx", "r+b") as index :
+            index.write(b"XXXX")
+        archive = game_archive.GameArchive(self.path)
+        try :
+            self.assertEquals(self.logged_challenges(self.path), 
+                              self.found(archive.challenges()))
+        finally :
+            archive.close()
+
+    def testUnfinishedIndexUpdateIsDiscarded(self) :
+        self.write_games(self.path, 1)
+        game_archive.GameArchive(self.path).close()
+        with open(self.path + ".idx", "ab") as index :
+            index.write(b"\x0c" * 33)
+        self.write_games(self.path, 1, seed=3)
+        archive = game_archive.GameArchive(self.path)
+        try :
+            self.assertEquals(self.logged_challenges(self.path), 
+                              self.found(archive.challenges()))
+        finally :
+            archive.close()
+
+    def testEmptyLog(self) :
+        open(self.path, "wb").close()
+        archive = game_archive.GameArchive(self.path)
+        try :
+            self.assertEquals([], list(archive.challenges()))
+            self.assertEquals([], archive.games())
+        finally :
+            archive.close()
+
+    def testFindingChallengesAcrossLogs(self) :
+        other = os.path.join(self.directory, "more.log")
+        self.write_games(self.path, 1)
+        self.write_games(other, 1, seed=4)
+        found = list(game_archive.find_challenges([self.path, other]))
+        expected = len(self.logged_challenges(self.path)) + \
+            len(self.logged_challenges(other))
+        self.assertEquals(expected, len(found))
+        self.assertEquals(self.path, found[0][0])
+        self.assertEquals(other, found[-1][0])
+
+
+def suite() :
+    """Return a test suite of all tests defined in this module"""
+    test_suite = unittest.TestSuite()
+    loader = unittest.TestLoader()
+    test_suite.addTests(loader.loadTestsFromTestCase(GameArchiveTest))
+    return test_suite
+
+if __name__ == "__main__" :
+    unittest.TextTestRunner().run(suite())
@@ -0,0 +1,474 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+
+
+This module provides micro benchmarks for the hot paths of the library.
+Each benchmark returns the number of operations per second so that runs
+can be compared, running the module prints the results.
+The dice and choices of every benchmark are drawn from generators seeded
+with the seed given, so each run measures the same work. run_suite runs 
+every benchmark, and running the module as 
+
+    python game_benchmark.py [results.json [baseline.json]]
+
+also writes the results to results.json and reports any benchmark slower
+than in the results of an earlier run in baseline.json"""
+
+import json
+import platform
+import random
+import sys
+import timeit
+
+import game
+import game_codec
+import game_common
+import game_compact_data
+import game_data
+import game_proxy
+import game_sample
+import game_simulation
+import game_snapshot
+import game_table_store
+import game_view_router
+import game_views
+
+# The number of times each measurement is taken, the fastest being kept as
+# the slower runs are those disturbed by the rest of the machine
+REPEAT = 3
+
+def _best_time(func, number) :
+    """Return the fewest seconds taken over REPEAT runs of calling func 
+number times"""
+    return min(timeit.repeat(func, number=number, repeat=REPEAT))
+
+def _reseeding_roller(num, face_vals, rand=random) :
+    """The dice roller as it was before DiceRNG, reseeding the prng from
+the OS on every call. Kept here as a baseline to compare against"""
+    rand.seed()
+    return game_common.roll_set_of_dice(num, face_vals, rand)
+
+def bench_dice_rolling(players=8, dice=8, face_vals=(1, 20), rounds=2000, 
+                       seed=1) :
+    """Compare rolling a round of dice for every player using the reseeding
+roller, the plain roller, an unseeded DiceRNG (NumPy backed when 
+available) and roll_hands with a seeded pure Python generator. Returns a 
+dict of rounds per second keyed by roller name"""
+    counts = [dice] * players
+    rng = game_common.DiceRNG()
+
+    def reseeding() :
+        for count in counts :
+            _reseeding_roller(count, face_vals)
+
+    def per_player() :
+        for count in counts :
+            game_common.roll_set_of_dice(count, face_vals)
+
+    def batched() :
+        rng.roll_hands(counts, face_vals)
+
+    python_rand = random.Random(seed)
+    def batched_python() :
+        game_common.roll_hands(counts, face_vals, python_rand)
+
+    results = dict()
+    for name, func in (("reseeding", reseeding), 
+                       ("roll_set_of_dice", per_player), 
+                       ("DiceRNG.roll_hands", batched),
+                       ("roll_hands (random.Random)", batched_python)) :
+        results[name] = rounds / _best_time(func, number=rounds)
+    return results
+
+def _seat_players(data, players, dice, face_vals, rng) :
+    """Add players players to data, each holding dice dice rolled by rng
+and having bid. Returns the names of the players"""
+    names = ["Player %i" % seat for seat in range(players)]
+    for seat, player in enumerate(names) :
+        data.add_player(player)
+        data.set_dice(player, rng(dice, face_vals))
+        data.set_bid(player, (seat + 1, face_vals[0]))
+    data.set_current_player(names[0])
+    return names
+
+def _calls_per_second(func, names, calls) :
+    """Return the calls per second of func, called with each of names in
+turn until about calls calls have been made"""
+    def call_all() :
+        for name in names :
+            func(name)
+    number = max(1, calls // len(names))
+    return number * len(names) / _best_time(call_all, number=number)
+
+def bench_check_bids(player_counts=(2, 8, 64, 256), dice=5, 
+                     face_vals=(1, 6), calls=20000, seed=1) :
+    """Measure bids checked per second against the dice of tables of each
+number of players, by check_bids with a dice map and by check_bid_count 
+with the face counts kept by GameData. Returns a dict of checks per second
+keyed by function and number of players"""
+    rng = game_common.DiceRNG(seed)
+    results = dict()
+    for count in player_counts :
+        data = game_data.GameData(dice, face_vals[0], face_vals[1])
+        _seat_players(data, count, dice, face_vals, rng)
+        dice_map = data.get_dice_map()
+        bids = [(count, face) for face in range(face_vals[0], 
+                                                face_vals[1] + 1)]
+        results["check_bids %i players" % count] = _calls_per_second(
+            lambda bid : game.check_bids(bid, dice_map), bids, 
+            max(1, calls // count))
+        results["check_bid_count %i players" % count] = _calls_per_second(
+            lambda bid : game.check_bid_count(bid, data.get_face_count), 
+            bids, calls)
+    return results
+
+def bench_get_winner(player_counts=(2, 8, 64, 256), dice=5, 
+                     face_vals=(1, 6), calls=20000, seed=1) :
+    """Measure calls per second of get_winner for tables of each number of
+players where only the last player holds dice, so that every hand is 
+looked at. Returns a dict of calls per second keyed by number of 
+players"""
+    rng = game_common.DiceRNG(seed)
+    results = dict()
+    for count in player_counts :
+        dice_map = dict(("Player %i" % seat, []) for seat in range(count))
+        dice_map["Player %i" % (count - 1)] = rng(dice, face_vals)
+        number = max(1, calls // count)
+        results["%i players" % count] = number / _best_time(
+            lambda : game.get_winner(dice_map), number=number)
+    return results
+
+def bench_data_store(player_counts=(2, 8, 64, 256), dice=5, 
+                     face_vals=(1, 6), calls=20000, seed=1) :
+    """Measure calls per second of the GameData getters and setters used 
+on every turn, for tables of each number of players. Returns a dict of 
+calls per second keyed by method and number of players"""
+    rng = game_common.DiceRNG(seed)
+    results = dict()
+    for count in player_counts :
+        data = game_data.GameData(dice, face_vals[0], face_vals[1])
+        names = _seat_players(data, count, dice, face_vals, rng)
+        hands = data.get_dice_map()
+        bid = (count, face_vals[1])
+        methods = (("get_dice", data.get_dice),
+                   ("set_dice", 
+                    lambda player : data.set_dice(player, hands[player])),
+                   ("get_bid", data.get_bid),
+                   ("set_bid", lambda player : data.set_bid(player, bid)),
+                   ("get_next_player", data.get_next_player),
+                   ("get_face_count", 
+                    lambda player : data.get_face_count(face_vals[1])),
+                   ("get_dice_map", lambda player : data.get_dice_map()))
+        for name, func in methods :
+            results["%s %i players" % (name, count)] = _calls_per_second(
+                func, names, calls)
+    return results
+
+def bench_view_fan_out(view_counts=(1, 10, 1000), events=20000) :
+    """Measure ProxyGame events per second when bursting a bid to the given
+numbers of game views. Returns a dict of events per second keyed by the
+number of views"""
+    results = dict()
+    for count in view_counts :
+        data = game_data.GameData()
+        data.add_player("player")
+        proxy = game_proxy.ProxyGame(game.Game(data), data)
+        for _ in range(count) :
+            proxy.add_game_view(game_views.GameView())
+        number = max(1, events // count)
+        bid = (1, 2)
+        seconds = _best_time(lambda : proxy.set_bid("player", bid), 
+                                number=number)
+        results["%i views" % count] = number / seconds
+    return results
+
+def bench_view_router(spectator_counts=(10, 1000), players=6, events=20000) :
+    """Measure events per second routed to the given numbers of spectators
+and one view for each of players players, half of the events being dice 
+set for a player. Returns a dict of events per second keyed by the number
+of spectators"""
+    results = dict()
+    names = ["Player %i" % seat for seat in range(players)]
+    for count in spectator_counts :
+        router = game_view_router.ViewRouter()
+        for _ in range(count) :
+            router.add_spectator(game_views.GameView())
+        for player in names :
+            router.add_player_view(player, game_views.GameView())
+        dice = [1, 2, 3, 4, 5]
+        bid = (1, 2)
+        def route() :
+            for player in names :
+                router.on_set_dice(player, dice)
+                router.on_bid(player, bid)
+        number = max(1, events // (count * 2 * players))
+        seconds = _best_time(route, number=number)
+        results["%i spectators" % count] = number * 2 * players / seconds
+    return results
+
+def bench_full_game(games=50, players=8, dice=8, face_vals=(1, 20), 
+                    views=1, seed=1) :
+    """Measure whole games played through the game wiring of game_sample,
+with views game views on each game and every player following the random
+policy of game_simulation. Returns a dict of games and turns per second"""
+    turns = [0]
+    def play() :
+        rand = random.Random(seed)
+        rng = game_common.DiceRNG(seed)
+        turns[0] = 0
+        for _ in range(games) :
+            data = game_data.GameData(dice, face_vals[0], face_vals[1])
+            for _ in range(views) :
+                data.add_game_view(game_views.GameView())
+            for seat in range(players) :
+                data.add_player("Player %i" % seat)
+            dispatcher = game_sample.wire_game(data, rng)
+            dispatcher.start_game()
+            while not dispatcher.game.finished() :
+                bid = game_simulation.random_policy(dispatcher, rand)
+                if bid is None :
+                    dispatcher.make_challenge()
+                else :
+                    dispatcher.make_bid(bid)
+                turns[0] = turns[0] + 1
+    seconds = _best_time(play, number=1)
+    return {"games" : games / seconds, "turns" : turns[0] / seconds}
+
+def deep_sizeof(obj, seen=None) :
+    """Return the number of bytes used by obj and everything reachable from
+it through containers, instance dictionaries and slots, counting each 
+object once"""
+    if seen is None :
+        seen = set()
+    if obj is None or id(obj) in seen :
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict) :
+        for key, value in obj.items() :
+            size = size + deep_sizeof(key, seen) + deep_sizeof(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)) :
+        for item in obj :
+            size = size + deep_sizeof(item, seen)
+    if hasattr(obj, "__dict__") :
+        size = size + deep_sizeof(obj.__dict__, seen)
+    for slot in getattr(type(obj), "__slots__", ()) :
+        if hasattr(obj, slot) :
+            size = size + deep_sizeof(getattr(obj, slot), seen)
+    return size
+
+def bench_memory_per_table(players=6, dice=5, 
+        data_classes=(game_data.GameData, 
+                      game_compact_data.CompactGameData), seed=1) :
+    """Measure the bytes used by a data store for a table in play, with
+every player holding dice and having bid. Returns a dict of bytes per 
+table keyed by data store class name"""
+    rng = game_common.DiceRNG(seed)
+    results = dict()
+    for data_class in data_classes :
+        data = data_class(dice, 1, 6)
+        for seat in range(players) :
+            player = "Player %i" % seat
+            data.add_player(player)
+            data.set_dice(player, rng(dice, (1, 6)))
+            data.set_bid(player, (seat + 1, 4))
+        data.set_current_player("Player 0")
+        results[data_class.__name__] = deep_sizeof(data)
+    return results
+
+def bench_memory_table_store(players=6, dice=5, tables=1000, seed=1) :
+    """Measure the bytes used per table by a TableStore holding tables
+tables set up as in bench_memory_per_table"""
+    rng = game_common.DiceRNG(seed)
+    store = game_table_store.TableStore(players, dice, 1, 6)
+    for _ in range(tables) :
+        data = store.table(store.new_table())
+        for seat in range(players) :
+            player = "Player %i" % seat
+            data.add_player(player)
+            data.set_dice(player, rng(dice, (1, 6)))
+            data.set_bid(player, (seat + 1, 4))
+        data.set_current_player("Player 0")
+    return deep_sizeof(store) / float(tables)
+
+def bench_snapshot(players=6, dice=5, number=20000, seed=1) :
+    """Measure snapshots taken and restored per second for a GameData with
+every player holding dice and having bid. Returns a dict of operations 
+per second keyed by operation"""
+    rng = game_common.DiceRNG(seed)
+    data = game_data.GameData(dice, 1, 6)
+    for seat in range(players) :
+        player = "Player %i" % seat
+        data.add_player(player)
+        data.set_dice(player, rng(dice, (1, 6)))
+        data.set_bid(player, (seat + 1, 4))
+    data.set_current_player("Player 0")
+    blob = game_snapshot.snapshot(data)
+    results = dict()
+    results["snapshot"] = number / _best_time(
+        lambda : game_snapshot.snapshot(data), number=number)
+    results["restore"] = number / _best_time(
+        lambda : game_snapshot.restore(blob), number=number)
+    return results
+
+def bench_codec(players=6, dice=5, number=5000, seed=1) :
+    """Compare encoding and decoding the events of a challenge in a game of
+players players using game_codec and JSON. Returns a dict of batches per 
+second keyed by codec and direction, and the size of a batch in bytes"""
+    rng = game_common.DiceRNG(seed)
+    names = ["Player %i" % seat for seat in range(players)]
+    hands = dict((player, rng(dice, (1, 6))) for player in names)
+    batch = [("on_bid", (names[1], (3, 4))), 
+             ("on_player_end_turn", (names[1],)),
+             ("on_player_start_turn", (names[2],)),
+             ("on_challenge", (names[2], names[1], hands, (3, 4))),
+             ("on_new_dice_amount", (names[1], dice - 1))]
+    batch.extend(("on_bid", (player, None)) for player in names)
+    batch.extend(("on_set_dice", (player, hands[player])) 
+                 for player in names)
+    batch.append(("on_bid_reset", ()))
+
+    encoder = game_codec.Encoder()
+    decoder = game_codec.Decoder()
+    first = bytearray()
+    for event, args in batch :
+        encoder.encode(first, event, args)
+    decoder.decode(first)
+    # Once the names have been sent a batch holds only the events
+    encoded = bytearray()
+    for event, args in batch :
+        encoder.encode(encoded, event, args)
+
+    def binary_encode() :
+        out = bytearray()
+        for event, args in batch :
+            encoder.encode(out, event, args)
+
+    as_json = json.dumps([[event, args] for event, args in batch])
+    def json_encode() :
+        json.dumps([[event, args] for event, args in batch])
+
+    results = dict()
+    for name, func in (("game_codec encode", binary_encode), 
+                       ("game_codec decode", lambda : decoder.decode(encoded)),
+                       ("json encode", json_encode),
+                       ("json decode", lambda : json.loads(as_json))) :
+        results[name] = number / _best_time(func, number=number)
+    return results, {"game_codec" : len(encoded), "json" : len(as_json)}
+
+# The benchmarks run by run_suite and the titles their results are printed
+# under, the results of those measuring bytes being better when smaller
+SUITE = (("dice_rolling", "Dice rolling (rounds of 8 players x 8 dice)"),
+         ("check_bids", "Bid checks (5 dice each)"),
+         ("get_winner", "get_winner calls (5 dice left)"),
+         ("data_store", "GameData calls (5 dice each)"),
+         ("view_fan_out", "ProxyGame event fan out (events)"),
+         ("view_router", "ViewRouter events (6 players)"),
+         ("full_game", "Full games (8 players x 8 dice, 1 view)"),
+         ("snapshot", "Snapshots (6 players x 5 dice)"),
+         ("codec", "Challenge event batches (6 players x 5 dice)"),
+         ("codec_size", "Challenge event batch size"),
+         ("memory_per_table", "Memory per table (6 players x 5 dice)"))
+BYTES = ("codec_size", "memory_per_table")
+
+def run_suite(seed=1) :
+    """Run every benchmark in SUITE with the given seed. Returns a dict of
+the results of each benchmark keyed by its name in SUITE"""
+    codec, codec_size = bench_codec(seed=seed)
+    memory = bench_memory_per_table(seed=seed)
+    memory["TableStore"] = bench_memory_table_store(seed=seed)
+    return {"dice_rolling" : bench_dice_rolling(seed=seed),
+            "check_bids" : bench_check_bids(seed=seed),
+            "get_winner" : bench_get_winner(seed=seed),
+            "data_store" : bench_data_store(seed=seed),
+            "view_fan_out" : bench_view_fan_out(),
+            "view_router" : bench_view_router(),
+            "full_game" : bench_full_game(seed=seed),
+            "snapshot" : bench_snapshot(seed=seed),
+            "codec" : codec,
+            "codec_size" : codec_size,
+            "memory_per_table" : memory}
+
+def write_results(path, results, seed=1) :
+    """Write the results of run_suite to the file at path as JSON, along 
+with the seed and the Python version and platform they were measured on"""
+    document = {"seed" : seed, "python" : platform.python_version(),
+                "platform" : platform.platform(), "results" : results}
+    with open(path, "w") as out :
+        json.dump(document, out, indent=2, sort_keys=True)
+
+def read_results(path) :
+    """Return the results written to the file at path by write_results"""
+    with open(path) as results_file :
+        return json.load(results_file)["results"]
+
+def compare_results(baseline, results, tolerance=0.1) :
+    """Compare results with the baseline results of an earlier run, both 
+as returned by run_suite. Returns a sorted list of (benchmark, name, 
+baseline, result) for every result worse than its baseline by more than 
+the fraction tolerance"""
+    regressions = list()
+    for benchmark in results :
+        for name, result in results[benchmark].items() :
+            if name not in baseline.get(benchmark, ()) :
+                continue
+            old = baseline[benchmark][name]
+            if benchmark in BYTES :
+                worse = result > old * (1 + tolerance)
+            else :
+                worse = result < old * (1 - tolerance)
+            if worse :
+                regressions.append((benchmark, name, old, result))
+    regressions.sort()
+    return regressions
+
+def _print_results(title, results, unit="ops/s") :
+    print(title)
+    for name in sorted(results) :
+        print("    %-30s %12.1f %s" % (name, results[name], unit))
+
+def main() :
+    seed = 1
+    results = run_suite(seed)
+    for benchmark, title in SUITE :
+        unit = "ops/s"
+        if benchmark in BYTES :
+            unit = "bytes"
+        _print_results(title, results[benchmark], unit)
+    if len(sys.argv) > 1 :
+        write_results(sys.argv[1], results, seed)
+    if len(sys.argv) > 2 :
+        regressions = compare_results(read_results(sys.argv[2]), results)
+        for benchmark, name, old, result in regressions :
+            if benchmark in BYTES :
+                message = "Larger than baseline: %s %s %.1f -> %.1f bytes"
+            else :
+                message = "Slower than baseline: %s %s %.1f -> %.1f ops/s"
+            print(message % (benchmark, name, old, result))
+        if regressions :
+            sys.exit(1)
+
+if __name__ == "__main__" :
+    main()
@@ -0,0 +1,110 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+Test the benchmark suite and comparing its results"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import game_benchmark
+
+class CompareResultsTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.baseline = {"snapshot" : {"snapshot" : 100.0, "restore" : 50.0},
+                         "memory_per_table" : {"GameData" : 1000}}
+
+    def testUnchangedResultsHaveNoRegressions(self) :
+        self.assertEquals([], game_benchmark.compare_results(self.baseline,
+                                                             self.baseline))
+
+    def testSlowerResultIsARegression(self) :
+        results = {"snapshot" : {"snapshot" : 80.0, "restore" : 95.0},
+                   "memory_per_table" : {"GameData" : 1000}}
+        self.assertEquals([("snapshot", "snapshot", 100.0, 80.0)], 
+            game_benchmark.compare_results(self.baseline, results))
+
+    def testSmallChangesAreWithinTolerance(self) :
+        results = {"snapshot" : {"snapshot" : 95.0, "restore" : 50.0},
+                   "memory_per_table" : {"GameData" : 1050}}
+        self.assertEquals([], game_benchmark.compare_results(self.baseline,
+                                                             results))
+
+    def testLargerMemoryIsARegression(self) :
+        results = {"memory_per_table" : {"GameData" : 1200}}
+        self.assertEquals([("memory_per_table", "GameData", 1000, 1200)], 
+            game_benchmark.compare_results(self.baseline, results))
+
+    def testNewResultsAreIgnored(self) :
+        results = {"snapshot" : {"other" : 1.0}, "codec" : {"json" : 1.0}}
+        self.assertEquals([], game_benchmark.compare_results(self.baseline,
+                                                             results))
+
+
+class BenchmarkTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self) :
+        shutil.rmtree(self.directory)
+
+    def testWritingAndReadingResults(self) :
+        path = os.path.join(self.directory, "results.json")
+        results = {"snapshot" : {"snapshot" : 100.0}}
+        game_benchmark.write_results(path, results, seed=3)
+        self.assertEquals(results, game_benchmark.read_results(path))
+
+    def testPlayerCountBenchmarks(self) :
+        results = game_benchmark.bench_check_bids((2, 8), calls=10)
+        self.assertEquals(["check_bid_count 2 players", 
+                           "check_bid_count 8 players", 
+                           "check_bids 2 players", "check_bids 8 players"],
+                          sorted(results))
+        results = game_benchmark.bench_get_winner((2, 8), calls=10)
+        self.assertEquals(["2 players", "8 players"], sorted(results))
+        results = game_benchmark.bench_data_store((2,), calls=10)
+        self.assertEquals(7, len(results))
+        self.assertTrue("set_dice 2 players" in results)
+        for result in results.values() :
+            self.assertTrue(result > 0)
+
+    def testFullGames(self) :
+        results = game_benchmark.bench_full_game(games=2, players=3, dice=2)
+        self.assertEquals(["games", "turns"], sorted(results))
+        self.assertTrue(results["turns"] > results["games"] > 0)
+
+
+def suite() :
+    """Return a test suite of all tests defined in this module"""
+    test_suite = unittest.TestSuite()
+    loader = unittest.TestLoader()
+    test_suite.addTests(loader.loadTestsFromTestCase(CompareResultsTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(BenchmarkTest))
+    return test_suite
+
+if __name__ == "__main__" :
+    unittest.TextTestRunner().run(suite())
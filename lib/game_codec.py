@@ -0,0 +1,455 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+
+
+This module contains a compact binary encoding of game view events and of
+the actions a client can make, for sending games to remote user 
+interfaces. Players are sent by number, the name being sent once the 
+first time the player appears, so the encoder and decoder on either end 
+of a connection each keep the list of players seen.
+
+Each frame is the length of the rest of the frame as two bytes, the frame
+type as one byte then the values for the frame, all little endian. Dice 
+are sent as one byte each and bids as a four byte count and a one byte 
+face. Decoding reads the values in place through a memoryview rather than
+copying each frame out of the buffer."""
+
+import struct
+
+import game_views
+
+NAME = 0
+
+# Game view events, each sent as a frame of the same name
+EVENTS = ("on_game_start", "on_bid", "on_challenge", "on_activation", 
+          "on_player_start_turn", "on_player_end_turn", 
+          "on_player_addition", "on_player_remove", "on_deactivate", 
+          "on_game_end", "on_set_dice", "on_new_dice_amount", 
+          "on_bid_reset", "on_error")
+
+# Actions sent by clients, named after the Game methods they call
+ACTIONS = ("start_game", "make_bid", "make_challenge")
+
+_EVENT_TYPES = dict((event, number + 1) for number, event in 
+                    enumerate(EVENTS))
+_ACTION_TYPES = dict((action, number + 64) for number, action in 
+                     enumerate(ACTIONS))
+
+_FRAME = struct.Struct("<HB")
+_PLAYER = struct.Struct("<H")
+_TWO_PLAYERS = struct.Struct("<HH")
+_BID = struct.Struct("<BIB")
+_PLAYER_BID = struct.Struct("<HBIB")
+_HAND = struct.Struct("<HB")
+_AMOUNT = struct.Struct("<HH")
+_CHALLENGE = struct.Struct("<HHBIBH")
+
+# Whole frames of a fixed size, the frame followed by the values
+_FRAME_PLAYER = struct.Struct("<HBH")
+_FRAME_TWO_PLAYERS = struct.Struct("<HBHH")
+_FRAME_BID = struct.Struct("<HBBIB")
+_FRAME_PLAYER_BID = struct.Struct("<HBHBIB")
+_FRAME_HAND = struct.Struct("<HBHB")
+_FRAME_AMOUNT = struct.Struct("<HBHH")
+
+_NO_PLAYER = 0xFFFF
+_NO_DICE = 0xFF
+_MAX_FRAME = 0xFFFF
+_MAX_COUNT = 0xFFFFFFFF
+_MAX_FACE = 0xFF
+_MAX_AMOUNT = 0xFFFF
+
+def _bid_values(bid) :
+    """Return the flag, count and face sent for a bid. If the count or face
+does not fit then raise a ValueError"""
+    if bid is None :
+        return 0, 0, 0
+    count, face = bid
+    if not 0 <= count <= _MAX_COUNT or not 0 <= face <= _MAX_FACE :
+        raise ValueError("The bid %r is too large to encode" % (bid,))
+    return 1, count, face
+
+def _dice_bytes(dice) :
+    if dice is None :
+        return _NO_DICE, b""
+    if len(dice) >= _NO_DICE :
+        raise ValueError("A hand of %i dice is too large to encode" % 
+                         len(dice))
+    return len(dice), bytes(bytearray(dice))
+
+def _unpack(values, view, offset, stop) :
+    """Unpack the struct values from view at offset, if they run past stop,
+the end of the frame being read, then raise a ValueError"""
+    if offset + values.size > stop :
+        raise ValueError("Frame ends before its values")
+    return values.unpack_from(view, offset)
+
+
+class Encoder(object) :
+    """Encodes events and actions as frames, keeping the numbers given to
+players"""
+
+    def __init__(self) :
+        self.players = dict()
+        self.names = list()
+        packers = {
+            "on_game_start" : self._game_start, 
+            "on_bid" : self._player_bid,
+            "on_challenge" : self._challenge,
+            "on_set_dice" : self._set_dice,
+            "on_new_dice_amount" : self._amount,
+            "on_bid_reset" : self._nothing,
+            "on_error" : self._error,
+            "start_game" : self._nothing,
+            "make_bid" : self._bid,
+            "make_challenge" : self._two_players}
+        self.packers = dict()
+        for name, frame_type in list(_EVENT_TYPES.items()) + \
+            list(_ACTION_TYPES.items()) :
+            self.packers[name] = (frame_type, 
+                                  packers.get(name, self._player))
+
+    def _number(self, out, player) :
+        """Return the number of player, adding a name frame to out the first
+time the player is seen"""
+        if player is None :
+            return _NO_PLAYER
+        try :
+            return self.players[player]
+        except KeyError :
+            number = len(self.names)
+            if number >= _NO_PLAYER :
+                raise ValueError("Too many players to encode %r" % 
+                                 (player,))
+            self.players[player] = number
+            self.names.append(player)
+            name = player.encode("utf-8")
+            out.extend(_FRAME_PLAYER.pack(len(name) + 3, NAME, number))
+            out.extend(name)
+            return number
+
+    def encode(self, out, name, args) :
+        """Add the frame for the event or action name called with args to 
+the bytearray out. If the arguments cannot be encoded then raise a 
+ValueError, leaving out and the players seen as they were"""
+        frame_type, packer = self.packers[name]
+        start = len(out)
+        known = len(self.names)
+        try :
+            packer(out, frame_type, *args)
+        except (ValueError, struct.error) as e :
+            # Take back the frames written and the players named in them,
+            # the decoder would otherwise hold names the encoder resends
+            del out[start:]
+            for player in self.names[known:] :
+                del self.players[player]
+            del self.names[known:]
+            if isinstance(e, ValueError) :
+                raise
+            raise ValueError("Cannot encode %s%r: %s" % (name, args, e))
+
+    def _variable(self, out, frame_type, payload) :
+        """Add a frame with a payload of varying length"""
+        if len(payload) >= _MAX_FRAME :
+            raise ValueError("Frame of type %i is too large to encode" % 
+                             frame_type)
+        out.extend(_FRAME.pack(len(payload) + 1, frame_type))
+        out.extend(payload)
+
+    def _nothing(self, out, frame_type) :
+        out.extend(_FRAME.pack(1, frame_type))
+
+    def _player(self, out, frame_type, player) :
+        number = self._number(out, player)
+        out.extend(_FRAME_PLAYER.pack(3, frame_type, number))
+
+    def _two_players(self, out, frame_type, first=None, second=None) :
+        first = self._number(out, first)
+        second = self._number(out, second)
+        out.extend(_FRAME_TWO_PLAYERS.pack(5, frame_type, first, second))
+
+    def _game_start(self, out, frame_type, starting_player, player_list) :
+        numbers = [self._number(out, player) for player in player_list]
+        self._variable(out, frame_type, 
+            _TWO_PLAYERS.pack(self._number(out, starting_player), 
+                              len(numbers)) + 
+            struct.pack("<%iH" % len(numbers), *numbers))
+
+    def _bid(self, out, frame_type, bid) :
+        flag, count, face = _bid_values(bid)
+        out.extend(_FRAME_BID.pack(_BID.size + 1, frame_type, flag, count, 
+                                   face))
+
+    def _player_bid(self, out, frame_type, player, bid) :
+        number = self._number(out, player)
+        flag, count, face = _bid_values(bid)
+        out.extend(_FRAME_PLAYER_BID.pack(_PLAYER_BID.size + 1, frame_type,
+                                          number, flag, count, face))
+
+    def _challenge(self, out, frame_type, winner, loser, old_dice_map, 
+                   bid) :
+        parts = [_CHALLENGE.pack(self._number(out, winner), 
+                                 self._number(out, loser), 
+                                 *(_bid_values(bid) + (len(old_dice_map),)))]
+        for player, dice in old_dice_map.items() :
+            count, values = _dice_bytes(dice)
+            parts.append(_HAND.pack(self._number(out, player), count))
+            parts.append(values)
+        self._variable(out, frame_type, b"".join(parts))
+
+    def _set_dice(self, out, frame_type, player, dice) :
+        number = self._number(out, player)
+        count, values = _dice_bytes(dice)
+        out.extend(_FRAME_HAND.pack(len(values) + _HAND.size + 1, 
+                                    frame_type, number, count))
+        out.extend(values)
+
+    def _amount(self, out, frame_type, player, amount) :
+        if not 0 <= amount <= _MAX_AMOUNT :
+            raise ValueError("The amount %r is too large to encode" % 
+                             (amount,))
+        number = self._number(out, player)
+        out.extend(_FRAME_AMOUNT.pack(_AMOUNT.size + 1, frame_type, number,
+                                      amount))
+
+    def _error(self, out, frame_type, value) :
+        self._variable(out, frame_type, str(value).encode("utf-8"))
+
+
+class Decoder(object) :
+    """Decodes frames from an Encoder, keeping the names of the players"""
+
+    def __init__(self) :
+        self.names = list()
+        self.readers = {
+            "on_game_start" : self._game_start, 
+            "on_bid" : self._player_bid,
+            "on_challenge" : self._challenge,
+            "on_set_dice" : self._set_dice,
+            "on_new_dice_amount" : self._amount,
+            "on_bid_reset" : self._nothing,
+            "on_error" : self._error,
+            "start_game" : self._nothing,
+            "make_bid" : self._bid,
+            "make_challenge" : self._two_players}
+        for event in EVENTS :
+            self.readers.setdefault(event, self._player)
+        self.types = dict()
+        for name, frame_type in list(_EVENT_TYPES.items()) + \
+            list(_ACTION_TYPES.items()) :
+            self.types[frame_type] = (name, self.readers[name])
+
+    def decode(self, data) :
+        """Decode the complete frames at the start of data, returning a list
+of (event or action name, arguments) pairs and the number of bytes used.
+Bytes left over are the start of a frame yet to be received.
+If a frame is malformed, too short for its values or naming players out 
+of order or not yet named, then raise a ValueError"""
+        view = memoryview(data)
+        try :
+            return self._decode(view, len(data))
+        finally :
+            # Let a bytearray be resized once decoded
+            del view
+
+    def _decode(self, view, end) :
+        decoded = list()
+        offset = 0
+        frame_size = _FRAME.size
+        while offset + frame_size <= end :
+            length, frame_type = _FRAME.unpack_from(view, offset)
+            start = offset + frame_size
+            stop = offset + 2 + length
+            if stop > end :
+                break
+            if length < 1 :
+                raise ValueError("Frame of length 0")
+            if frame_type == NAME :
+                number = _unpack(_PLAYER, view, start, stop)[0]
+                if number != len(self.names) :
+                    raise ValueError("Player %i named out of order" % 
+                                     number)
+                self.names.append(
+                    view[start + 2:stop].tobytes().decode("utf-8"))
+            else :
+                try :
+                    name, reader = self.types[frame_type]
+                except KeyError :
+                    raise ValueError("Unknown frame type %i" % frame_type)
+                decoded.append((name, reader(view, start, stop)))
+            offset = stop
+        return decoded, offset
+
+    def _name(self, number) :
+        if number >= len(self.names) :
+            raise ValueError("Player %i has not been named" % number)
+        return self.names[number]
+
+    def _player_name(self, number) :
+        if number == _NO_PLAYER :
+            return None
+        return self._name(number)
+
+    def _dice(self, view, offset, count, stop) :
+        if count == _NO_DICE :
+            return None, offset
+        if offset + count > stop :
+            raise ValueError("Frame ends before its dice")
+        return list(struct.unpack_from("%iB" % count, view, offset)), \
+            offset + count
+
+    def _nothing(self, view, start, stop) :
+        return ()
+
+    def _player(self, view, start, stop) :
+        return (self._player_name(_unpack(_PLAYER, view, start, stop)[0]),)
+
+    def _two_players(self, view, start, stop) :
+        first, second = _unpack(_TWO_PLAYERS, view, start, stop)
+        return (self._player_name(first), self._player_name(second))
+
+    def _game_start(self, view, start, stop) :
+        first, count = _unpack(_TWO_PLAYERS, view, start, stop)
+        offset = start + _TWO_PLAYERS.size
+        if offset + 2 * count > stop :
+            raise ValueError("Frame ends before its players")
+        numbers = struct.unpack_from("<%iH" % count, view, offset)
+        return (self._player_name(first), 
+                [self._name(number) for number in numbers])
+
+    def _bid(self, view, start, stop) :
+        flag, count, face = _unpack(_BID, view, start, stop)
+        return ((count, face) if flag else None,)
+
+    def _player_bid(self, view, start, stop) :
+        number, flag, count, face = _unpack(_PLAYER_BID, view, start, 
+                                            stop)
+        return (self._player_name(number), (count, face) if flag else None)
+
+    def _challenge(self, view, start, stop) :
+        winner, loser, flag, count, face, entries = \
+            _unpack(_CHALLENGE, view, start, stop)
+        offset = start + _CHALLENGE.size
+        dice_map = dict()
+        for _ in range(entries) :
+            number, length = _unpack(_HAND, view, offset, stop)
+            dice, offset = self._dice(view, offset + _HAND.size, length, 
+                                      stop)
+            dice_map[self._name(number)] = dice
+        return (self._player_name(winner), self._player_name(loser), 
+                dice_map, (count, face) if flag else None)
+
+    def _set_dice(self, view, start, stop) :
+        number, count = _unpack(_HAND, view, start, stop)
+        dice, offset = self._dice(view, start + _HAND.size, count, stop)
+        return (self._name(number), dice)
+
+    def _amount(self, view, start, stop) :
+        number, amount = _unpack(_AMOUNT, view, start, stop)
+        return (self._name(number), amount)
+
+    def _error(self, view, start, stop) :
+        return (view[start:stop].tobytes().decode("utf-8"),)
+
+
+class EncodingGameView(game_views.GameView) :
+    """A game view that encodes every event it is sent into buffer, a 
+bytearray, for the owner to send on and clear"""
+
+    def __init__(self, encoder=None) :
+        if encoder is None :
+            encoder = Encoder()
+        self.encoder = encoder
+        self.buffer = bytearray()
+
+    def take(self) :
+        """Return the bytes encoded so far and empty the buffer"""
+        data = bytes(self.buffer)
+        del self.buffer[:]
+        return data
+
+    def on_events(self, batch) :
+        encode = self.encoder.encode
+        for event, args in batch :
+            encode(self.buffer, event, args)
+
+    def on_game_start(self, starting_player, player_list) :
+        self.encoder.encode(self.buffer, "on_game_start", 
+                            (starting_player, player_list))
+
+    def on_bid(self, player_name, bid) :
+        self.encoder.encode(self.buffer, "on_bid", (player_name, bid))
+
+    def on_challenge(self, winner, loser, old_dice_map, bid) :
+        self.encoder.encode(self.buffer, "on_challenge", 
+                            (winner, loser, old_dice_map, bid))
+
+    def on_activation(self, player_name) :
+        self.encoder.encode(self.buffer, "on_activation", (player_name,))
+
+    def on_player_start_turn(self, player_name) :
+        self.encoder.encode(self.buffer, "on_player_start_turn", 
+                            (player_name,))
+
+    def on_player_end_turn(self, player_name) :
+        self.encoder.encode(self.buffer, "on_player_end_turn", 
+                            (player_name,))
+
+    def on_player_addition(self, player_name) :
+        self.encoder.encode(self.buffer, "on_player_addition", 
+                            (player_name,))
+
+    def on_player_remove(self, player_name) :
+        self.encoder.encode(self.buffer, "on_player_remove", (player_name,))
+
+    def on_deactivate(self, player_name) :
+        self.encoder.encode(self.buffer, "on_deactivate", (player_name,))
+
+    def on_game_end(self, winner_name) :
+        self.encoder.encode(self.buffer, "on_game_end", (winner_name,))
+
+    def on_set_dice(self, player_name, dice) :
+        self.encoder.encode(self.buffer, "on_set_dice", (player_name, dice))
+
+    def on_new_dice_amount(self, player_name, amount) :
+        self.encoder.encode(self.buffer, "on_new_dice_amount", 
+                            (player_name, amount))
+
+    def on_bid_reset(self) :
+        self.encoder.encode(self.buffer, "on_bid_reset", ())
+
+    def on_error(self, value) :
+        self.encoder.encode(self.buffer, "on_error", (value,))
+
+
+def deliver(decoded, target) :
+    """Call the method of target named by each decoded event or action, for
+example a GameView for events or a ProxyDispatcher for actions"""
+    for name, args in decoded :
+        getattr(target, name)(*args)
+
+
+if __name__ == "__main__" :
+    pass
@@ -0,0 +1,196 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+Test the binary encoding of game view events and actions"""
+
+import io
+import random
+import struct
+import unittest
+
+from mock import Mock
+
+import game_codec
+import game_log_test
+import game_state
+import game_views
+
+# An example of every event and action with its arguments
+EXAMPLES = [
+    ("on_game_start", ("Ann", ["Ann", "Bob", "Cat"])),
+    ("on_bid", ("Ann", (3, 6))),
+    ("on_bid", ("Bob", None)),
+    ("on_challenge", ("Ann", "Bob", {"Ann" : [1, 2], "Bob" : [6], 
+                                     "Cat" : None}, (100000, 4))),
+    ("on_activation", ("Ann",)),
+    ("on_player_start_turn", ("Bob",)),
+    ("on_player_end_turn", ("Ann",)),
+    ("on_player_addition", ("Dan",)),
+    ("on_player_remove", ("Cat",)),
+    ("on_deactivate", ("Bob",)),
+    ("on_game_end", ("Ann",)),
+    ("on_set_dice", ("Ann", [1, 2, 3, 4, 5, 6])),
+    ("on_set_dice", ("Bob", [])),
+    ("on_set_dice", ("Cat", None)),
+    ("on_new_dice_amount", ("Ann", 4)),
+    ("on_bid_reset", ()),
+    ("on_error", ("Connection lost",)),
+    ("start_game", ()),
+    ("make_bid", ((2, 5),)),
+    ("make_challenge", (None, None)),
+    ("make_challenge", ("Bob", "Ann"))]
+
+class CodecTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.encoder = game_codec.Encoder()
+        self.decoder = game_codec.Decoder()
+
+    def encode(self, items) :
+        out = bytearray()
+        for name, args in items :
+            self.encoder.encode(out, name, args)
+        return out
+
+    def testRoundTripOfEveryEventAndAction(self) :
+        decoded, used = self.decoder.decode(self.encode(EXAMPLES))
+        self.assertEquals(EXAMPLES, decoded)
+
+    def testEveryEventIsCovered(self) :
+        events = set(name for name in dir(game_views.GameView) 
+                     if name.startswith("on_") and name != "on_events")
+        self.assertEquals(events, set(game_codec.EVENTS))
+        self.assertEquals(events | set(game_codec.ACTIONS), 
+                          set(name for name, args in EXAMPLES))
+
+    def testNamesAreSentOnce(self) :
+        first = self.encode([("on_bid", ("A long player name", (1, 2)))])
+        second = self.encode([("on_bid", ("A long player name", (1, 2)))])
+        self.assertTrue(b"A long player name" in bytes(first))
+        self.assertTrue(b"A long player name" not in bytes(second))
+        self.assertEquals(11, len(second))
+        self.decoder.decode(first)
+        self.assertEquals([("on_bid", ("A long player name", (1, 2)))], 
+                          self.decoder.decode(second)[0])
+
+    def testDecodingStream(self) :
+        data = self.encode(EXAMPLES)
+        stream = bytearray()
+        decoded = list()
+        for start in range(0, len(data), 7) :
+            stream.extend(data[start:start + 7])
+            events, used = self.decoder.decode(stream)
+            decoded.extend(events)
+            del stream[:used]
+        self.assertEquals(EXAMPLES, decoded)
+        self.assertEquals(0, len(stream))
+
+    def testUnicodeNames(self) :
+        events = [("on_player_addition", (u"Jos\u00e9",))]
+        self.assertEquals(events, 
+                          self.decoder.decode(self.encode(events))[0])
+
+    def testUnknownFrameTypeThrowsException(self) :
+        self.assertRaises(ValueError, self.decoder.decode, 
+                          bytearray(b"\x01\x00\x7f"))
+
+    def testMalformedFramesThrowException(self) :
+        bid = game_codec.EVENTS.index("on_bid") + 1
+        activation = game_codec.EVENTS.index("on_activation") + 1
+        set_dice = game_codec.EVENTS.index("on_set_dice") + 1
+        named = self.encode([("on_activation", ("Ann",))])
+        for frames in (struct.pack("<HB", 0, bid),
+                       struct.pack("<HB", 1, bid),
+                       struct.pack("<HBH", 3, activation, 5),
+                       struct.pack("<HBH", 3, game_codec.NAME, 2) + b"Bob",
+                       struct.pack("<HBHB", 6, set_dice, 0, 9) + b"\x01\x02",
+                       bytes(named) + struct.pack("<HBH", 6, 
+                           game_codec.NAME, 0) + b"Bob") :
+            decoder = game_codec.Decoder()
+            self.assertRaises(ValueError, decoder.decode, bytearray(frames))
+
+    def testHandTooLargeThrowsException(self) :
+        self.assertRaises(ValueError, self.encode, 
+                          [("on_set_dice", ("Ann", [1] * 255))])
+        self.encode([("on_set_dice", ("Ann", [1] * 254))])
+
+    def testArgumentsTooLargeThrowException(self) :
+        out = bytearray()
+        for name, args in (("on_bid", ("Ann", (3, 300))), 
+                           ("on_bid", ("Ann", (2 ** 32, 3))),
+                           ("make_bid", ((-1, 3),)),
+                           ("on_new_dice_amount", ("Ann", 2 ** 16)),
+                           ("on_set_dice", ("Ann", [1, 256])),
+                           ("on_challenge", ("Ann", "Bob", {}, (1, 256)))) :
+            self.assertRaises(ValueError, self.encoder.encode, out, name, 
+                              args)
+            self.assertEquals(bytearray(), out)
+            self.assertEquals([], self.encoder.names)
+        self.assertEquals({}, self.encoder.players)
+        items = [("on_bid", ("Ann", (3, 6)))]
+        out = self.encode(items)
+        self.assertEquals((items, len(out)), self.decoder.decode(out))
+
+    def testDelivering(self) :
+        view = Mock(spec=game_views.GameView)
+        game_codec.deliver([("on_bid", ("Ann", (1, 2)))], view)
+        view.on_bid.assert_called_with("Ann", (1, 2))
+
+
+class EncodingGameViewTest(unittest.TestCase) :
+
+    def testEncodingEventsOfGame(self) :
+        dispatcher, data, writer = game_log_test.logged_game(io.BytesIO(), 
+                                                             fsync=False)
+        encoding = game_codec.EncodingGameView()
+        recording = Mock(spec=game_views.GameView)
+        dispatcher.add_game_view(encoding)
+        dispatcher.add_game_view(recording)
+        rand = random.Random(3)
+        dispatcher.start_game()
+        while dispatcher.get_state() != game_state.START :
+            game_log_test.play_turn(dispatcher, rand)
+        decoded, used = game_codec.Decoder().decode(encoding.take())
+        expected = [(name, args) for name, args, kwargs 
+                    in recording.method_calls]
+        self.assertEquals(expected, decoded)
+        self.assertEquals(0, len(encoding.buffer))
+
+    def testEncodingBatches(self) :
+        encoding = game_codec.EncodingGameView()
+        encoding.on_events(EXAMPLES[:17])
+        decoded, used = game_codec.Decoder().decode(encoding.take())
+        self.assertEquals(EXAMPLES[:17], decoded)
+
+
+def suite() :
+    """Return a test suite of all tests defined in this module"""
+    test_suite = unittest.TestSuite()
+    loader = unittest.TestLoader()
+    test_suite.addTests(loader.loadTestsFromTestCase(CodecTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(EncodingGameViewTest))
+    return test_suite
+
+if __name__ == "__main__" :
+    unittest.TextTestRunner().run(suite())
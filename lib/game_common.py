@@ -28,11 +28,17 @@ dice rolling functions"""
 
 import random
 
+try :
+    import numpy
+except ImportError :
+    numpy = None
+
 def roll_set_of_dice(num, face_vals, rand=random) :
     """Roll a set of dice with values that are 
 face_vals[0] <= n <= face_valls[1].
-Source of randomness comes from prng module"""
-    rand.seed()
+Source of randomness comes from prng module, the module is not reseeded
+on each call so callers wanting a particular sequence should seed it
+themselves or use a DiceRNG"""
     ret_list = list()
     count = 0
     while count < num :
@@ -40,6 +46,78 @@ Source of randomness comes from prng module"""
         count = count + 1
     return ret_list
 
+def new_generator(seed=None) :
+    """Create a random number generator suitable for roll_hands.
+If seed is None the generator is seeded from the OS and is a NumPy 
+RandomState when NumPy is available, otherwise a random.Random instance.
+A seeded generator is always a random.Random, so that an integer seed 
+rolls the same dice with or without NumPy and on Python 2 and 3"""
+    if seed is None and numpy is not None :
+        return numpy.random.RandomState()
+    return random.Random(seed)
+
+_shared_generator = new_generator()
+
+def _draw_dice(total, face_vals, rand) :
+    """Draw total dice with values face_vals[0] <= n <= face_vals[1] in one
+call, returned as a flat list"""
+    low, high = face_vals
+    if numpy is not None and isinstance(rand, numpy.random.RandomState) :
+        return rand.randint(low, high + 1, total).tolist()
+    faces = range(low, high + 1)
+    # The selection random.choices makes, written out as it is not 
+    # available before Python 3.6 and is not promised to stay the same
+    rnd = rand.random
+    span = len(faces)
+    return [faces[int(rnd() * span)] for _ in range(total)]
+
+def roll_hands(counts, face_vals, rand=None) :
+    """Roll a hand of dice for each entry in counts, for example the number
+of dice each active player holds, with values face_vals[0] <= n <= 
+face_vals[1] as returned by Game.get_face_values.
+All the dice are drawn in a single call, using NumPy for an unseeded
+generator when available, then split into a list of hands in the same order
+as counts. rand should be a generator from new_generator, if it is None
+then the module level generator is used"""
+    if rand is None :
+        rand = _shared_generator
+    rolled = _draw_dice(sum(counts), face_vals, rand)
+    hands = list()
+    start = 0
+    for count in counts :
+        hands.append(rolled[start:start + count])
+        start = start + count
+    return hands
+
+def percentile(ordered, fraction) :
+    """Return the value at fraction through the sorted list ordered, or 0
+if ordered is empty"""
+    if not ordered :
+        return 0.0
+    return ordered[int(round(fraction * (len(ordered) - 1)))]
+
+class DiceRNG(object) :
+    """A per-game source of dice rolls.
+The underlying generator is seeded once on creation, either from the seed
+given or from the OS, rather than on every roll.
+Instances can be used anywhere a dice roller is accepted and also provide
+roll_hands to roll the dice for every player in a round in one call"""
+
+    def __init__(self, seed=None) :
+        self.rand = new_generator(seed)
+
+    def seed(self, seed) :
+        """Reseed the generator, for example to replay a particular game.
+The generator is replaced, as for a new DiceRNG given seed"""
+        self.rand = new_generator(seed)
+
+    def __call__(self, num, face_vals) :
+        """Roll a single hand of num dice"""
+        return _draw_dice(num, face_vals, self.rand)
+
+    def roll_hands(self, counts, face_vals) :
+        """Roll a hand for each entry in counts, see roll_hands"""
+        return roll_hands(counts, face_vals, self.rand)
 
 
 class IllegalBidError(Exception) :
@@ -52,7 +130,7 @@ then a bid is attempted with one six then this exception is thrown"""
         self.val = value
 
     def __str__(self) :
-        return repr(self.value)
+        return repr(self.val)
 
 class IllegalStateChangeError(Exception) :
     """This exception occurs when an attempt is made to perform an illegal
@@ -62,7 +140,7 @@ state transition"""
         self.val = value
 
     def __str__(self) :
-        return repr(self.value)  
+        return repr(self.val)  
 
 if __name__ == "__main__" :
     pass
@@ -49,13 +49,106 @@ class DiceRollerTest(unittest.TestCase) :
         self.assertTrue(reduce(lambda x, y: x and (y == ret), val, True))
         self.assertTrue(self.random.randint.called)
         self.assertTrue(self.random.randint.call_count == amount)
-        self.assertTrue(self.random.seed.called)
+        self.assertTrue(not self.random.seed.called)
+
+class HandRollerTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.face = (1, 20)
+        self.counts = [8, 8, 0, 3, 1]
+        self.subject = game_common.roll_hands
+
+    def checkHands(self, hands) :
+        self.assertEquals(len(self.counts), len(hands))
+        for count, hand in zip(self.counts, hands) :
+            self.assertEquals(count, len(hand))
+            self.assertTrue(all(
+                [self.face[0] <= die <= self.face[1] for die in hand]))
+
+    def testRollingHandsWithSharedGenerator(self) :
+        self.checkHands(self.subject(self.counts, self.face))
+
+    def testRollingHandsWithPythonGenerator(self) :
+        self.checkHands(self.subject(self.counts, self.face, 
+                                     random.Random(3)))
+
+    def testRollingHandsCoversAllFaces(self) :
+        hands = self.subject([2000], self.face, random.Random(3))
+        self.assertEquals(set(range(self.face[0], self.face[1] + 1)), 
+                          set(hands[0]))
+
+    @unittest.skipIf(game_common.numpy is None, "NumPy is not installed")
+    def testRollingHandsWithNumpyGenerator(self) :
+        hands = self.subject(self.counts, self.face, 
+                             game_common.new_generator())
+        self.checkHands(hands)
+        self.assertTrue(all([type(die) is int for die in hands[0]]))
+
+class DiceRNGTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.face = (1, 6)
+        self.subject = game_common.DiceRNG(42)
+
+    def testRollingSingleHand(self) :
+        amount = 5
+        val = self.subject(amount, self.face)
+        self.assertEquals(amount, len(val))
+        self.assertTrue(all(
+            [self.face[0] <= die <= self.face[1] for die in val]))
+
+    def testRollingHands(self) :
+        counts = [3, 0, 5, 1]
+        hands = self.subject.roll_hands(counts, self.face)
+        self.assertEquals(len(counts), len(hands))
+        for count, hand in zip(counts, hands) :
+            self.assertEquals(count, len(hand))
+            self.assertTrue(all(
+                [self.face[0] <= die <= self.face[1] for die in hand]))
+
+    def testSameSeedGivesSameRolls(self) :
+        counts = [5, 5, 5]
+        other = game_common.DiceRNG(42)
+        self.assertEquals(self.subject.roll_hands(counts, self.face),
+                          other.roll_hands(counts, self.face))
+
+    def testSeededRollsDoNotDependOnEnvironment(self) :
+        # The same on Python 2 and 3 and with or without NumPy
+        self.assertEquals([[4, 1, 2], [2, 5, 5, 6]], 
+                          self.subject.roll_hands([3, 4], self.face))
+        self.assertEquals([2, 9, 1, 5, 11], self.subject(5, (1, 20)))
+        self.subject.seed(7)
+        self.assertEquals([2, 1, 4, 1, 4, 3], self.subject(6, self.face))
+        self.assertTrue(isinstance(game_common.new_generator(7), 
+                                   random.Random))
+
+
+class PercentileTest(unittest.TestCase) :
+
+    def testPercentiles(self) :
+        ordered = [0.1, 0.2, 0.3, 0.4, 0.5]
+        self.assertEquals(0.3, game_common.percentile(ordered, 0.5))
+        self.assertEquals(0.5, game_common.percentile(ordered, 0.99))
+        self.assertEquals(0.0, game_common.percentile([], 0.5))
+
+
+class ErrorTest(unittest.TestCase) :
+
+    def testErrorsShowTheirValue(self) :
+        self.assertEquals("((1, 2), (3, 4))", 
+            str(game_common.IllegalBidError(((1, 2), (3, 4)))))
+        self.assertEquals("'started'", 
+            str(game_common.IllegalStateChangeError("started")))
 
 def suite() :
     """Return a test suite of all tests defined in this module"""
     test_suite = unittest.TestSuite()
     loader = unittest.TestLoader()
     test_suite.addTests(loader.loadTestsFromTestCase(DiceRollerTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(HandRollerTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(DiceRNGTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(PercentileTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(ErrorTest))
     return test_suite
 
 if __name__ == "__main__" :
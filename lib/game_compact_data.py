@@ -0,0 +1,279 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+
+
+This module contains a compact data store for the game, for hosting large
+numbers of tables in one process.
+It provides the same methods as game_data.GameData but keeps one record per
+player using __slots__, with the dice held as an array of bytes and the bid
+packed into a single int. Counts that GameData keeps up to date, such as the
+number of dice showing each face, are instead worked out when asked for so
+no extra memory is needed for them"""
+
+from array import array
+
+_NO_BID = -1
+_NO_VIEWS = ()
+
+def pack_bid(bid) :
+    """Pack a bid of (number of dice, face) into an int, None is packed as
+-1. The face must be between 0 and 255"""
+    if bid is None :
+        return _NO_BID
+    count, face = bid[0], bid[1]
+    if not 0 <= face <= 0xFF or count < 0 :
+        raise ValueError(bid)
+    return (count << 8) | face
+
+def unpack_bid(packed) :
+    """Unpack a bid packed by pack_bid, returned as a tuple"""
+    if packed == _NO_BID :
+        return None
+    return (packed >> 8, packed & 0xFF)
+
+
+class PlayerRecord(object) :
+    """The state held for a single player"""
+    __slots__ = ("name", "seat", "dice", "bid", "active")
+
+    def __init__(self, name, seat) :
+        self.name = name
+        self.seat = seat
+        self.dice = None
+        self.bid = _NO_BID
+        self.active = True
+
+
+class CompactGameData(object) :
+    """A memory efficient version of GameData.
+Players are kept as PlayerRecord objects in seat order with a dictionary
+from player to record. Dice values must fit in a byte and are returned as
+new lists by get_dice, bids are returned as tuples"""
+    __slots__ = ("records", "index", "starting", "low", "high", 
+                 "cur_player", "cur_state", "game_views")
+
+    def __init__(self, starting_dice=5, lowest_face=1, highest_face=6) :
+        self.records = list()
+        self.index = dict()
+        self.starting = starting_dice
+        self.low = lowest_face
+        self.high = highest_face
+        self.cur_player = None
+        self.cur_state = None
+        self.game_views = None
+
+    def add_game_view(self, view) :
+        """Add a game view to the list of game views"""
+        if self.game_views is None :
+            self.game_views = list()
+        self.game_views.append(view)
+
+    def get_game_views(self) :
+        """Return a list of game views"""
+        if self.game_views is None :
+            return _NO_VIEWS
+        return self.game_views
+
+    def set_current_state(self, state) :
+        """Set the current state of the game"""
+        self.cur_state = state
+
+    def get_current_state(self) :
+        """Return the current state of the game"""
+        return self.cur_state
+
+    def get_current_player(self) :
+        """Return the player whose turn it currently is"""
+        return self.cur_player
+
+    def set_current_player(self, player) :
+        """Set the player whose current turn it is"""
+        self.cur_player = player
+
+    def _record(self, player) :
+        """Return the record for a player. If the player has not been added
+then raise a ValueError"""
+        try :
+            return self.index[player]
+        except KeyError :
+            raise ValueError(player)
+
+    def add_player(self, player) :
+        """Add a player to the game, the player is active on adding. If the 
+player has already been added then raise a ValueError"""
+        if player in self.index :
+            raise ValueError(player)
+        record = PlayerRecord(player, len(self.records))
+        self.records.append(record)
+        self.index[player] = record
+
+    def remove_player(self, player) :
+        """Remove player from the game"""
+        record = self._record(player)
+        del self.records[record.seat]
+        del self.index[player]
+        for later in self.records[record.seat:] :
+            later.seat = later.seat - 1
+
+    def is_active(self, player) :
+        """Return if a player is active. Players that have not been added
+are considered active"""
+        record = self.index.get(player)
+        return record is None or record.active
+
+    def get_players(self) :
+        """Return the players currently marked active"""
+        return [record.name for record in self.records if record.active]
+
+    def get_all_players(self) :
+        """Return all players, including those marked inactive"""
+        return [record.name for record in self.records]
+
+    def _active_record(self, player) :
+        """Return the record for an active player, if the player is not
+active then raise a ValueError"""
+        record = self._record(player)
+        if not record.active :
+            raise ValueError(player)
+        return record
+
+    def get_next_player(self, player) :
+        """Return the active player after player, wrapping around to the 
+first active player. If player is not active then raise a ValueError"""
+        records = self.records
+        seat = self._active_record(player).seat
+        while True :
+            seat = seat + 1
+            if seat >= len(records) :
+                seat = 0
+            if records[seat].active :
+                return records[seat].name
+
+    def get_previous_player(self, player) :
+        """Return the active player before player, wrapping around to the 
+last active player. If player is not active then raise a ValueError"""
+        records = self.records
+        seat = self._active_record(player).seat
+        while True :
+            seat = seat - 1
+            if records[seat].active :
+                return records[seat].name
+
+    def make_all_active(self) :
+        """Mark all players as active"""
+        for record in self.records :
+            record.active = True
+
+    def mark_inactive(self, player) :
+        """Mark a player as being inactive, an inactive player is not included
+in a call to get_players"""
+        record = self.index.get(player)
+        if record is not None :
+            record.active = False
+
+    def get_dice(self, player) :
+        """Get the dice for a particular player"""
+        dice = self._record(player).dice
+        if dice is None :
+            return None
+        return dice.tolist()
+
+    def get_bid(self, player) :
+        """Get the bid for a particular player"""
+        return unpack_bid(self._record(player).bid)
+
+    def set_dice(self, player, dice) :
+        """Set the dice a particular player has in their hand. If player has 
+not been added then raise a ValueError"""
+        record = self._record(player)
+        if dice is None :
+            record.dice = None
+        else :
+            record.dice = array("B", dice)
+
+    def remove_dice(self, player) :
+        """Remove the last dice from a players hand"""
+        record = self._record(player)
+        if record.dice :
+            record.dice = record.dice[:-1]
+
+    def set_bid(self, player, bid) :
+        """Set the bid for a particular player has made. If player has not 
+been added then raise a ValueError"""
+        self._record(player).bid = pack_bid(bid)
+
+    def get_face_count(self, face) :
+        """Return the number of dice across all players showing face"""
+        total = 0
+        for record in self.records :
+            if record.dice is not None :
+                total = total + record.dice.count(face)
+        return total
+
+    def get_number_of_players_with_dice(self) :
+        """Return the number of players with at least one dice"""
+        return len([record for record in self.records if record.dice])
+
+    def get_survivor(self) :
+        """Return the only player with any dice left. If more than one player,
+or no player, has dice then return None"""
+        survivor = None
+        for record in self.records :
+            if record.dice :
+                if survivor is not None :
+                    return None
+                survivor = record.name
+        return survivor
+
+    def get_num_of_starting_dice(self) :
+        """Get the number of dice given to each player at the start of the
+game"""
+        return self.starting
+
+    def get_number_of_dice(self, player) :
+        """Return the number of dice a player has"""
+        return len(self._record(player).dice)
+
+    def get_dice_map(self) :
+        """Create a dictionary with each player and the dice values"""
+        ret = dict()
+        for record in self.records :
+            if record.dice is None :
+                ret[record.name] = None
+            else :
+                ret[record.name] = record.dice.tolist()
+        return ret
+
+    def get_lowest_dice(self) :
+        """Return the lowest possible face on a dice"""
+        return self.low
+    
+    def get_highest_dice(self) :
+        """Return the highest possible face on a dice"""
+        return self.high
+
+
+if __name__ == "__main__" :
+    pass
@@ -0,0 +1,98 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+Test the compact game data object against the same tests as the game data
+object, plus its own packing of bids and dice"""
+
+import unittest
+
+import game_compact_data
+import game_data_test
+import game_integration_test
+
+class CompactGameDataTest(game_data_test.GameDataTest) :
+
+    def setUp(self) :
+        self.starting = 3
+        self.subject = game_compact_data.CompactGameData(self.starting)
+
+    def testRecordsHaveNoDictionary(self) :
+        self.subject.add_player("player")
+        self.assertTrue(not hasattr(self.subject, "__dict__"))
+        self.assertTrue(not hasattr(self.subject.records[0], "__dict__"))
+
+    def testBidIsReturnedAsTuple(self) :
+        self.subject.add_player("player")
+        self.subject.set_bid("player", [3, 20])
+        self.assertEquals((3, 20), self.subject.get_bid("player"))
+        self.subject.set_bid("player", None)
+        self.assertTrue(self.subject.get_bid("player") is None)
+
+    def testGettingDiceReturnsCopy(self) :
+        self.subject.add_player("player")
+        self.subject.set_dice("player", [1, 2, 3])
+        dice = self.subject.get_dice("player")
+        dice.append(4)
+        self.assertEquals([1, 2, 3], self.subject.get_dice("player"))
+
+    def testDiceMustFitInAByte(self) :
+        self.subject.add_player("player")
+        def caller() :
+            self.subject.set_dice("player", [256])
+        self.assertRaises(OverflowError, caller)
+
+
+class BidPackingTest(unittest.TestCase) :
+
+    def testPackingBids(self) :
+        for bid in [(0, 0), (1, 6), (40, 20), (100000, 255)] :
+            packed = game_compact_data.pack_bid(bid)
+            self.assertEquals(bid, game_compact_data.unpack_bid(packed))
+
+    def testPackingNoBid(self) :
+        packed = game_compact_data.pack_bid(None)
+        self.assertTrue(game_compact_data.unpack_bid(packed) is None)
+
+    def testPackingBadBid(self) :
+        self.assertRaises(ValueError, game_compact_data.pack_bid, (1, 256))
+        self.assertRaises(ValueError, game_compact_data.pack_bid, (-1, 2))
+
+
+class CompactGameIntegrationTest(game_integration_test.GameIntegrationTest) :
+
+    data_class = game_compact_data.CompactGameData
+
+
+def suite() :
+    """Return a test suite of all tests defined in this module"""
+    test_suite = unittest.TestSuite()
+    loader = unittest.TestLoader()
+    test_suite.addTests(loader.loadTestsFromTestCase(CompactGameDataTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(BidPackingTest))
+    test_suite.addTests(
+        loader.loadTestsFromTestCase(CompactGameIntegrationTest))
+    return test_suite
+
+if __name__ == "__main__" :
+    unittest.TextTestRunner().run(suite())
@@ -30,14 +30,33 @@ class GameData(object) :
 ogresss.
     It maintains a list of players in the game as well as the dice values for ea
 ch player
-    Additionally it holds the number of starting dice """
+    Additionally it holds the number of starting dice.
+    Players are kept in insertion order and each player is mapped to its slot
+    in the dice and bid lists through a dictionary so per player lookups do
+    not scan the player list.
+    A running count of how many dice show each face is kept up to date as
+    dice are set and removed so bids can be checked without a dice map, 
+    similarly the players still holding dice are tracked so the end of the
+    game can be detected without one.
+    The active players are kept as a ring linking each to the next and 
+    previous active player, which is updated in constant time as a player 
+    is added, removed or marked inactive, so finding the next and previous 
+    player is constant time. The list returned by get_players is built from
+    the ring only when asked for after a change"""
     
     def __init__(self, starting_dice=5, lowest_face=1, highest_face=6) :
         """Create a game object with a random source"""
         self.dice = list()
         self.bids = list()
         self.players = list()
+        self.slots = dict()
         self.inactive = set()
+        self.next_active = dict()
+        self.previous_active = dict()
+        self.first_active = None
+        self.roster = list()
+        self.face_counts = dict()
+        self.holding = set()
         self.starting = starting_dice
         self.low = lowest_face
         self.high = highest_face
@@ -72,30 +91,106 @@ ch player
     def add_player(self, player) :
         """Add a player to the list of players in the round. 
 If this method is not called then any call to add dice will fail. 
-The player is added and is considered active on adding"""
+The player is added and is considered active on adding.
+If the player has already been added then raise a ValueError"""
+        if player in self.slots :
+            raise ValueError(player)
+        self.slots[player] = len(self.players)
         self.players.append(player)
         self.dice.append(None)
         self.bids.append(None)
+        if player not in self.inactive :
+            self._link(player)
 
     def remove_player(self, player) : 
         """Remove player from the game"""
-        index = self.players.index(player)
+        index = self._slot(player)
+        self._count_faces(self.dice[index], -1)
+        self.holding.discard(player)
         del self.dice[index]
         del self.bids[index]
         del self.players[index]
+        del self.slots[player]
+        for later in self.players[index:] :
+            self.slots[later] = self.slots[later] - 1
         self.inactive.discard(player)
+        self._unlink(player)
+
+    def _link(self, player) :
+        """Add player to the end of the ring of active players"""
+        first = self.first_active
+        if first is None :
+            self.first_active = player
+            self.next_active[player] = player
+            self.previous_active[player] = player
+        else :
+            last = self.previous_active[first]
+            self.next_active[last] = player
+            self.previous_active[player] = last
+            self.next_active[player] = first
+            self.previous_active[first] = player
+        self.roster = None
+
+    def _unlink(self, player) :
+        """Take player out of the ring of active players, if they are in it"""
+        following = self.next_active.pop(player, None)
+        if following is None :
+            return
+        before = self.previous_active.pop(player)
+        if following == player :
+            self.first_active = None
+        else :
+            self.next_active[before] = following
+            self.previous_active[following] = before
+            if self.first_active == player :
+                self.first_active = following
+        self.roster = None
+
+    def _slot(self, player) :
+        """Return the index of the player in the dice and bid lists. If the
+player has not been added then raise a ValueError"""
+        try :
+            return self.slots[player]
+        except KeyError :
+            raise ValueError(player)
 
     def is_active(self, player) :
         """Return if a player is active"""
         return player not in self.inactive
     
     def get_players(self) :
-        """Return the players currently marked active"""
-        retlist = list()
-        for player in self.players :
-            if player not in self.inactive :
-                retlist.append(player)
-        return retlist
+        """Return the players currently marked active, the list returned
+should not be modified"""
+        if self.roster is None :
+            roster = list()
+            player = self.first_active
+            if player is not None :
+                following = self.next_active
+                roster.append(player)
+                player = following[player]
+                while player != self.first_active :
+                    roster.append(player)
+                    player = following[player]
+            # A new list rather than one changed in place, as earlier 
+            # results may still be held
+            self.roster = roster
+        return self.roster
+
+    def get_next_player(self, player) :
+        """Return the active player after player, wrapping around to the 
+first active player. If player is not active then raise a ValueError"""
+        try :
+            return self.next_active[player]
+        except KeyError :
+            raise ValueError(player)
+
+    def get_previous_player(self, player) :
+        """Return the active player before player, wrapping around to the 
+last active player. If player is not active then raise a ValueError"""
+        try :
+            return self.previous_active[player]
+        except KeyError :
+            raise ValueError(player)
 
     def get_all_players(self) :
         """Return all players, including those marked inactive"""
@@ -104,35 +199,78 @@ The player is added and is considered active on adding"""
     def make_all_active(self) :
         """Mark all players as active"""
         self.inactive.clear()
+        self.next_active.clear()
+        self.previous_active.clear()
+        self.first_active = None
+        for player in self.players :
+            self._link(player)
 
     def mark_inactive(self, player) :
         """Mark a player as being inactive, an inactive player is not included i
 n a call to get_players"""
         self.inactive.add(player)
+        self._unlink(player)
 
     def get_dice(self, player) :
         """Get the dice for a particular player"""
-        return self.dice[self.players.index(player)]
+        return self.dice[self._slot(player)]
 
     def get_bid(self, player) :
         """Get the bid for a particular player"""
-        return self.bids[self.players.index(player)]
+        return self.bids[self._slot(player)]
 
     def set_dice(self, player, dice) :
         """Set the dice a particular player has in their hand. If player has not
  had players added to it then raise a ValueError"""
-        if player not in self.players :
-            raise ValueError
+        index = self._slot(player)
+        self._count_faces(self.dice[index], -1)
+        self._count_faces(dice, 1)
+        self.dice[index] = dice
+        if dice :
+            self.holding.add(player)
         else :
-            self.dice[self.players.index(player)] = dice
+            self.holding.discard(player)
+
+    def remove_dice(self, player) :
+        """Remove the last dice from a players hand. The hand is replaced
+rather than changed in place so earlier results of get_dice and 
+get_dice_map are unaffected"""
+        index = self._slot(player)
+        dice = self.dice[index]
+        if dice :
+            self.face_counts[dice[-1]] = self.face_counts[dice[-1]] - 1
+            self.dice[index] = dice[:-1]
+            if len(dice) == 1 :
+                self.holding.discard(player)
+
+    def _count_faces(self, dice, change) :
+        """Add change to the count of each face in dice"""
+        if dice is None :
+            return
+        counts = self.face_counts
+        for die in dice :
+            counts[die] = counts.get(die, 0) + change
+
+    def get_face_count(self, face) :
+        """Return the number of dice across all players showing face"""
+        return self.face_counts.get(face, 0)
+
+    def get_number_of_players_with_dice(self) :
+        """Return the number of players with at least one dice"""
+        return len(self.holding)
+
+    def get_survivor(self) :
+        """Return the only player with any dice left. If more than one player,
+or no player, has dice then return None"""
+        if len(self.holding) == 1 :
+            for player in self.holding :
+                return player
+        return None
      
     def set_bid(self, player, bid) :
         """Set the bid for a particular player has made. If player has not been 
 added to object then raise a value error"""
-        if player not in self.players :
-            raise ValueError
-        else :
-            self.bids[self.players.index(player)] = bid
+        self.bids[self._slot(player)] = bid
 
     def get_num_of_starting_dice(self) :
         """Get the number of dice given to each player at the start of the
@@ -145,10 +283,7 @@ game"""
 
     def get_dice_map(self) :
         """Create a dictionary with each player and the dice values"""
-        ret = dict() 
-        for player in self.players :
-            ret[player] = self.get_dice(player)
-        return ret
+        return dict(zip(self.players, self.dice))
 
     def get_lowest_dice(self) :
         """Return the lowest possible face on a dice"""
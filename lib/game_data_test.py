@@ -143,6 +143,174 @@ class GameDataTest(unittest.TestCase) :
         self.assertEquals(1, len(players))
         self.assertTrue(player in players)
 
+    def testRemovingPlayerKeepsOtherPlayersData(self) :
+        players = ["player%i" % i for i in xrange(0, 4)]
+        for i, player in enumerate(players) :
+            self.subject.add_player(player)
+            self.subject.set_dice(player, [i])
+            self.subject.set_bid(player, (i, i))
+        self.subject.remove_player(players[1])
+        del players[1]
+        self.assertEquals(players, self.subject.get_all_players())
+        for player in players :
+            i = int(player[-1])
+            self.assertEquals([i], self.subject.get_dice(player))
+            self.assertEquals((i, i), self.subject.get_bid(player))
+        self.subject.set_dice(players[2], [6])
+        self.assertEquals([6], self.subject.get_dice(players[2]))
+        self.assertEquals([2], self.subject.get_dice(players[1]))
+
+    def testAddingPlayerTwiceThrowsException(self) :
+        player = "player"
+        self.subject.add_player(player)
+        def caller() :
+            self.subject.add_player(player)
+        self.assertRaises(ValueError, caller)
+        self.assertEquals(1, len(self.subject.get_all_players()))
+
+    def testGettingDiceWithNoPlayerThrowsException(self) :
+        def caller() :
+            self.subject.get_dice("player")
+        self.assertRaises(ValueError, caller)
+
+    def testGettingDiceMap(self) :
+        self.subject.add_player("player1")
+        self.subject.add_player("player2")
+        self.subject.set_dice("player1", [1, 2])
+        self.subject.set_dice("player2", [3])
+        self.assertEquals({"player1" : [1, 2], "player2" : [3]}, 
+                          self.subject.get_dice_map())
+
+    def testCountingFaces(self) :
+        self.subject.add_player("player1")
+        self.subject.add_player("player2")
+        self.subject.set_dice("player1", [1, 2, 2])
+        self.subject.set_dice("player2", [2, 6])
+        self.assertEquals(1, self.subject.get_face_count(1))
+        self.assertEquals(3, self.subject.get_face_count(2))
+        self.assertEquals(1, self.subject.get_face_count(6))
+        self.assertEquals(0, self.subject.get_face_count(4))
+        self.subject.set_dice("player1", [4])
+        self.assertEquals(0, self.subject.get_face_count(1))
+        self.assertEquals(1, self.subject.get_face_count(2))
+        self.assertEquals(1, self.subject.get_face_count(4))
+        self.subject.remove_player("player2")
+        self.assertEquals(0, self.subject.get_face_count(2))
+        self.assertEquals(0, self.subject.get_face_count(6))
+
+    def testRemovingDice(self) :
+        player = "player"
+        self.subject.add_player(player)
+        dice = [1, 2, 3]
+        self.subject.set_dice(player, dice)
+        self.subject.remove_dice(player)
+        self.assertEquals([1, 2], self.subject.get_dice(player))
+        self.assertEquals([1, 2, 3], dice)
+        self.assertEquals(0, self.subject.get_face_count(3))
+        self.subject.remove_dice(player)
+        self.subject.remove_dice(player)
+        self.subject.remove_dice(player)
+        self.assertEquals([], self.subject.get_dice(player))
+        self.assertEquals(0, self.subject.get_face_count(1))
+
+    def testGettingNextAndPreviousPlayer(self) :
+        players = ["player%i" % i for i in xrange(0, 5)]
+        for player in players :
+            self.subject.add_player(player)
+        self.assertEquals(players[1], 
+                          self.subject.get_next_player(players[0]))
+        self.assertEquals(players[0], 
+                          self.subject.get_next_player(players[4]))
+        self.assertEquals(players[3], 
+                          self.subject.get_previous_player(players[4]))
+        self.assertEquals(players[4], 
+                          self.subject.get_previous_player(players[0]))
+
+    def testGettingNextAndPreviousPlayerWithOnePlayer(self) :
+        player = "player"
+        self.subject.add_player(player)
+        self.assertEquals(player, self.subject.get_next_player(player))
+        self.assertEquals(player, self.subject.get_previous_player(player))
+
+    def testNextAndPreviousPlayerSkipInactivePlayers(self) :
+        players = ["player%i" % i for i in xrange(0, 4)]
+        for player in players :
+            self.subject.add_player(player)
+        self.subject.mark_inactive(players[1])
+        self.subject.mark_inactive(players[3])
+        self.assertEquals(players[2], 
+                          self.subject.get_next_player(players[0]))
+        self.assertEquals(players[0], 
+                          self.subject.get_next_player(players[2]))
+        self.assertEquals(players[2], 
+                          self.subject.get_previous_player(players[0]))
+        self.assertEquals([players[0], players[2]], 
+                          self.subject.get_players())
+        def caller() :
+            self.subject.get_next_player(players[1])
+        self.assertRaises(ValueError, caller)
+        self.subject.make_all_active()
+        self.assertEquals(players, self.subject.get_players())
+        self.assertEquals(players[1], 
+                          self.subject.get_next_player(players[0]))
+
+    def testRosterFollowsAddingAndRemovingPlayers(self) :
+        players = ["player%i" % i for i in xrange(0, 3)]
+        for player in players :
+            self.subject.add_player(player)
+        self.subject.mark_inactive(players[0])
+        active = self.subject.get_players()
+        self.subject.remove_player(players[1])
+        self.assertEquals([players[1], players[2]], active)
+        self.assertEquals([players[2]], self.subject.get_players())
+        self.subject.add_player("player3")
+        self.assertEquals([players[2], "player3"], 
+                          self.subject.get_players())
+        self.assertEquals(players[2], 
+                          self.subject.get_next_player("player3"))
+
+    def testRingAfterRemovingFirstAndLastPlayers(self) :
+        players = ["player%i" % i for i in xrange(0, 4)]
+        for player in players :
+            self.subject.add_player(player)
+        self.subject.remove_player(players[0])
+        self.subject.mark_inactive(players[3])
+        self.assertEquals(players[1:3], self.subject.get_players())
+        self.assertEquals(players[1], 
+                          self.subject.get_next_player(players[2]))
+        self.assertEquals(players[2], 
+                          self.subject.get_previous_player(players[1]))
+        self.subject.mark_inactive(players[1])
+        self.assertEquals(players[2], 
+                          self.subject.get_next_player(players[2]))
+        self.subject.mark_inactive(players[2])
+        self.assertEquals([], self.subject.get_players())
+        self.subject.add_player("player4")
+        self.assertEquals(["player4"], self.subject.get_players())
+        self.subject.make_all_active()
+        self.assertEquals(players[1:] + ["player4"], 
+                          self.subject.get_players())
+
+    def testTrackingSurvivor(self) :
+        players = ["player%i" % i for i in xrange(0, 3)]
+        for player in players :
+            self.subject.add_player(player)
+        self.assertEquals(0, self.subject.get_number_of_players_with_dice())
+        self.assertTrue(self.subject.get_survivor() is None)
+        for player in players :
+            self.subject.set_dice(player, [1, 2])
+        self.assertEquals(3, self.subject.get_number_of_players_with_dice())
+        self.assertTrue(self.subject.get_survivor() is None)
+        self.subject.set_dice(players[0], [])
+        self.subject.remove_dice(players[1])
+        self.assertTrue(self.subject.get_survivor() is None)
+        self.subject.remove_dice(players[1])
+        self.assertEquals(1, self.subject.get_number_of_players_with_dice())
+        self.assertEquals(players[2], self.subject.get_survivor())
+        self.subject.remove_player(players[2])
+        self.assertEquals(0, self.subject.get_number_of_players_with_dice())
+        self.assertTrue(self.subject.get_survivor() is None)
+
     def testAddingDiceWithNoPlayerThrowsException(self) :
         player = "player"
         dice = [1, 2, 3, 4]
@@ -0,0 +1,325 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+
+
+This module provides opt-in instrumentation of running games. An 
+Instrument records the number of calls and the time taken by the public 
+methods of a Game, the state transitions of game_state and the callbacks of
+game views, for the objects it is asked to instrument. 
+Objects are instrumented by replacing their methods on the instance with 
+timed wrappers, so games that are not instrumented run exactly the code 
+they did before, and remove_table or remove puts the original methods 
+back. The instrument holds only weak references to what it instruments, 
+so a table that is dropped without being removed is not kept alive. 
+The counters can be read as a dict with snapshot or in the Prometheus text
+exposition format with prometheus_text:
+
+    instrument = Instrument()
+    instrument.instrument_table(dispatcher)
+    ...
+    print(instrument.prometheus_text())
+
+Times are inclusive, the time of Game.make_bid includes the transition and
+the game view callbacks it leads to"""
+
+import time
+import weakref
+
+from game_common import percentile
+
+# The highest resolution clock available
+_clock = getattr(time, "perf_counter", time.time)
+
+# The names of the state ids of game_state and the events of a transition,
+# in the order they are indexed in TransitionEngine.transitions
+_STATE_NAMES = ("START", "FIRST_BID", "BID")
+_EVENTS = ("on_game_start", "on_bid", "on_challenge")
+
+# The percentiles reported for each operation
+PERCENTILES = (0.5, 0.9, 0.99)
+
+class OperationStats(object) :
+    """The counters of one operation, the number of calls, the total and
+largest number of seconds taken and the times of the last sample_size 
+calls from which percentiles are worked out"""
+
+    __slots__ = ("count", "total", "maximum", "samples", "size", "next")
+
+    def __init__(self, sample_size=1024) :
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.samples = list()
+        self.size = sample_size
+        self.next = 0
+
+    def add(self, seconds) :
+        """Record a call taking seconds"""
+        self.count = self.count + 1
+        self.total = self.total + seconds
+        if seconds > self.maximum :
+            self.maximum = seconds
+        if len(self.samples) < self.size :
+            self.samples.append(seconds)
+        else :
+            self.samples[self.next] = seconds
+            self.next = (self.next + 1) % self.size
+
+    def clear(self) :
+        """Forget all calls recorded so far"""
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.samples = list()
+        self.next = 0
+
+    def percentiles(self) :
+        """Return a list of the seconds taken at each of PERCENTILES"""
+        ordered = sorted(self.samples)
+        return [percentile(ordered, fraction) for fraction in PERCENTILES]
+
+
+def _state_object(game_obj) :
+    """Return the state object of a game not using an engine, or None"""
+    state = game_obj.plays.get_current_state()
+    if isinstance(state, (int, type(None))) :
+        return None
+    return state
+
+def _next_state(state) :
+    """Return the state a game_state state object leads to"""
+    return getattr(state, "first", None) or getattr(state, "next", None)
+
+def _clear_resolved(dispatcher) :
+    """Have a dispatcher and its proxy look up methods again"""
+    dispatcher.clear_resolved()
+    dispatcher.proxy.handlers.clear()
+
+def _label(value) :
+    """Escape value for use as a Prometheus label value"""
+    return value.replace("\\", "\\\\").replace("\"", "\\\"") \
+                .replace("\n", "\\n")
+
+class Instrument(object) :
+    """Records call counts and times for the objects it instruments.
+Each operation is named after what was instrumented, game.<method> for a 
+Game, game_state.<state>.<event> for a state transition and 
+view.<class>.<callback> for a game view"""
+
+    def __init__(self, sample_size=1024) :
+        self.sample_size = sample_size
+        self.stats = dict()
+        # Weak references to the objects and dispatchers instrumented, by
+        # id, so that instrumenting a game does not keep it alive
+        self.objects = dict()
+        self.dispatchers = dict()
+
+    def _stats_for(self, name) :
+        try :
+            return self.stats[name]
+        except KeyError :
+            stats = OperationStats(self.sample_size)
+            self.stats[name] = stats
+            return stats
+
+    def wrap(self, func, name) :
+        """Return a function calling func and recording the time taken 
+under the operation name"""
+        stats = self._stats_for(name)
+        clock = _clock
+        def timed(*args, **kwargs) :
+            start = clock()
+            try :
+                return func(*args, **kwargs)
+            finally :
+                stats.add(clock() - start)
+        timed.__doc__ = getattr(func, "__doc__", None)
+        timed.instrument = self
+        timed.original = func
+        return timed
+
+    def _is_wrapper(self, value) :
+        return getattr(value, "instrument", None) is self
+
+    def _track(self, registry, obj) :
+        """Keep a weak reference to obj in registry until obj is gone"""
+        key = id(obj)
+        def forget(ref) :
+            if registry.get(key) is ref :
+                del registry[key]
+        registry[key] = weakref.ref(obj, forget)
+
+    def _wrap_method(self, obj, method, name) :
+        own = obj.__dict__.get(method)
+        if self._is_wrapper(own) :
+            return
+        timed = self.wrap(getattr(obj, method), name)
+        # Whether the method was set on the object rather than its class
+        timed.own = own is not None
+        setattr(obj, method, timed)
+        self._track(self.objects, obj)
+
+    def instrument_game(self, game_obj) :
+        """Time every public method of a Game. A ProxyDispatcher for the
+game keeps the methods it has resolved, instrument_table clears them"""
+        for method in dir(type(game_obj)) :
+            if not method.startswith("_") and \
+                callable(getattr(game_obj, method)) :
+                self._wrap_method(game_obj, method, "game.%s" % method)
+
+    def instrument_engine(self, engine) :
+        """Time each state transition of a TransitionEngine. The engine is
+usually shared, in which case the transitions of every game using it are
+timed"""
+        if self._is_wrapper(engine.transitions[0][0]) :
+            return
+        engine.transitions = tuple(
+            tuple(self.wrap(handler, "game_state.%s.%s" % (state, event))
+                  for event, handler in zip(_EVENTS, handlers))
+            for state, handlers in zip(_STATE_NAMES, engine.transitions))
+        self._track(self.objects, engine)
+
+    def instrument_state(self, state) :
+        """Time each event of a game_state state object and of the states
+it leads to"""
+        while state is not None and \
+            not self._is_wrapper(state.__dict__.get(_EVENTS[0])) :
+            for event in _EVENTS :
+                self._wrap_method(state, event, "game_state.%s.%s" % 
+                                  (type(state).__name__, event))
+            state = _next_state(state)
+
+    def instrument_view(self, view) :
+        """Time each callback of a game view"""
+        name = type(view).__name__
+        for method in dir(type(view)) :
+            if method.startswith("on_") and callable(getattr(view, method)) :
+                self._wrap_method(view, method, 
+                                  "view.%s.%s" % (name, method))
+
+    def instrument_table(self, dispatcher) :
+        """Instrument the Game of a ProxyDispatcher, its engine or states 
+and the game views held by its data store. Game views added later are 
+not instrumented"""
+        game_obj = dispatcher.game
+        self.instrument_game(game_obj)
+        if game_obj.engine is not None :
+            self.instrument_engine(game_obj.engine)
+        else :
+            state = _state_object(game_obj)
+            if state is not None :
+                self.instrument_state(state)
+        for view in game_obj.plays.get_game_views() :
+            self.instrument_view(view)
+        self._track(self.dispatchers, dispatcher)
+        _clear_resolved(dispatcher)
+
+    def remove_object(self, obj) :
+        """Put back the methods of one object instrumented, a Game, game 
+view, state object or engine"""
+        transitions = obj.__dict__.get("transitions")
+        if transitions and self._is_wrapper(transitions[0][0]) :
+            obj.transitions = tuple(tuple(handler.original 
+                                          for handler in handlers)
+                                    for handlers in obj.transitions)
+        for attrib, value in list(obj.__dict__.items()) :
+            if self._is_wrapper(value) :
+                if value.own :
+                    setattr(obj, attrib, value.original)
+                else :
+                    delattr(obj, attrib)
+        self.objects.pop(id(obj), None)
+
+    def remove_table(self, dispatcher) :
+        """Put back the methods instrumented by instrument_table for the 
+Game of dispatcher, its states and its game views. An engine is left as
+it is, since it is usually shared with other games, remove it with 
+remove_object"""
+        game_obj = dispatcher.game
+        self.remove_object(game_obj)
+        state = _state_object(game_obj)
+        while state is not None and \
+            self._is_wrapper(state.__dict__.get(_EVENTS[0])) :
+            self.remove_object(state)
+            state = _next_state(state)
+        for view in game_obj.plays.get_game_views() :
+            self.remove_object(view)
+        self.dispatchers.pop(id(dispatcher), None)
+        _clear_resolved(dispatcher)
+
+    def remove(self) :
+        """Put back every method replaced, leaving the counters as they 
+are"""
+        for ref in list(self.objects.values()) :
+            obj = ref()
+            if obj is not None :
+                self.remove_object(obj)
+        for ref in list(self.dispatchers.values()) :
+            dispatcher = ref()
+            if dispatcher is not None :
+                _clear_resolved(dispatcher)
+        self.dispatchers.clear()
+
+    def reset(self) :
+        """Forget all calls recorded so far. The counters are cleared in 
+place as the wrappers already made keep using them"""
+        for stats in self.stats.values() :
+            stats.clear()
+
+    def snapshot(self) :
+        """Return a dict keyed by operation name of dicts holding the 
+count, total, mean and max seconds and the seconds at each of PERCENTILES
+as p50, p90 and so on"""
+        result = dict()
+        for name, stats in self.stats.items() :
+            if stats.count == 0 :
+                continue
+            entry = {"count" : stats.count, "total" : stats.total,
+                     "mean" : stats.total / stats.count, 
+                     "max" : stats.maximum}
+            for fraction, seconds in zip(PERCENTILES, stats.percentiles()) :
+                entry["p%g" % (fraction * 100)] = seconds
+            result[name] = entry
+        return result
+
+    def prometheus_text(self, prefix="liarsdice") :
+        """Return the counters in the Prometheus text exposition format, 
+as a summary of seconds labelled by operation"""
+        metric = "%s_operation_seconds" % prefix
+        lines = ["# HELP %s Time taken by game operations." % metric,
+                 "# TYPE %s summary" % metric]
+        for name in sorted(self.stats) :
+            stats = self.stats[name]
+            if stats.count == 0 :
+                continue
+            label = _label(name)
+            for fraction, seconds in zip(PERCENTILES, stats.percentiles()) :
+                lines.append("%s{operation=\"%s\",quantile=\"%g\"} %r" % 
+                             (metric, label, fraction, seconds))
+            lines.append("%s_sum{operation=\"%s\"} %r" % 
+                         (metric, label, stats.total))
+            lines.append("%s_count{operation=\"%s\"} %i" % 
+                         (metric, label, stats.count))
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,239 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+Test timing games with an instrument"""
+
+import gc
+import random
+import unittest
+import weakref
+
+from mock import Mock
+
+import game_common
+import game_data
+import game_instrument
+import game_sample
+import game_simulation
+import game_state
+import game_views
+
+class OperationStatsTest(unittest.TestCase) :
+
+    def testCountingCalls(self) :
+        subject = game_instrument.OperationStats()
+        for seconds in (0.1, 0.3, 0.2) :
+            subject.add(seconds)
+        self.assertEquals(3, subject.count)
+        self.assertAlmostEqual(0.6, subject.total)
+        self.assertEquals(0.3, subject.maximum)
+        self.assertEquals([0.2, 0.3, 0.3], subject.percentiles())
+
+    def testKeepingOnlyTheLatestSamples(self) :
+        subject = game_instrument.OperationStats(2)
+        for seconds in (5.0, 1.0, 2.0) :
+            subject.add(seconds)
+        self.assertEquals(3, subject.count)
+        self.assertEquals(sorted(subject.samples), [1.0, 2.0])
+        self.assertEquals(5.0, subject.maximum)
+
+    def testClearing(self) :
+        subject = game_instrument.OperationStats(2)
+        for seconds in (5.0, 1.0, 2.0) :
+            subject.add(seconds)
+        subject.clear()
+        self.assertEquals((0, 0.0, 0.0, [], 0), (subject.count, 
+            subject.total, subject.maximum, subject.samples, subject.next))
+        subject.add(3.0)
+        self.assertEquals([3.0], subject.samples)
+
+
+class InstrumentTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.data = game_data.GameData(3, 1, 6)
+        self.view = game_views.GameView()
+        self.data.add_game_view(self.view)
+        for seat in range(3) :
+            self.data.add_player("Player %i" % seat)
+        self.dispatcher = game_sample.wire_game(self.data, 
+                                                game_common.DiceRNG(1))
+        self.game = self.dispatcher.game
+        self.rand = random.Random(1)
+        self.subject = game_instrument.Instrument()
+
+    def play(self) :
+        """Play the game to the end, returning the number of bids made"""
+        bids = 0
+        self.dispatcher.start_game()
+        while not self.game.finished() :
+            bid = game_simulation.random_policy(self.dispatcher, self.rand)
+            if bid is None :
+                self.dispatcher.make_challenge()
+            else :
+                self.dispatcher.make_bid(bid)
+                bids = bids + 1
+        return bids
+
+    def testGamesAreUntouchedUntilInstrumented(self) :
+        self.play()
+        self.assertFalse("make_bid" in self.game.__dict__)
+        self.assertEquals({}, self.subject.snapshot())
+
+    def testCountingOperations(self) :
+        self.subject.instrument_table(self.dispatcher)
+        bids = self.play()
+        snapshot = self.subject.snapshot()
+        self.assertEquals(1, snapshot["game.start_game"]["count"])
+        self.assertEquals(bids, snapshot["game.make_bid"]["count"])
+        self.assertEquals(1, snapshot["game_state.START.on_game_start"]
+                             ["count"])
+        self.assertEquals(bids, snapshot["game_state.FIRST_BID.on_bid"]
+                                ["count"] + 
+                                snapshot["game_state.BID.on_bid"]["count"])
+        self.assertEquals(snapshot["game_state.BID.on_challenge"]["count"],
+                          snapshot["view.GameView.on_challenge"]["count"])
+        self.assertEquals(1, snapshot["view.GameView.on_game_end"]["count"])
+        entry = snapshot["game.make_bid"]
+        self.assertEquals(["count", "max", "mean", "p50", "p90", "p99", 
+                           "total"], sorted(entry))
+        self.assertTrue(entry["p50"] <= entry["p99"] <= entry["max"])
+
+    def testCountingCallsAfterReset(self) :
+        wrapped = self.subject.wrap(lambda : None, "x")
+        wrapped()
+        self.subject.reset()
+        self.assertEquals({}, self.subject.snapshot())
+        wrapped()
+        self.assertEquals(1, self.subject.snapshot()["x"]["count"])
+        self.subject.instrument_table(self.dispatcher)
+        self.play()
+        self.subject.reset()
+        self.dispatcher.start_game()
+        snapshot = self.subject.snapshot()
+        self.assertEquals(1, snapshot["game.start_game"]["count"])
+        self.assertFalse("game.make_bid" in snapshot)
+
+    def testCountingFailedCalls(self) :
+        self.subject.instrument_table(self.dispatcher)
+        self.dispatcher.start_game()
+        self.assertRaises(game_common.IllegalStateChangeError, 
+                          self.dispatcher.make_challenge)
+        snapshot = self.subject.snapshot()
+        self.assertEquals(1, snapshot["game.make_challenge"]["count"])
+        self.assertEquals(1, snapshot["game_state.FIRST_BID.on_challenge"]
+                             ["count"])
+
+    def testRemovingInstrumentation(self) :
+        transitions = self.game.engine.transitions
+        self.subject.instrument_table(self.dispatcher)
+        self.subject.instrument_table(self.dispatcher)
+        self.dispatcher.start_game()
+        self.assertEquals(1, self.subject.snapshot()["game.start_game"]
+                                                     ["count"])
+        self.subject.remove()
+        self.assertFalse("make_bid" in self.game.__dict__)
+        self.assertEquals(transitions, self.game.engine.transitions)
+        self.assertFalse("on_bid" in self.view.__dict__)
+        self.dispatcher.make_bid((1, 1))
+        self.assertFalse("game.make_bid" in self.subject.snapshot())
+
+    def testRemovingOneTable(self) :
+        other_data = game_data.GameData(3, 1, 6)
+        other_view = game_views.GameView()
+        other_data.add_game_view(other_view)
+        for seat in range(2) :
+            other_data.add_player("Player %i" % seat)
+        other = game_sample.wire_game(other_data, game_common.DiceRNG(2))
+        self.subject.instrument_table(self.dispatcher)
+        self.subject.instrument_table(other)
+
+        self.subject.remove_table(self.dispatcher)
+        self.dispatcher.start_game()
+        other.start_game()
+
+        self.assertFalse("make_bid" in self.game.__dict__)
+        self.assertFalse("on_bid" in self.view.__dict__)
+        self.assertTrue("on_bid" in other_view.__dict__)
+        snapshot = self.subject.snapshot()
+        self.assertEquals(1, snapshot["game.start_game"]["count"])
+        self.assertEquals(1, snapshot["view.GameView.on_game_start"]
+                                     ["count"])
+
+    def testInstrumentedTablesAreNotKeptAlive(self) :
+        self.subject.instrument_table(self.dispatcher)
+        game_ref = weakref.ref(self.game)
+        view_ref = weakref.ref(self.view)
+        del self.dispatcher, self.game, self.data, self.view
+        gc.collect()
+        self.assertTrue(game_ref() is None)
+        self.assertTrue(view_ref() is None)
+        self.assertEquals({}, self.subject.objects)
+        self.assertEquals({}, self.subject.dispatchers)
+        self.subject.remove()
+
+    def testInstrumentingStateObjects(self) :
+        game_obj = Mock()
+        bid_state = game_state.BidState(game_obj, None)
+        first_state = game_state.FirstBidState(game_obj, bid_state)
+        start_state = game_state.GameStartState(game_obj, first_state)
+        bid_state.next = start_state
+        self.subject.instrument_state(start_state)
+        self.assertRaises(game_common.IllegalStateChangeError, 
+                          bid_state.on_game_start)
+        self.assertRaises(game_common.IllegalStateChangeError, 
+                          start_state.on_bid, "Player 0", (1, 1))
+        snapshot = self.subject.snapshot()
+        self.assertEquals(["game_state.BidState.on_game_start", 
+                           "game_state.GameStartState.on_bid"], 
+                          sorted(snapshot))
+
+    def testPrometheusText(self) :
+        self.subject.instrument_table(self.dispatcher)
+        self.dispatcher.start_game()
+        lines = self.subject.prometheus_text().splitlines()
+        self.assertEquals("# TYPE liarsdice_operation_seconds summary", 
+                          lines[1])
+        self.assertTrue("liarsdice_operation_seconds_count"
+                        "{operation=\"game.start_game\"} 1" in lines)
+        quantiles = [line for line in lines if line.startswith(
+            "liarsdice_operation_seconds{operation=\"game.start_game\",")]
+        self.assertEquals(3, len(quantiles))
+        self.assertTrue(quantiles[0].startswith(
+            "liarsdice_operation_seconds{operation=\"game.start_game\","
+            "quantile=\"0.5\"} "))
+        for line in lines[2:] :
+            float(line.split(" ")[-1])
+
+
+def suite() :
+    """Return a test suite of all tests defined in this module"""
+    test_suite = unittest.TestSuite()
+    loader = unittest.TestLoader()
+    test_suite.addTests(loader.loadTestsFromTestCase(OperationStatsTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(InstrumentTest))
+    return test_suite
+
+if __name__ == "__main__" :
+    unittest.TextTestRunner().run(suite())
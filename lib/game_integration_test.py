@@ -43,6 +43,8 @@ from game_common import IllegalBidError, IllegalStateChangeError
 
 class GameIntegrationTest(unittest.TestCase) :
 
+    data_class = game_data.GameData
+
     def setUp(self) :
         
         #Initialise players
@@ -53,7 +55,7 @@ class GameIntegrationTest(unittest.TestCase) :
         self.starting_dice = 3
         self.lowest_face = 1
         self.highest_face = 6
-        self.data_store = game_data.GameData(
+        self.data_store = self.data_class(
             self.starting_dice, 
             self.lowest_face, 
             self.highest_face)
@@ -420,6 +422,33 @@ class GameIntegrationTest(unittest.TestCase) :
             {self.player1:player1dice, self.player2:player2dice},
             first_bid)
 
+    def testChallengeWithBatchedEvents(self) :
+        self.proxy.batch_events = True
+        self.proxy_dispatcher.start_game()
+        first_bid = (2, 5)
+        self.proxy_dispatcher.make_bid(first_bid)
+        player1dice = [2, 5]
+        player2dice = [6, 4]
+        self.data_store.set_dice(self.player1, player1dice)
+        self.data_store.set_dice(self.player2, player2dice)
+        self.view.reset_mock()
+
+        self.proxy_dispatcher.make_challenge()
+
+        self.assertEquals(1, self.view.on_events.call_count)
+        batch = self.view.on_events.call_args[0][0]
+        events = [event for event, args in batch]
+        self.assertEquals(["on_bid", "on_bid", "on_bid_reset", 
+            "on_new_dice_amount", 
+            "on_new_dice_amount", "on_set_dice", 
+            "on_new_dice_amount", "on_set_dice",
+            "on_player_end_turn", "on_player_start_turn", 
+            "on_challenge"], events)
+        self.assertEquals((self.player2, self.player1,
+            {self.player1:player1dice, self.player2:player2dice}, 
+            first_bid), batch[-1][1])
+        self.assertTrue(not self.view.on_challenge.called)
+
     def testRestartingGameFromFirstBid(self) :
         pass
 
@@ -441,11 +470,26 @@ class GameIntegrationTest(unittest.TestCase) :
     def testRemovingCurrentPlayer(self) :
         pass
 
+class EngineIntegrationTest(GameIntegrationTest) :
+    """Run the integration tests with a shared transition engine in place
+of the state objects"""
+
+    def setUp(self) :
+        GameIntegrationTest.setUp(self)
+        self.game_start_state = game_state.START
+        self.first_bid_state = game_state.FIRST_BID
+        self.bid_state = game_state.BID
+        self.game.engine = game_state.TransitionEngine(self.dice_roller)
+        self.game.facade = self.proxy_dispatcher
+        self.game.set_state(game_state.START)
+
+
 def suite() :
     """Return a test suite of all tests in this module"""
     test_suite = unittest.TestSuite()
     loader = unittest.TestLoader()
     test_suite.addTests(loader.loadTestsFromTestCase(GameIntegrationTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(EngineIntegrationTest))
     return test_suite
 
 if __name__ == "__main__" :
@@ -0,0 +1,336 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+
+
+This module keeps an append only log of the changes made to a game, for
+auditing disputed challenges and for recovering a game after a crash.
+The GameLogWriter is a game view, so every change made through ProxyGame
+is written to the log. The log starts with a snapshot of the game as it 
+was when the writer was attached, see game_snapshot, and the changes 
+follow. replay rebuilds the game from a log by applying the changes 
+directly to a new data store with no game views.
+
+Each record is the length of the rest of the record as four bytes, the
+record type as one byte then the values for the record, all little endian.
+Players are written as their position in the order they joined the log.
+A record cut short by a crash is ignored on reading, and cut from the log
+by open_log before any more records are appended."""
+
+import os
+import struct
+
+import game_data
+import game_snapshot
+import game_state
+import game_views
+
+SNAPSHOT = 1
+GAME_START = 2
+ADD_PLAYER = 3
+REMOVE_PLAYER = 4
+ACTIVATE = 5
+DEACTIVATE = 6
+CURRENT_PLAYER = 7
+SET_DICE = 8
+DICE_AMOUNT = 9
+BID = 10
+BID_RESET = 11
+CHALLENGE = 12
+GAME_END = 13
+
+# The length and type at the start of every record
+FRAME = struct.Struct("<IB")
+_PLAYER = struct.Struct("<H")
+_DICE = struct.Struct("<HB")
+_BID = struct.Struct("<HBIB")
+_CHALLENGE = struct.Struct("<HHBIBH")
+
+# The events of the records that hold only a player
+_PLAYER_EVENTS = {GAME_START : "on_game_start", 
+                  REMOVE_PLAYER : "on_player_remove",
+                  ACTIVATE : "on_activation", 
+                  DEACTIVATE : "on_deactivate",
+                  CURRENT_PLAYER : "on_player_start_turn",
+                  GAME_END : "on_game_end"}
+
+def _pack_bid(bid) :
+    """Return the flag, count and face written for a bid"""
+    if bid is None :
+        return 0, 0, 0
+    return 1, bid[0], bid[1]
+
+def _unpack_bid(flag, count, face) :
+    """Return the bid written as flag, count and face"""
+    if flag :
+        return (count, face)
+    return None
+
+
+class GameLogWriter(game_views.GameView) :
+    """Writes the events of a game to stream, a file opened for appending
+in binary mode, see open_log. data is the data store of the game, its 
+current contents are written as the first record. 
+Records are kept in memory and written out with an fsync once sync_every 
+records are waiting, at the end of each action when the game sends events
+in batches, and on close. A crash can lose the records still waiting. 
+If fsync is False the stream is flushed but not synced, as for streams 
+that are not files"""
+
+    def __init__(self, stream, data, sync_every=64, fsync=True) :
+        self.stream = stream
+        self.sync_every = sync_every
+        self.fsync = fsync
+        self.buffer = bytearray()
+        self.waiting = 0
+        self.players = list()
+        self.index = dict()
+        for player in data.get_all_players() :
+            self._add_player(player)
+        keep_state = game_snapshot.is_state_id(data.get_current_state())
+        self._write(SNAPSHOT, game_snapshot.snapshot(data, keep_state))
+
+    def _add_player(self, player) :
+        """Number a player joining the log, in the same way as the reader
+numbers the players of the snapshot and of each ADD_PLAYER record"""
+        self.index[player] = len(self.players)
+        self.players.append(player)
+
+    def _index_of(self, player) :
+        """Return the number written for player, if player has not joined
+the log then raise a ValueError"""
+        try :
+            return self.index[player]
+        except KeyError :
+            raise ValueError("Player %r is not in the log" % (player,))
+
+    def _write(self, record, payload=b"") :
+        """Add a record to those waiting to be written"""
+        self.buffer.extend(FRAME.pack(len(payload) + 1, record))
+        self.buffer.extend(payload)
+        self.waiting = self.waiting + 1
+        if self.waiting >= self.sync_every :
+            self.sync()
+
+    def _write_player(self, record, player) :
+        self._write(record, _PLAYER.pack(self._index_of(player)))
+
+    def sync(self) :
+        """Write out all waiting records and make sure they are on disk"""
+        if self.buffer :
+            self.stream.write(bytes(self.buffer))
+            del self.buffer[:]
+        self.waiting = 0
+        self.stream.flush()
+        if self.fsync :
+            os.fsync(self.stream.fileno())
+
+    def close(self) :
+        """Write out all waiting records and close the stream"""
+        self.sync()
+        self.stream.close()
+
+    def on_events(self, batch) :
+        """Write all the events of one action then sync"""
+        for event, args in batch :
+            getattr(self, event)(*args)
+        self.sync()
+
+    def on_game_start(self, starting_player, player_list) :
+        self._write_player(GAME_START, starting_player)
+
+    def on_bid(self, player_name, bid) :
+        flag, count, face = _pack_bid(bid)
+        self._write(BID, _BID.pack(self._index_of(player_name), flag, 
+                                   count, face))
+
+    def on_challenge(self, winner, loser, old_dice_map, bid) :
+        flag, count, face = _pack_bid(bid)
+        parts = [_CHALLENGE.pack(self._index_of(winner), 
+                                 self._index_of(loser), flag, count, face,
+                                 len(old_dice_map))]
+        for player in sorted(old_dice_map, key=self._index_of) :
+            dice = old_dice_map[player] or ()
+            parts.append(_DICE.pack(self._index_of(player), len(dice)))
+            parts.append(bytes(bytearray(dice)))
+        self._write(CHALLENGE, b"".join(parts))
+
+    def on_activation(self, player_name) :
+        self._write_player(ACTIVATE, player_name)
+
+    def on_player_start_turn(self, player_name) :
+        self._write_player(CURRENT_PLAYER, player_name)
+
+    def on_player_addition(self, player_name) :
+        self._write(ADD_PLAYER, player_name.encode("utf-8"))
+        self._add_player(player_name)
+
+    def on_player_remove(self, player_name) :
+        self._write_player(REMOVE_PLAYER, player_name)
+
+    def on_deactivate(self, player_name) :
+        self._write_player(DEACTIVATE, player_name)
+
+    def on_game_end(self, winner_name) :
+        self._write_player(GAME_END, winner_name)
+
+    def on_set_dice(self, player_name, dice) :
+        dice = dice or ()
+        self._write(SET_DICE, _DICE.pack(self._index_of(player_name), 
+                                         len(dice)) + bytes(bytearray(dice)))
+
+    def on_new_dice_amount(self, player_name, amount) :
+        self._write(DICE_AMOUNT, 
+                    _DICE.pack(self._index_of(player_name), amount))
+
+    def on_bid_reset(self) :
+        self._write(BID_RESET)
+
+
+def _frames(data) :
+    """Generate the record type and the start and end of the values of each
+complete record in data"""
+    offset = 0
+    end = len(data)
+    frame_size = FRAME.size
+    while offset + frame_size <= end :
+        length, record = FRAME.unpack_from(data, offset)
+        if offset + 4 + length > end :
+            return
+        yield record, offset + frame_size, offset + 4 + length
+        offset = offset + 4 + length
+
+def open_log(path) :
+    """Open the log at path for a GameLogWriter to append to, creating it
+if there is none. A record cut short by a crash is cut from the end of the
+log first, otherwise the records appended would be read as part of it"""
+    stream = open(path, "a+b")
+    stream.seek(0)
+    complete = 0
+    for record, start, end in _frames(stream.read()) :
+        complete = end
+    stream.truncate(complete)
+    return stream
+
+def read_records(stream) :
+    """Generate the record type and values of each complete record in 
+stream"""
+    data = stream.read()
+    for record, start, end in _frames(data) :
+        yield record, data[start:end]
+
+def read_events(stream) :
+    """Generate the events in a log as (method name, arguments) pairs, in 
+the form they were passed to the writer, with players given by name. 
+A snapshot is given as ("snapshot", (blob,)) and the end of a turn is not
+in the log"""
+    players = list()
+    for record, payload in read_records(stream) :
+        if record == SNAPSHOT :
+            del players[:]
+            players.extend(game_snapshot.restore(payload).get_all_players())
+            yield "snapshot", (payload,)
+        elif record == ADD_PLAYER :
+            player = payload.decode("utf-8")
+            players.append(player)
+            yield "on_player_addition", (player,)
+        elif record == BID :
+            index, flag, count, face = _BID.unpack_from(payload)
+            yield "on_bid", (players[index], _unpack_bid(flag, count, face))
+        elif record == SET_DICE :
+            index, count = _DICE.unpack_from(payload)
+            dice = list(bytearray(payload[_DICE.size:_DICE.size + count]))
+            yield "on_set_dice", (players[index], dice)
+        elif record == DICE_AMOUNT :
+            index, amount = _DICE.unpack_from(payload)
+            yield "on_new_dice_amount", (players[index], amount)
+        elif record == BID_RESET :
+            yield "on_bid_reset", ()
+        elif record == CHALLENGE :
+            yield "on_challenge", read_challenge(payload, players)
+        elif record in _PLAYER_EVENTS :
+            player = players[_PLAYER.unpack_from(payload)[0]]
+            yield _PLAYER_EVENTS[record], (player,)
+        else :
+            raise ValueError("Unknown record type %i" % record)
+
+def read_challenge(payload, players) :
+    """Return the winner, loser, dice map and bid of a challenge record"""
+    winner, loser, flag, count, face, entries = \
+        _CHALLENGE.unpack_from(payload)
+    dice_map = dict()
+    offset = _CHALLENGE.size
+    for _ in range(entries) :
+        index, length = _DICE.unpack_from(payload, offset)
+        offset = offset + _DICE.size
+        dice_map[players[index]] = \
+            list(bytearray(payload[offset:offset + length]))
+        offset = offset + length
+    return (players[winner], players[loser], dice_map, 
+            _unpack_bid(flag, count, face))
+
+def replay(stream, data_class=game_data.GameData) :
+    """Rebuild the game written to the log in stream, returning a new data
+store of type data_class. The current state is set to the transition 
+engine state id that follows from the events, see game_state"""
+    data = None
+    for event, args in read_events(stream) :
+        if event == "snapshot" :
+            data = game_snapshot.restore(args[0], data_class)
+        elif event == "on_game_start" :
+            data.set_current_player(args[0])
+            data.set_current_state(game_state.FIRST_BID)
+        elif event == "on_bid" :
+            data.set_bid(*args)
+            if args[1] is not None and \
+                data.get_current_state() == game_state.FIRST_BID :
+                data.set_current_state(game_state.BID)
+        elif event == "on_set_dice" :
+            data.set_dice(*args)
+        elif event == "on_new_dice_amount" :
+            player, amount = args
+            while (data.get_dice(player) is not None and 
+                   len(data.get_dice(player)) > amount) :
+                data.remove_dice(player)
+        elif event == "on_player_start_turn" :
+            data.set_current_player(args[0])
+        elif event == "on_activation" :
+            # Players are only ever activated all together
+            data.make_all_active()
+        elif event == "on_deactivate" :
+            data.mark_inactive(args[0])
+        elif event == "on_player_addition" :
+            data.add_player(args[0])
+        elif event == "on_player_remove" :
+            data.remove_player(args[0])
+        elif event == "on_bid_reset" :
+            for player in data.get_all_players() :
+                data.set_bid(player, None)
+        elif event == "on_game_end" :
+            data.set_current_state(game_state.START)
+    return data
+
+
+if __name__ == "__main__" :
+    pass
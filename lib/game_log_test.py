@@ -0,0 +1,220 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+Test writing game logs and replaying them"""
+
+from functools import partial
+import io
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import game
+import game_common
+import game_data
+import game_log
+import game_proxy
+import game_simulation
+import game_state
+
+def logged_game(stream, players=4, seed=1, batch_events=False, **options) :
+    """Wire a game with a proxy and a log writer on stream, returning the
+game, its data store and the writer"""
+    data = game_data.GameData(3, 1, 6)
+    for seat in range(players) :
+        data.add_player("Player %i" % seat)
+    proxy = game_proxy.ProxyGame(None, data, batch_events)
+    dispatcher = game_proxy.ProxyDispatcher(None, proxy)
+    dice_roller = game_common.DiceRNG(seed)
+    game_obj = game.Game(data, 
+        partial(game.on_win, game=dispatcher), 
+        game.check_bids, game.get_winner,
+        partial(game.bid_reset, game=dispatcher),
+        partial(game.reshuffle_dice, game=dispatcher, 
+                dice_roller=dice_roller),
+        game_state.TransitionEngine(dice_roller))
+    game_obj.facade = dispatcher
+    game_obj.set_state(game_state.START)
+    proxy.game = game_obj
+    dispatcher.game = game_obj
+    writer = game_log.GameLogWriter(stream, data, **options)
+    data.add_game_view(writer)
+    return dispatcher, data, writer
+
+def play_turn(dispatcher, rand) :
+    """Make a random bid or challenge for the current player"""
+    bid = game_simulation.random_policy(dispatcher, rand)
+    if bid is None :
+        dispatcher.make_challenge()
+    else :
+        dispatcher.make_bid(bid)
+
+class GameLogTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.stream = io.BytesIO()
+        self.rand = random.Random(2)
+
+    def replay(self) :
+        return game_log.replay(io.BytesIO(self.stream.getvalue()))
+
+    def assertSameGame(self, expected, actual) :
+        self.assertEquals(expected.get_all_players(), 
+                          actual.get_all_players())
+        self.assertEquals(expected.get_players(), actual.get_players())
+        self.assertEquals(expected.get_dice_map(), actual.get_dice_map())
+        for player in expected.get_all_players() :
+            self.assertEquals(expected.get_bid(player), 
+                              actual.get_bid(player))
+        self.assertEquals(expected.get_current_player(), 
+                          actual.get_current_player())
+        self.assertEquals(expected.get_current_state(), 
+                          actual.get_current_state())
+
+    def testReplayingEveryTurn(self) :
+        dispatcher, data, writer = logged_game(self.stream, sync_every=1, 
+                                               fsync=False)
+        self.assertSameGame(data, self.replay())
+        dispatcher.start_game()
+        self.assertSameGame(data, self.replay())
+        while dispatcher.get_state() != game_state.START :
+            play_turn(dispatcher, self.rand)
+            self.assertSameGame(data, self.replay())
+
+    def testReplayingBatchedEvents(self) :
+        dispatcher, data, writer = logged_game(self.stream, 
+            batch_events=True, sync_every=1000, fsync=False)
+        dispatcher.start_game()
+        for _ in range(6) :
+            play_turn(dispatcher, self.rand)
+            self.assertSameGame(data, self.replay())
+
+    def testRecordsWaitUntilSync(self) :
+        dispatcher, data, writer = logged_game(self.stream, 
+            sync_every=1000, fsync=False)
+        dispatcher.start_game()
+        self.assertEquals(b"", self.stream.getvalue())
+        writer.sync()
+        self.assertSameGame(data, self.replay())
+
+    def testChallengesCanBeAudited(self) :
+        dispatcher, data, writer = logged_game(self.stream, fsync=False)
+        dispatcher.start_game()
+        dispatcher.make_bid((1, 2))
+        before = data.get_dice_map()
+        dispatcher.make_challenge()
+        writer.sync()
+        events = game_log.read_events(io.BytesIO(self.stream.getvalue()))
+        challenges = [args for event, args in events 
+                      if event == "on_challenge"]
+        self.assertEquals(1, len(challenges))
+        winner, loser, dice_map, bid = challenges[0]
+        self.assertEquals(before, dice_map)
+        self.assertEquals((1, 2), bid)
+        self.assertEquals(set(["Player 0", "Player 1"]), 
+                          set([winner, loser]))
+
+    def testAddingAndRemovingPlayers(self) :
+        dispatcher, data, writer = logged_game(self.stream, fsync=False)
+        dispatcher.add_player(u"New \u00e9")
+        dispatcher.remove_player("Player 1")
+        dispatcher.start_game()
+        dispatcher.make_bid((1, 2))
+        writer.sync()
+        self.assertSameGame(data, self.replay())
+
+    def testCutShortRecordIsIgnored(self) :
+        dispatcher, data, writer = logged_game(self.stream, fsync=False)
+        dispatcher.start_game()
+        writer.sync()
+        whole = self.stream.getvalue()
+        expected = game_log.replay(io.BytesIO(whole))
+        dispatcher.make_bid((1, 2))
+        writer.sync()
+        cut = self.stream.getvalue()[:-2]
+        self.assertTrue(len(cut) > len(whole))
+        replayed = game_log.replay(io.BytesIO(cut))
+        self.assertEquals(len(list(game_log.read_records(io.BytesIO(cut)))),
+            len(list(game_log.read_records(io.BytesIO(whole)))) + 1)
+        self.assertEquals((1, 2), replayed.get_bid("Player 0"))
+        self.assertEquals(expected.get_current_player(), 
+                          replayed.get_current_player())
+
+    def testPlayerNotInLogIsRefused(self) :
+        dispatcher, data, writer = logged_game(self.stream, fsync=False)
+        self.assertRaises(ValueError, writer.on_bid, "Nobody", (1, 2))
+
+    def testReAddedPlayerKeepsNumbering(self) :
+        dispatcher, data, writer = logged_game(self.stream, fsync=False)
+        dispatcher.remove_player("Player 1")
+        dispatcher.add_player("Player 1")
+        dispatcher.add_player("Player 9")
+        dispatcher.set_bid("Player 9", (2, 3))
+        writer.sync()
+        self.assertSameGame(data, self.replay())
+
+    def testReopeningCutsShortRecord(self) :
+        directory = tempfile.mkdtemp()
+        try :
+            path = os.path.join(directory, "game.log")
+            dispatcher, data, writer = logged_game(game_log.open_log(path))
+            dispatcher.start_game()
+            writer.close()
+            # A bid record cut short by a crash
+            with open(path, "ab") as stream :
+                stream.write(game_log.FRAME.pack(9, game_log.BID) + b"\x01")
+            writer = game_log.GameLogWriter(game_log.open_log(path), data)
+            data.add_game_view(writer)
+            play_turn(dispatcher, self.rand)
+            writer.close()
+            with open(path, "rb") as stream :
+                self.assertSameGame(data, game_log.replay(stream))
+        finally :
+            shutil.rmtree(directory)
+
+    def testWritingToFile(self) :
+        directory = tempfile.mkdtemp()
+        try :
+            path = os.path.join(directory, "game.log")
+            dispatcher, data, writer = logged_game(game_log.open_log(path))
+            dispatcher.start_game()
+            play_turn(dispatcher, self.rand)
+            writer.close()
+            with open(path, "rb") as stream :
+                self.assertSameGame(data, game_log.replay(stream))
+        finally :
+            shutil.rmtree(directory)
+
+
+def suite() :
+    """Return a test suite of all tests defined in this module"""
+    test_suite = unittest.TestSuite()
+    loader = unittest.TestLoader()
+    test_suite.addTests(loader.loadTestsFromTestCase(GameLogTest))
+    return test_suite
+
+if __name__ == "__main__" :
+    unittest.TextTestRunner().run(suite())
@@ -0,0 +1,95 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+
+
+This module calculates the probability of bids being true, for bots and for
+hints in user interfaces.
+The chance of at least k of the unknown dice showing a face is a binomial
+tail. Tails for every k are worked out together and kept in a table for each
+number of unknown dice and range of faces, so a query is a table lookup"""
+
+import math
+
+_tail_tables = dict()
+
+def tail_table(unknown_count, faces) :
+    """Return a list where entry k is the probability of at least k of 
+unknown_count dice showing one particular face, for faces being the lowest
+and highest face values. Tables are calculated once and then kept"""
+    key = (unknown_count, faces[0], faces[1])
+    try :
+        return _tail_tables[key]
+    except KeyError :
+        pass
+    sides = faces[1] - faces[0] + 1
+    if sides == 1 :
+        table = [1.0] * (unknown_count + 1) + [0.0]
+    else :
+        log_p = math.log(1.0 / sides)
+        log_q = math.log(1.0 - 1.0 / sides)
+        log_n = math.lgamma(unknown_count + 1)
+        table = [0.0] * (unknown_count + 2)
+        for k in range(unknown_count, -1, -1) :
+            mass = math.exp(log_n - math.lgamma(k + 1) 
+                            - math.lgamma(unknown_count - k + 1)
+                            + k * log_p + (unknown_count - k) * log_q)
+            table[k] = min(1.0, table[k + 1] + mass)
+        table[0] = 1.0
+    _tail_tables[key] = table
+    return table
+
+def clear_tables() :
+    """Forget all calculated tables"""
+    _tail_tables.clear()
+
+def bid_probability(bid, own_dice, unknown_count, faces) :
+    """Return the probability that a bid is true given the dice in own_dice
+and unknown_count dice that cannot be seen, for faces being the lowest and
+highest face values as returned by Game.get_face_values.
+The bid should be a sequence with the number of dice first and the face 
+second, as with game.check_bids"""
+    count, face = bid[0], bid[1]
+    if face < faces[0] or face > faces[1] :
+        return 1.0 if count <= 0 else 0.0
+    needed = count - own_dice.count(face)
+    if needed <= 0 :
+        return 1.0
+    if needed > unknown_count :
+        return 0.0
+    return tail_table(unknown_count, faces)[needed]
+
+def game_bid_probability(game_obj, player, bid) :
+    """Return the probability that a bid is true from the point of view of
+player in a game, where all dice except the player's own are unknown"""
+    own_dice = game_obj.get_dice(player)
+    total = 0
+    for other in game_obj.get_players() :
+        total = total + game_obj.num_of_dice(other)
+    return bid_probability(bid, own_dice, total - len(own_dice), 
+                           game_obj.get_face_values())
+
+
+if __name__ == "__main__" :
+    pass
@@ -0,0 +1,114 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+Tests for the bid probability calculator
+This module relies on the mock library for mocking of dependencies."""
+
+import unittest
+import itertools
+
+from mock import Mock
+
+import game
+import game_probability
+
+def brute_force(bid, own_dice, unknown_count, faces) :
+    """Work out the probability of a bid by checking every roll"""
+    values = range(faces[0], faces[1] + 1)
+    true = 0
+    total = 0
+    for roll in itertools.product(values, repeat=unknown_count) :
+        total = total + 1
+        if game.check_bids(bid, {"own" : own_dice, "other" : list(roll)}) :
+            true = true + 1
+    return float(true) / total
+
+class BidProbabilityTest(unittest.TestCase) :
+
+    def setUp(self) :
+        game_probability.clear_tables()
+        self.faces = (1, 6)
+
+    def testMatchesCheckingEveryRoll(self) :
+        own_dice = [2, 5, 5]
+        for unknown_count in xrange(0, 5) :
+            for count in xrange(0, 8) :
+                for face in (1, 2, 5) :
+                    bid = (count, face)
+                    self.assertAlmostEqual(
+                        brute_force(bid, own_dice, unknown_count, self.faces),
+                        game_probability.bid_probability(bid, own_dice, 
+                            unknown_count, self.faces))
+
+    def testBidCoveredByOwnDice(self) :
+        self.assertEquals(1.0, game_probability.bid_probability((2, 5), 
+            [5, 5, 1], 10, self.faces))
+
+    def testBidNeedingMoreThanUnknownDice(self) :
+        self.assertEquals(0.0, game_probability.bid_probability((5, 5), 
+            [5, 5, 1], 2, self.faces))
+
+    def testFaceOutsideRange(self) :
+        self.assertEquals(0.0, game_probability.bid_probability((1, 7), 
+            [1], 10, self.faces))
+
+    def testSingleFacedDice(self) :
+        self.assertEquals(1.0, game_probability.bid_probability((4, 1), 
+            [], 4, (1, 1)))
+
+    def testTablesAreKept(self) :
+        table = game_probability.tail_table(10, self.faces)
+        self.assertTrue(table is game_probability.tail_table(10, self.faces))
+        self.assertEquals(12, len(table))
+        self.assertEquals(1.0, table[0])
+        self.assertEquals(0.0, table[11])
+
+    def testLargeNumberOfDice(self) :
+        table = game_probability.tail_table(5000, (1, 20))
+        self.assertTrue(all([0.0 <= p <= 1.0 for p in table]))
+        self.assertTrue(table[250] > 0.4 and table[250] < 0.6)
+
+    def testProbabilityForPlayerInGame(self) :
+        game_obj = Mock(spec=game.Game)
+        game_obj.get_dice.return_value = [5, 5]
+        game_obj.get_players.return_value = ["a", "b", "c"]
+        game_obj.num_of_dice.side_effect = lambda player : {"a" : 2, 
+            "b" : 1, "c" : 2}[player]
+        game_obj.get_face_values.return_value = self.faces
+
+        ret = game_probability.game_bid_probability(game_obj, "a", (3, 5))
+
+        self.assertAlmostEqual(brute_force((3, 5), [5, 5], 3, self.faces), 
+                               ret)
+
+
+def suite() :
+    """Return a test suite of all tests defined in this module"""
+    test_suite = unittest.TestSuite()
+    loader = unittest.TestLoader()
+    test_suite.addTests(loader.loadTestsFromTestCase(BidProbabilityTest))
+    return test_suite
+
+if __name__ == "__main__" :
+    unittest.TextTestRunner().run(suite())
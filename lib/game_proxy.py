@@ -32,15 +32,27 @@ and player listeners based on various events.
 The way this is performed is that the proxy game sits between a client 
 caller and the game object.
 All calls are forwarded to the game object unaltered but events are generated
-and dispatched"""
+and dispatched.
+The bound handler for each event on each game view is looked up once and 
+kept, so dispatching an event is a direct call on each handler.
+If batch_events is set then the events caused by each public action 
+(start_game, make_bid and make_challenge) are collected and sent as one 
+batch to the on_events method of each game view once the action is over"""
 
-    def __init__(self, game, data_store) :
+    def __init__(self, game, data_store, batch_events=False) :
         self.game = game
         self.store = data_store
+        self.handlers = dict()
+        self.handled_views = None
+        self.handled_count = 0
+        self.batch_events = batch_events
+        self.batch = None
+        self.action_depth = 0
     
     def add_game_view(self, view) :
         """Add a game view to the list of objects to dispatch to"""
         self.store.add_game_view(view)
+        self.handlers.clear()
 
     def _get_game_views(self) :
         """Return a list of game views"""
@@ -50,24 +62,89 @@ and dispatched"""
         """Return a list of all players"""
         return self.store.get_all_players()
 
-    def _burst_to_game_views(self, func) :
-        """Burst an event to all game views.
-Function should take one arguement"""
-        for view in self._get_game_views() :
-            func(view)
+    def _get_handlers(self, event) :
+        """Return the handler for event on each game view. Handlers are
+resolved the first time an event is sent and again whenever the game views
+held by the data store change"""
+        views = self._get_game_views()
+        if views is not self.handled_views or \
+            len(views) != self.handled_count :
+            self.handlers.clear()
+            self.handled_views = views
+            self.handled_count = len(views)
+        try :
+            return self.handlers[event]
+        except KeyError :
+            handlers = [getattr(view, event) for view in views]
+            self.handlers[event] = handlers
+            return handlers
+
+    def _burst(self, event, *args) :
+        """Burst an event to all game views, calling the method named by
+event on each view with args. During a batched action the event is added
+to the batch instead"""
+        if self.batch is not None :
+            self.batch.append((event, args))
+            return
+        for handler in self._get_handlers(event) :
+            handler(*args)
 
     def _burst_activations(self, players) :
+        if self.batch is not None :
+            for player in players :
+                self.batch.append(("on_activation", (player,)))
+            return
+        handlers = self._get_handlers("on_activation")
         for player in players :
-            self._burst_to_game_views(lambda view : 
-                view.on_activation(player))
+            for handler in handlers :
+                handler(player)
+
+    def _begin_action(self) :
+        """Start collecting events for a public action if batching"""
+        if self.batch_events :
+            self.action_depth = self.action_depth + 1
+            if self.batch is None :
+                self.batch = list()
+
+    def _end_action(self) :
+        """Finish a public action, once the outermost action is over send 
+the events collected to all game views as one batch"""
+        if not self.batch_events :
+            return
+        self.action_depth = self.action_depth - 1
+        if self.action_depth == 0 :
+            batch = tuple(self.batch)
+            self.batch = None
+            if batch :
+                for handler in self._get_handlers("on_events") :
+                    handler(batch)
 
     def start_game(self) :
         """Start a game then burst to all game and player views"""
-        self.game.start_game()
-        player_names = self._get_all_players()
-        cur = self.game.get_current_player()
-        self._burst_to_game_views(lambda view : 
-            view.on_game_start(cur, player_names))
+        self._begin_action()
+        try :
+            self.game.start_game()
+            player_names = self._get_all_players()
+            cur = self.game.get_current_player()
+            self._burst("on_game_start", cur, player_names)
+        finally :
+            self._end_action()
+
+    def make_bid(self, bid) :
+        """Make a bid for the current player, see Game.make_bid"""
+        self._begin_action()
+        try :
+            self.game.make_bid(bid)
+        finally :
+            self._end_action()
+
+    def make_challenge(self, challenged=None, challenger=None) :
+        """Make a challenge, see Game.make_challenge"""
+        self._begin_action()
+        try :
+            self.game.make_challenge(challenged, challenger)
+        finally :
+            self._end_action()
 
     def activate_players(self) :
         """Activate all players, inform all game views and players"""
@@ -77,8 +154,7 @@ Function should take one arguement"""
     def end_game(self, winner) :
         """End the game then, inform all game views and players"""
         self.game.end_game(winner)
-        self._burst_to_game_views(lambda view : 
-             view.on_game_end(winner))
+        self._burst("on_game_end", winner)
 
     def set_current_player(self, player) :
         """Set the current player.
@@ -90,45 +166,37 @@ to game views"""
         self.game.set_current_player(player)
         if cur is not None :
             # Avoid this section if setting the first player
-            self._burst_to_game_views(lambda view : 
-                view.on_player_end_turn(cur))
-            self._burst_to_game_views(lambda view : 
-                view.on_player_start_turn(player))
+            self._burst("on_player_end_turn", cur)
+            self._burst("on_player_start_turn", player)
 
     def add_player(self, player) :
         """Add a player to the game and inform all game views"""
         self.game.add_player(player)
-        self._burst_to_game_views(lambda view : 
-             view.on_player_addition(player))
+        self._burst("on_player_addition", player)
 
     def remove_player(self, player) :
         """Remove a player to the game and inform all game views"""
         self.game.remove_player(player)
-        self._burst_to_game_views(lambda view : 
-            view.on_player_remove(player))
+        self._burst("on_player_remove", player)
 
     def set_dice(self, player, dice) :
         """Set the dice for a player, burst the new amounts and inform
 the player that they have been updated"""
         self.game.set_dice(player, dice)
         new_dice = len(self.game.get_dice(player))
-        self._burst_to_game_views(lambda view : 
-              view.on_new_dice_amount(player, new_dice))
-        self._burst_to_game_views(lambda view : 
-              view.on_set_dice(player, dice))
+        self._burst("on_new_dice_amount", player, new_dice)
+        self._burst("on_set_dice", player, dice)
     
     def set_bid(self, player, bid) :
         """Set the bid assigned to a player, burst the bid to game views"""
         self.game.set_bid(player, bid) 
-        self._burst_to_game_views(lambda view : 
-            view.on_bid(player, bid))
+        self._burst("on_bid", player, bid)
 
     def remove_dice(self, player) :
         """Remove a dice from a player then burst to player and game views"""
         self.game.remove_dice(player)
         new_dice = len(self.game.get_dice(player))
-        self._burst_to_game_views(lambda view : 
-              view.on_new_dice_amount(player, new_dice))
+        self._burst("on_new_dice_amount", player, new_dice)
 
     def on_win(self, winner, loser, bid) :
         """Get the dice map before the lose conditions occur.
@@ -137,36 +205,55 @@ and dice values.
 Burst this out to the game views"""
         dice_map = self.game.get_dice_map()
         self.game.on_win(winner, loser, bid)
-        self._burst_to_game_views(lambda view : 
-            view.on_challenge(winner, loser, dice_map, bid))
+        self._burst("on_challenge", winner, loser, dice_map, bid)
 
     def deactivate_player(self, player) :
         """Deactivate player, inform them and burst to game views"""
         self.game.deactivate_player(player)
-        self._burst_to_game_views(lambda view : 
-            view.on_deactivate(player))
+        self._burst("on_deactivate", player)
 
     def reset_bid(self) :
         """Reset the bid then pass this message to game views"""
         self.game.reset_bid()
-        self._burst_to_game_views(lambda view :
-            view.on_bid_reset())
+        self._burst("on_bid_reset")
 
 class ProxyDispatcher(object) :
-    """The proxy dispatcher object dispatches attribute lookups"""
+    """The proxy dispatcher object dispatches attribute lookups.
+Methods are resolved once and then kept on the dispatcher so later lookups
+of the same name do not go through the dispatch again. Setting the game or
+proxy clears the methods kept"""
 
     def __init__(self, game, proxy) :
+        object.__setattr__(self, "resolved", set())
         self.game = game
         self.proxy = proxy
 
+    def __setattr__(self, attrib, value) :
+        """Clear resolved methods when the game or proxy is replaced"""
+        if attrib in ("game", "proxy") :
+            self.clear_resolved()
+        object.__setattr__(self, attrib, value)
+
+    def clear_resolved(self) :
+        """Forget all resolved methods so they are dispatched again on their
+next lookup, for example after replacing a method on the game or proxy"""
+        for name in self.resolved :
+            del self.__dict__[name]
+        self.resolved.clear()
+
     def __getattr__(self, attrib) :
         """If the game object provided at construction has an attribute
 that is not available in the proxy then dispatch to the game object.
-Otherwise disptach to the proxy object"""
+Otherwise disptach to the proxy object.
+Only called for names that have not already been resolved"""
         if hasattr(self.game, attrib) and not hasattr(self.proxy, attrib) :
-            return getattr(self.game, attrib)
+            value = getattr(self.game, attrib)
         else :
-            return getattr(self.proxy, attrib)
+            value = getattr(self.proxy, attrib)
+        if callable(value) :
+            self.__dict__[attrib] = value
+            self.resolved.add(attrib)
+        return value
 
 
 if __name__ == "__main__" :
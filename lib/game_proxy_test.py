@@ -62,6 +62,53 @@ class ProxyDispatcherTest(unittest.TestCase) :
         self.assertTrue(ret == fake2)
 
 
+    def testResolvedMethodIsKept(self) :
+        fake = Mock()
+        self.game.mock_method = fake
+        self.subject.mock_method
+        del self.game.mock_method
+        ret = self.subject.mock_method
+        self.assertTrue(ret == fake)
+
+    def testNonCallableAttributeIsNotKept(self) :
+        self.game.value = 1
+        self.assertEquals(1, self.subject.value)
+        self.game.value = 2
+        self.assertEquals(2, self.subject.value)
+
+    def testReplacingGameClearsResolvedMethods(self) :
+        fake1 = Mock()
+        fake2 = Mock()
+        self.game.mock_method = fake1
+        self.subject.mock_method
+        game2 = Mock(spec=[])
+        game2.mock_method = fake2
+        self.subject.game = game2
+        ret = self.subject.mock_method
+        self.assertTrue(ret == fake2)
+
+    def testReplacingProxyKeepsProxyPrecedence(self) :
+        fake1 = Mock()
+        fake2 = Mock()
+        self.game.mock_method = fake1
+        self.subject.mock_method
+        prox2 = Mock(spec=[])
+        prox2.mock_method = fake2
+        self.subject.proxy = prox2
+        ret = self.subject.mock_method
+        self.assertTrue(ret == fake2)
+
+    def testClearingResolvedMethods(self) :
+        fake1 = Mock()
+        fake2 = Mock()
+        self.game.mock_method = fake1
+        self.subject.mock_method
+        self.game.mock_method = fake2
+        self.subject.clear_resolved()
+        ret = self.subject.mock_method
+        self.assertTrue(ret == fake2)
+
+
 class ProxyGameTest(unittest.TestCase) :
     
     def setUp(self) :
@@ -293,12 +340,124 @@ class ProxyGameTest(unittest.TestCase) :
         view.on_challenge.assert_called_with(player1, player2, 
             dice_map, bid)
 
+class ProxyGameDispatchTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.game = Mock(spec=game.Game)
+        self.data = game_data.GameData()
+        self.subject = game_proxy.ProxyGame(self.game, self.data)
+
+    def testViewAddedToDataStoreReceivesEvents(self) :
+        view1 = Mock(spec=game_views.GameView)
+        view2 = Mock(spec=game_views.GameView)
+        bid = (1, 2)
+        self.data.add_game_view(view1)
+        self.subject.set_bid("player", bid)
+        self.data.add_game_view(view2)
+
+        self.subject.set_bid("player", bid)
+
+        self.assertEquals(2, view1.on_bid.call_count)
+        self.assertEquals(1, view2.on_bid.call_count)
+        view2.on_bid.assert_called_with("player", bid)
+
+    def testViewAddedToProxyReceivesEvents(self) :
+        view1 = Mock(spec=game_views.GameView)
+        view2 = Mock(spec=game_views.GameView)
+        self.subject.add_game_view(view1)
+        self.subject.reset_bid()
+        self.subject.add_game_view(view2)
+
+        self.subject.reset_bid()
+
+        self.assertEquals(2, view1.on_bid_reset.call_count)
+        self.assertEquals(1, view2.on_bid_reset.call_count)
+
+    def testHandlersAreResolvedOnce(self) :
+        view = Mock(spec=game_views.GameView)
+        first = view.on_bid
+        self.subject.add_game_view(view)
+        self.subject.set_bid("player", (1, 2))
+        view.on_bid = Mock()
+
+        self.subject.set_bid("player", (1, 3))
+
+        self.assertEquals(2, first.call_count)
+        self.assertTrue(not view.on_bid.called)
+
+class ProxyGameBatchTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.game = Mock(spec=game.Game)
+        self.data = game_data.GameData()
+        self.view = Mock(spec=game_views.GameView)
+        self.data.add_game_view(self.view)
+
+    def testActionsAreForwardedToGame(self) :
+        subject = game_proxy.ProxyGame(self.game, self.data)
+        bid = (1, 2)
+
+        subject.make_bid(bid)
+        subject.make_challenge("player1", "player2")
+
+        self.game.make_bid.assert_called_with(bid)
+        self.game.make_challenge.assert_called_with("player1", "player2")
+        self.assertTrue(not self.view.on_events.called)
+
+    def testEventsDuringActionAreSentAsOneBatch(self) :
+        subject = game_proxy.ProxyGame(self.game, self.data, True)
+        bid = (1, 2)
+        def make_bid(bid) :
+            subject.set_bid("player1", bid)
+            subject.reset_bid()
+        self.game.make_bid.side_effect = make_bid
+
+        subject.make_bid(bid)
+
+        self.view.on_events.assert_called_once_with(
+            (("on_bid", ("player1", bid)), ("on_bid_reset", ())))
+        self.assertTrue(not self.view.on_bid.called)
+        self.assertTrue(not self.view.on_bid_reset.called)
+
+    def testBatchIsSentWhenActionFails(self) :
+        subject = game_proxy.ProxyGame(self.game, self.data, True)
+        def make_challenge(challenged, challenger) :
+            subject.deactivate_player("player1")
+            raise ValueError()
+        self.game.make_challenge.side_effect = make_challenge
+
+        self.assertRaises(ValueError, subject.make_challenge)
+
+        self.view.on_events.assert_called_once_with(
+            (("on_deactivate", ("player1",)),))
+        subject.reset_bid()
+        self.assertEquals(1, self.view.on_events.call_count)
+        self.view.on_bid_reset.assert_called_with()
+
+    def testEmptyBatchIsNotSent(self) :
+        subject = game_proxy.ProxyGame(self.game, self.data, True)
+
+        subject.make_bid((1, 2))
+
+        self.assertTrue(not self.view.on_events.called)
+
+    def testGameViewPassesBatchToEventMethods(self) :
+        view = Mock(spec=game_views.GameView)
+        batch = (("on_bid", ("player1", (1, 2))), ("on_bid_reset", ()))
+
+        game_views.GameView.on_events(view, batch)
+
+        view.on_bid.assert_called_with("player1", (1, 2))
+        view.on_bid_reset.assert_called_with()
+
 def suite() :
     """Return a test suite of all tests defined in this module"""
     test_suite = unittest.TestSuite()
     loader = unittest.TestLoader()
     test_suite.addTests(loader.loadTestsFromTestCase(ProxyDispatcherTest))
     test_suite.addTests(loader.loadTestsFromTestCase(ProxyGameTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(ProxyGameDispatchTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(ProxyGameBatchTest))
     return test_suite
 
 
@@ -30,6 +30,7 @@ from functools import partial
 import random
 
 import game
+import game_common
 import game_state
 import game_views
 import game_data
@@ -54,68 +55,68 @@ class RobotGameView(game_views.GameView) :
 
     def on_bid_reset(self) :
         """This method is called at the start of a round"""
-        print "Bid has been reset"
+        print("Bid has been reset")
 
     def on_game_start(self, first_player, player_list) :
         """This method is called when the game begins. It contains a list of pla
 yers who are in the game"""
-        print "Game started first player %s out of %s" % (first_player, player_list)
+        print("Game started first player %s out of %s" % (first_player, player_list))
         self.event_loop.append(RobotGameView.__GAME_STARTED)
 
     def on_bid(self, player_name, bid) :
         """This method is called when a player bids with the players name and a 
 bid"""
-        print "Player %s made bid %s" % (player_name, bid)
+        print("Player %s made bid %s" % (player_name, bid))
 
     def on_challenge(self, winner, loser, old_dice_map, bid) :
         """This method is called at the end of a challenge with the challenger, 
 challenged, the winner and dice of each player"""
-        print "Challenge Bid: %s Dice map %s. Winner : %s Loser: %s" \
-              % (bid, old_dice_map, winner, loser)
+        print("Challenge Bid: %s Dice map %s. Winner : %s Loser: %s" 
+              % (bid, old_dice_map, winner, loser))
         self.event_loop.append(RobotGameView.__GAME_CHALLENGED)
 
     def on_activation(self, player_name) :
         """This method is called when a player is made active"""
-        print "%s made active" % player_name
+        print("%s made active" % player_name)
     
     def on_player_start_turn(self, player_name) :
         """This method is called when a player is made the current player"""
-        print "%s started turn" % player_name
+        print("%s started turn" % player_name)
             
     def on_player_end_turn(self, player_name) :
         """This methodi s called when a player's turns ends"""
-        print "%s ended turn" % player_name
+        print("%s ended turn" % player_name)
 
     def on_player_addition(self, player_name) :
         """This method is called when a player is added to the game"""
-        print "%s added to game" % player_name
+        print("%s added to game" % player_name)
 
     def on_player_remove(self, player_name) :
         """This method is called when a player is removed from the game"""
-        print "%s removed from game" % player_name
+        print("%s removed from game" % player_name)
 
     def on_deactivate(self, player_name) :
         """This method is called when a player is deactivated"""
-        print "%s made inactive" % player_name
+        print("%s made inactive" % player_name)
 
     def on_game_end(self, winner_name) : 
         """This method is called when the game ends and gives the 
         players name"""
-        print "Game over! Winner: %s" % winner_name
+        print("Game over! Winner: %s" % winner_name)
         self.event_loop.append(RobotGameView.__GAME_ENDED)
     
     def on_set_dice(self, player_name, dice) :
         """This method is called when the dice are set for the player"""
-        print "Player %s had dice set : %s" % (player_name, dice)
+        print("Player %s had dice set : %s" % (player_name, dice))
 
     def on_new_dice_amount(self, player_name, amount) :
         """This method is called when a players dice aomunt changes"""
-        print "Player %s had new dice amount : %s" % \
-            (player_name, amount)
+        print("Player %s had new dice amount : %s" % 
+            (player_name, amount))
 
     def on_error(self, value) :
         """This method is called when there is an error with the remote"""
-        print "Error detected : %s" % value
+        print("Error detected : %s" % value)
 
     def __create_bid(self) :
         truths = [True, False]
@@ -152,6 +153,38 @@ challenged, the winner and dice of each player"""
                     self.game.make_bid(next_bid)
             if len(self.event_loop) > 0 :
                 self.event_loop = self.event_loop[1:]
+def wire_game(data_store, dice_roller=None) :
+    """Create the game for the players in data_store wired up as in the
+sample, the game rules acting upon a dispatcher so that the game views 
+see the changes they make.
+Returns the dispatcher to play the game through"""
+    proxy = game_proxy.ProxyGame(None, data_store)
+    proxy_dispatcher = game_proxy.ProxyDispatcher(None, proxy)
+
+    #Create the utility objects
+    if dice_roller is None :
+        dice_roller = game_common.DiceRNG()
+    win_checker = game.get_winner
+    bid_checker = game.check_bids
+    win_handler = game.on_win
+    win_handler = partial(win_handler, game=proxy_dispatcher)
+    bid_reset = game.bid_reset
+    bid_reset = partial(bid_reset, game=proxy_dispatcher)
+    reshuffle_dice = game.reshuffle_dice
+    reshuffle_dice = partial(reshuffle_dice, game=proxy_dispatcher, 
+                             dice_roller=dice_roller)
+    
+    #Create the game object, acting upon the dispatcher so that the game
+    #views see the changes made by the game rules
+    engine = game_state.TransitionEngine(dice_roller)
+    game_obj = game.Game(data_store, win_handler, bid_checker, 
+        win_checker, bid_reset, reshuffle_dice, engine)
+    game_obj.facade = proxy_dispatcher
+    game_obj.set_state(game_state.START)
+    proxy.game = game_obj
+    proxy_dispatcher.game = game_obj
+    return proxy_dispatcher
+
 def main() :
 
     #Initialise game data store and add players
@@ -164,8 +197,7 @@ def main() :
         highest_face)
 
     #Create the proxy game objects with game views
-    proxy = game_proxy.ProxyGame(None, data_store)
-    proxy_dispatcher = game_proxy.ProxyDispatcher(None, proxy)
+    proxy_dispatcher = wire_game(data_store)
     face_val_gen = partial(generate_face_value, \
                highest = highest_face, \
                lowest = lowest_face)
@@ -173,36 +205,10 @@ def main() :
     data_store.add_game_view(view)
 
     #Initialise players
-    players = ["Player %i" % x for x in xrange(0, 8)]
+    players = ["Player %i" % x for x in range(0, 8)]
     for player in players :
         data_store.add_player(player)
 
-    #Create the utility objects
-    dice_roller = game_state.roll_set_of_dice
-    win_checker = game.get_winner
-    bid_checker = game.check_bids
-    win_handler = game.on_win
-    win_handler = partial(win_handler, game=proxy_dispatcher)
-    bid_reset = game.bid_reset
-    bid_reset = partial(bid_reset, game=proxy_dispatcher)
-    reshuffle_dice = game.reshuffle_dice
-    reshuffle_dice = partial(reshuffle_dice, game=proxy_dispatcher)
-    
-    #Create the game states from last to first
-    bid_state = game_state.BidState(proxy_dispatcher, 
-        None)
-    first_bid_state = game_state.FirstBidState(proxy_dispatcher, 
-        bid_state)
-    game_start_state = game_state.GameStartState(proxy_dispatcher, 
-        first_bid_state, dice_roller)
-    bid_state.next = game_start_state
-
-    #Create the game object
-    game_obj = game.Game(data_store, win_handler, bid_checker, 
-        win_checker, bid_reset, reshuffle_dice)
-    game_obj.set_state(game_start_state)
-    proxy.game = game_obj
-    proxy_dispatcher.game = game_obj
     proxy_dispatcher.start_game()
     view.go()
 
@@ -0,0 +1,633 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+
+
+This module serves games over the network, hosting any number of games in 
+one asyncio event loop. Clients connect over TCP and exchange JSON 
+messages, one per line. Each request has an id and an action and is 
+answered with an acknowledgement holding the same id, and an error if the
+action failed:
+
+    {"id" : 1, "action" : "create", "players" : ["Ann", "Bob"]}
+    {"ack" : 1, "game" : 0}
+    {"id" : 2, "action" : "join", "game" : 0, "player" : "Ann"}
+    {"id" : 3, "action" : "start", "game" : 0}
+    {"ack" : 3, "turn" : "Ann", "over" : false}
+    {"id" : 4, "action" : "bid", "game" : 0, "bid" : [2, 5]}
+    {"id" : 5, "action" : "challenge", "game" : 0}
+    {"id" : 6, "action" : "watch", "game" : 0}
+    {"id" : 7, "action" : "close", "game" : 0}
+
+A connection plays a game by joining it as one of its players, after which
+it may start the game and bid and challenge on that player's turn. A 
+player given in a request must be the player the connection joined as. 
+The acknowledgement of an action gives the player whose turn is next and
+whether the game is over. Only the connection that created a game may 
+close it.
+The connection that creates a game, or watches it, is sent the public game
+view events of the game, and a connection that joins is also sent the 
+dice of its player, see game_view_router. The events caused by one action
+are sent as one message before the acknowledgement, as {"game" : 0, 
+"events" : [[method name, arguments], ...]}.
+Running the module starts a server and a load generating client in one 
+process and reports the latency of actions across many open games"""
+
+from functools import partial
+import json
+import random
+import sys
+import time
+
+try :
+    import asyncio
+except ImportError :
+    asyncio = None
+
+import game
+import game_common
+import game_data
+import game_proxy
+import game_state
+import game_view_router
+import game_views
+
+class Table(object) :
+    """A game hosted by the server, wired so that events are sent to game 
+views in one batch per action"""
+
+    def __init__(self, players, engine, dice_roller, starting_dice, 
+                 lowest_face, highest_face, owner=None) :
+        self.owner = owner
+        self.data = game_data.GameData(starting_dice, lowest_face, 
+                                       highest_face)
+        for player in players :
+            self.data.add_player(player)
+        # The only game view, passing on to each client what it may see
+        self.router = game_view_router.ViewRouter()
+        self.data.add_game_view(self.router)
+        # The client playing each player and the player of each client
+        self.seats = dict()
+        self.players = dict()
+        self.proxy = game_proxy.ProxyGame(None, self.data, batch_events=True)
+        self.dispatcher = game_proxy.ProxyDispatcher(None, self.proxy)
+        self.game = game.Game(self.data, 
+            partial(game.on_win, game=self.dispatcher),
+            game.check_bids, game.get_winner,
+            partial(game.bid_reset, game=self.dispatcher),
+            partial(game.reshuffle_dice, game=self.dispatcher, 
+                    dice_roller=dice_roller),
+            engine)
+        self.game.facade = self.dispatcher
+        self.game.set_state(game_state.START)
+        self.proxy.game = self.game
+        self.dispatcher.game = self.game
+
+    def seat(self, client, player) :
+        """Have client play player. If player is not in the game, is 
+already played by a client or client already plays a player then raise
+a ValueError"""
+        if player not in self.data.get_all_players() :
+            raise ValueError("No player %r in the game" % (player,))
+        if player in self.seats :
+            raise ValueError("%s has already joined" % (player,))
+        if client in self.players :
+            raise ValueError("Already joined as %s" % 
+                             (self.players[client],))
+        self.seats[player] = client
+        self.players[client] = player
+
+    def unseat(self, player) :
+        """Free the seat of player"""
+        client = self.seats.pop(player, None)
+        self.players.pop(client, None)
+
+    def player_of(self, client) :
+        """Return the player client plays, if client has not joined then
+raise a ValueError"""
+        try :
+            return self.players[client]
+        except KeyError :
+            raise ValueError("Not joined to the game")
+
+    def check_turn(self, player) :
+        """If it is not the turn of player then raise a ValueError"""
+        if player != self.game.get_current_player() :
+            raise ValueError("It is not the turn of %s" % (player,))
+
+    def check_bid(self, bid) :
+        """Return bid as a (count, face) tuple. If the count is below one or
+the face is not a face of the dice then raise a ValueError"""
+        count, face = int(bid[0]), int(bid[1])
+        low, high = self.game.get_face_values()
+        if count < 1 :
+            raise ValueError("A bid must be for at least one die")
+        if not low <= face <= high :
+            raise ValueError("No face %i on dice of %i to %i" % 
+                             (face, low, high))
+        return count, face
+
+    def turn(self) :
+        """Return the player whose turn is next and whether the game is 
+over, as sent in the acknowledgement of an action"""
+        return {"turn" : self.game.get_current_player(), 
+                "over" : self.game.get_state() == game_state.START}
+
+
+class ClientView(game_views.GameView) :
+    """Sends the events of one game to a client connection, anything with
+a send method taking a message. player is the player the client plays, 
+or None for a client watching"""
+
+    def __init__(self, client, game_id, player=None) :
+        self.client = client
+        self.game_id = game_id
+        self.player = player
+
+    def _send(self, events) :
+        self.client.send({"game" : self.game_id, "events" : events})
+
+    def on_events(self, batch) :
+        self._send([[event, args] for event, args in batch])
+
+    def on_game_start(self, starting_player, player_list) :
+        self._send([["on_game_start", (starting_player, player_list)]])
+
+    def on_bid(self, player_name, bid) :
+        self._send([["on_bid", (player_name, bid)]])
+
+    def on_challenge(self, winner, loser, old_dice_map, bid) :
+        self._send([["on_challenge", (winner, loser, old_dice_map, bid)]])
+
+    def on_activation(self, player_name) :
+        self._send([["on_activation", (player_name,)]])
+
+    def on_player_start_turn(self, player_name) :
+        self._send([["on_player_start_turn", (player_name,)]])
+
+    def on_player_end_turn(self, player_name) :
+        self._send([["on_player_end_turn", (player_name,)]])
+
+    def on_player_addition(self, player_name) :
+        self._send([["on_player_addition", (player_name,)]])
+
+    def on_player_remove(self, player_name) :
+        self._send([["on_player_remove", (player_name,)]])
+
+    def on_deactivate(self, player_name) :
+        self._send([["on_deactivate", (player_name,)]])
+
+    def on_game_end(self, winner_name) :
+        self._send([["on_game_end", (winner_name,)]])
+
+    def on_set_dice(self, player_name, dice) :
+        self._send([["on_set_dice", (player_name, dice)]])
+
+    def on_new_dice_amount(self, player_name, amount) :
+        self._send([["on_new_dice_amount", (player_name, amount)]])
+
+    def on_bid_reset(self) :
+        self._send([["on_bid_reset", ()]])
+
+
+class GameServer(object) :
+    """Hosts games, all sharing one transition engine and dice generator.
+Requests from clients are handled by handle_request, the clients being 
+anything with a send method taking a message"""
+
+    def __init__(self, starting_dice=5, lowest_face=1, highest_face=6, 
+                 seed=None) :
+        self.starting = starting_dice
+        self.low = lowest_face
+        self.high = highest_face
+        self.dice = game_common.DiceRNG(seed)
+        self.engine = game_state.TransitionEngine(self.dice)
+        self.tables = dict()
+        # The ids of the games created by each client
+        self.owned = dict()
+        self.next_id = 0
+        self.actions = {"create" : self._create, "watch" : self._watch,
+                        "join" : self._join, 
+                        "start" : self._start, "bid" : self._bid, 
+                        "challenge" : self._challenge, 
+                        "close" : self._close}
+
+    def table(self, game_id) :
+        """Return the table of a game, if there is no such game then raise
+a ValueError"""
+        try :
+            return self.tables[game_id]
+        except KeyError :
+            raise ValueError("No game %r" % (game_id,))
+
+    def create_game(self, players, owner=None) :
+        """Host a new game for players, returning its id. owner is the 
+client allowed to close the game, the game is closed once the owner 
+disconnects. If there are fewer than two players, or
+a player is given twice, then raise a ValueError"""
+        if not isinstance(players, list) or len(players) < 2 :
+            raise ValueError("A game needs a list of at least two players")
+        if len(set(players)) != len(players) :
+            raise ValueError("Players must be named once each")
+        game_id = self.next_id
+        self.next_id = self.next_id + 1
+        self.tables[game_id] = Table(players, self.engine, self.dice, 
+                                     self.starting, self.low, self.high,
+                                     owner)
+        if owner is not None :
+            self.owned.setdefault(owner, set()).add(game_id)
+        return game_id
+
+    def close_game(self, game_id) :
+        """Stop hosting a game"""
+        table = self.table(game_id)
+        del self.tables[game_id]
+        owned = self.owned.get(table.owner)
+        if owned is not None :
+            owned.discard(game_id)
+            if not owned :
+                del self.owned[table.owner]
+
+    def disconnect(self, client) :
+        """Close the games created by client, called once it has gone"""
+        for game_id in list(self.owned.get(client, ())) :
+            self.close_game(game_id)
+
+    def watch(self, client, game_id) :
+        """Send the public events of a game to client, returning the game
+view"""
+        view = ClientView(client, game_id)
+        self.table(game_id).router.add_spectator(view)
+        return view
+
+    def join(self, client, game_id, player) :
+        """Have client play player in a game and send it the events player
+may see, returning the game view"""
+        table = self.table(game_id)
+        table.seat(client, player)
+        view = ClientView(client, game_id, player)
+        table.router.add_player_view(player, view)
+        return view
+
+    def unwatch(self, view) :
+        """Stop sending events to a game view returned by watch or join, 
+freeing the seat of a player"""
+        table = self.tables.get(view.game_id)
+        if table is not None :
+            table.router.remove_view(view)
+            if view.player is not None :
+                table.unseat(view.player)
+
+    def handle_request(self, client, request) :
+        """Carry out the action of a request and send the acknowledgement
+to client. Any error is sent in the acknowledgement rather than raised.
+Returns the game views added for client"""
+        views = list()
+        if not isinstance(request, dict) :
+            client.send({"ack" : None, 
+                         "error" : "ValueError: Requests must be objects"})
+            return views
+        reply = {"ack" : request.get("id")}
+        try :
+            action = self.actions[request["action"]]
+            result = action(client, request, views)
+            if result is not None :
+                reply.update(result)
+        except Exception as e :
+            reply["error"] = "%s: %s" % (type(e).__name__, e)
+        client.send(reply)
+        return views
+
+    def _acting_table(self, client, request) :
+        """Return the table of the game of an action and the player client
+plays in it. If a player is given it must be that player"""
+        table = self.table(request["game"])
+        player = table.player_of(client)
+        if request.get("player", player) != player :
+            raise ValueError("Joined as %s, not %s" % 
+                             (player, request["player"]))
+        return table, player
+
+    def _create(self, client, request, views) :
+        game_id = self.create_game(request["players"], client)
+        views.append(self.watch(client, game_id))
+        return {"game" : game_id}
+
+    def _watch(self, client, request, views) :
+        views.append(self.watch(client, request["game"]))
+
+    def _join(self, client, request, views) :
+        views.append(self.join(client, request["game"], request["player"]))
+
+    def _start(self, client, request, views) :
+        table, player = self._acting_table(client, request)
+        table.dispatcher.start_game()
+        return table.turn()
+
+    def _bid(self, client, request, views) :
+        table, player = self._acting_table(client, request)
+        table.check_turn(player)
+        table.dispatcher.make_bid(table.check_bid(request["bid"]))
+        return table.turn()
+
+    def _challenge(self, client, request, views) :
+        table, player = self._acting_table(client, request)
+        table.check_turn(player)
+        table.dispatcher.make_challenge()
+        return table.turn()
+
+    def _close(self, client, request, views) :
+        if self.table(request["game"]).owner is not client :
+            raise ValueError("Only the creator may close the game")
+        self.close_game(request["game"])
+
+    def serve(self, host="127.0.0.1", port=0, loop=None) :
+        """Return a future for an asyncio server on host and port for this
+game server"""
+        if loop is None :
+            loop = asyncio.get_event_loop()
+        return loop.create_server(partial(GameProtocol, self), host, port)
+
+
+# Without asyncio the protocols are plain objects so the module can still 
+# be imported
+if asyncio is None :
+    _Protocol = object
+else :
+    _Protocol = asyncio.Protocol
+
+class LineProtocol(_Protocol) :
+    """A protocol exchanging JSON messages one per line. A connection 
+sending a line longer than max_line bytes is closed"""
+
+    max_line = 1 << 16
+
+    def __init__(self) :
+        self.transport = None
+        self.buffer = b""
+
+    def connection_made(self, transport) :
+        self.transport = transport
+
+    def connection_lost(self, exc) :
+        self.transport = None
+
+    def data_received(self, data) :
+        lines = (self.buffer + data).split(b"\n")
+        self.buffer = lines.pop()
+        if len(self.buffer) > self.max_line :
+            # Never going to be a request, so stop reading rather than 
+            # holding on to it
+            self.buffer = b""
+            lines = list()
+            if self.transport is not None :
+                self.transport.close()
+        for line in lines :
+            if line.strip() :
+                try :
+                    message = json.loads(line.decode("utf-8"))
+                except ValueError as e :
+                    self.on_invalid(e)
+                    continue
+                self.on_message(message)
+
+    def send(self, message) :
+        """Send a message unless the connection has closed"""
+        if self.transport is not None :
+            self.transport.write(json.dumps(message).encode("utf-8") + 
+                                 b"\n")
+
+    def on_message(self, message) :
+        """Called with each message received"""
+
+    def on_invalid(self, error) :
+        """Called with the error for each line received that is not JSON"""
+
+
+class GameProtocol(LineProtocol) :
+    """The server side of a client connection"""
+
+    def __init__(self, server) :
+        LineProtocol.__init__(self)
+        self.server = server
+        self.views = list()
+
+    def connection_lost(self, exc) :
+        LineProtocol.connection_lost(self, exc)
+        for view in self.views :
+            self.server.unwatch(view)
+        self.views = list()
+        self.server.disconnect(self)
+
+    def on_message(self, message) :
+        self.views.extend(self.server.handle_request(self, message))
+
+    def on_invalid(self, error) :
+        self.send({"ack" : None, "error" : "ValueError: %s" % (error,)})
+
+
+class SeatConnection(LineProtocol) :
+    """One connection of a load client, playing the players of one seat"""
+
+    def __init__(self, client, seat) :
+        LineProtocol.__init__(self)
+        self.client = client
+        self.seat = seat
+
+    def connection_made(self, transport) :
+        LineProtocol.connection_made(self, transport)
+        self.client.connected(self)
+
+    def on_message(self, message) :
+        self.client.on_message(self, message)
+
+
+class LoadClient(object) :
+    """Plays games against a server over two connections, one joining 
+every game as player A and the other as player B. Creates games then keeps
+in_flight actions waiting at a time on randomly chosen games until actions
+have been acknowledged. The time taken to acknowledge each bid and 
+challenge is recorded in latencies and done is set once finished"""
+
+    seats = ("A", "B")
+
+    def __init__(self, games, actions, in_flight, done, seed=None) :
+        self.games = games
+        self.actions = actions
+        self.in_flight = in_flight
+        self.done = done
+        self.rand = random.Random(seed)
+        self.connections = dict()
+        self.next_id = 0
+        self.sent = dict()
+        self.joined = dict()
+        self.idle = list()
+        self.current = dict()
+        self.bids = dict()
+        self.over = dict()
+        self.latencies = list()
+        self.errors = 0
+        self.acked = 0
+
+    def connection(self, seat) :
+        """Return a connection for seat, to be connected to the server"""
+        return SeatConnection(self, seat)
+
+    def connected(self, connection) :
+        """Called once connection is made, creating the games once every 
+seat is connected"""
+        self.connections[connection.seat] = connection
+        if len(self.connections) < len(self.seats) :
+            return
+        for number in range(self.games) :
+            self._request(self.seats[0], None, 
+                          {"action" : "create", 
+                           "players" : [seat + str(number) 
+                                        for seat in self.seats]})
+
+    def _request(self, seat, game_id, request) :
+        self.next_id = self.next_id + 1
+        request["id"] = self.next_id
+        if game_id is not None :
+            request["game"] = game_id
+        self.sent[self.next_id] = (game_id, request, time.time())
+        self.connections[seat].send(request)
+
+    def _act(self, game_id) :
+        """Send the next action for a game on the connection of the player
+whose turn it is"""
+        if self.over.get(game_id, True) :
+            self._request(self.seats[0], game_id, {"action" : "start"})
+            return
+        seat = self.current[game_id][0]
+        bid = self.bids.get(game_id)
+        if bid is not None and self.rand.random() < 0.3 :
+            self._request(seat, game_id, {"action" : "challenge"})
+            return
+        if bid is None :
+            bid = (1, self.rand.randint(1, 6))
+        else :
+            bid = (bid[0] + 1, bid[1])
+        self._request(seat, game_id, {"action" : "bid", "bid" : bid})
+
+    def on_message(self, connection, message) :
+        """Called with each message received on connection"""
+        if "events" in message :
+            return
+        if message["ack"] not in self.sent :
+            self.errors = self.errors + 1
+            return
+        game_id, request, sent = self.sent.pop(message["ack"])
+        action = request["action"]
+        if "error" in message :
+            self.errors = self.errors + 1
+        if action == "create" :
+            for seat, player in zip(self.seats, request["players"]) :
+                self._request(seat, message["game"], 
+                              {"action" : "join", "player" : player})
+            return
+        if action == "join" :
+            self.joined[game_id] = self.joined.get(game_id, 0) + 1
+            if self.joined[game_id] == len(self.seats) :
+                self.idle.append(game_id)
+                if len(self.idle) == self.games :
+                    for _ in range(min(self.in_flight, self.games)) :
+                        self._act(self._take_idle())
+            return
+        self._follow(game_id, request, message)
+        if action in ("bid", "challenge") :
+            self.latencies.append(time.time() - sent)
+        self.acked = self.acked + 1
+        self.idle.append(game_id)
+        if self.acked >= self.actions :
+            if not self.sent and not self.done.done() :
+                self.done.set_result(self)
+        elif len(self.sent) < self.in_flight :
+            self._act(self._take_idle())
+
+    def _take_idle(self) :
+        """Remove and return a random game with no action waiting"""
+        index = self.rand.randrange(len(self.idle))
+        self.idle[index], self.idle[-1] = self.idle[-1], self.idle[index]
+        return self.idle.pop()
+
+    def _follow(self, game_id, request, message) :
+        """Keep track of the current player and bid of a game from the 
+acknowledgement of an action"""
+        if "error" in message :
+            return
+        self.current[game_id] = message["turn"]
+        self.over[game_id] = message["over"]
+        if request["action"] == "bid" :
+            self.bids[game_id] = tuple(request["bid"])
+        else :
+            self.bids[game_id] = None
+
+
+def run_load(games=10000, actions=50000, in_flight=100, seed=None) :
+    """Start a server and a load client in one event loop and play until
+actions have been acknowledged across games open games. Returns a dict of
+the number of actions, seconds taken, errors and the p50 and p99 latency
+of bids and challenges in milliseconds"""
+    if asyncio is None :
+        raise ImportError("asyncio is not available")
+    loop = asyncio.new_event_loop()
+    try :
+        server = GameServer(seed=seed)
+        listener = loop.run_until_complete(server.serve(loop=loop))
+        port = listener.sockets[0].getsockname()[1]
+        done = loop.create_future()
+        client = LoadClient(games, actions, in_flight, done, seed)
+        start = time.time()
+        transports = list()
+        for seat in client.seats :
+            transport, _ = loop.run_until_complete(loop.create_connection(
+                lambda : client.connection(seat), "127.0.0.1", port))
+            transports.append(transport)
+        loop.run_until_complete(done)
+        seconds = time.time() - start
+        for transport in transports :
+            transport.close()
+        listener.close()
+        loop.run_until_complete(listener.wait_closed())
+    finally :
+        loop.close()
+    ordered = sorted(client.latencies)
+    return {"actions" : client.acked, "seconds" : seconds, 
+            "errors" : client.errors, 
+            "p50" : game_common.percentile(ordered, 0.5) * 1000,
+            "p99" : game_common.percentile(ordered, 0.99) * 1000}
+
+def main() :
+    games = 10000
+    if len(sys.argv) > 1 :
+        games = int(sys.argv[1])
+    result = run_load(games)
+    print("%i actions over %i games in %.2f seconds, %i errors" % 
+          (result["actions"], games, result["seconds"], result["errors"]))
+    print("Latency p50 %.2f ms, p99 %.2f ms" % (result["p50"], 
+                                                 result["p99"]))
+
+if __name__ == "__main__" :
+    main()
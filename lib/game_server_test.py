@@ -0,0 +1,282 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+Test hosting games in the game server"""
+
+import json
+import unittest
+
+import game_server
+import game_state
+
+class FakeClient(object) :
+    """Collects the messages sent to a client"""
+
+    def __init__(self) :
+        self.messages = list()
+
+    def send(self, message) :
+        # Go through JSON as the protocol would
+        self.messages.append(json.loads(json.dumps(message)))
+
+
+class FakeTransport(object) :
+
+    def __init__(self) :
+        self.written = list()
+        self.closed = False
+
+    def write(self, data) :
+        self.written.append(data)
+
+    def close(self) :
+        self.closed = True
+
+
+class GameServerTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.server = game_server.GameServer(3, seed=1)
+        self.client = FakeClient()
+        self.ann = FakeClient()
+        self.bob = FakeClient()
+        self.request({"action" : "create", "players" : ["Ann", "Bob"]})
+        self.game_id = self.client.messages[-1]["game"]
+        self.request({"action" : "join", "player" : "Ann"}, self.ann)
+        self.request({"action" : "join", "player" : "Bob"}, self.bob)
+        self.request({"action" : "start"}, self.ann)
+
+    def request(self, request, client=None) :
+        client = client or self.client
+        request.setdefault("id", len(client.messages))
+        request.setdefault("game", getattr(self, "game_id", None))
+        return self.server.handle_request(client, request)
+
+    def events(self, client) :
+        return [event for message in client.messages 
+                if "events" in message for event in message["events"]]
+
+    def testStartingSendsEventsThenAck(self) :
+        events, ack = self.ann.messages[-2:]
+        self.assertEquals({"ack" : 1, "turn" : "Ann", "over" : False}, ack)
+        self.assertEquals(self.game_id, events["game"])
+        names = [event for event, args in events["events"]]
+        self.assertEquals("on_game_start", names[-1])
+        self.assertEquals(game_state.FIRST_BID, 
+            self.server.table(self.game_id).game.get_state())
+
+    def testEachPlayerSeesOnlyTheirOwnDice(self) :
+        for client, player in ((self.ann, "Ann"), (self.bob, "Bob")) :
+            dice = [args for event, args in self.events(client) 
+                    if event == "on_set_dice"]
+            self.assertEquals(1, len(dice))
+            self.assertEquals(player, dice[0][0])
+        names = [event for event, args in self.events(self.client)]
+        self.assertTrue("on_game_start" in names)
+        self.assertFalse("on_set_dice" in names)
+
+    def testBidding(self) :
+        self.request({"id" : 7, "action" : "bid", "bid" : [1, 2]}, self.ann)
+        events, ack = self.ann.messages[-2:]
+        self.assertEquals({"ack" : 7, "turn" : "Bob", "over" : False}, ack)
+        self.assertEquals(["on_bid", ["Ann", [1, 2]]], events["events"][0])
+        self.assertEquals("Bob", 
+            self.server.table(self.game_id).game.get_current_player())
+
+    def testBidOnFaceNotOnDiceIsAnError(self) :
+        for face in (0, 7, 99, 300) :
+            self.request({"action" : "bid", "bid" : [1, face]}, self.ann)
+            self.assertTrue(self.ann.messages[-1]["error"].startswith(
+                "ValueError"))
+        self.assertEquals(game_state.FIRST_BID, 
+            self.server.table(self.game_id).game.get_state())
+
+    def testBidForNoDiceIsAnError(self) :
+        for count in (0, -1) :
+            self.request({"action" : "bid", "bid" : [count, 2]}, self.ann)
+            self.assertTrue(self.ann.messages[-1]["error"].startswith(
+                "ValueError"))
+        self.assertEquals(game_state.FIRST_BID, 
+            self.server.table(self.game_id).game.get_state())
+
+    def testActingOutOfTurnIsAnError(self) :
+        self.request({"id" : 7, "action" : "bid", "bid" : [1, 2]}, self.bob)
+        ack = self.bob.messages[-1]
+        self.assertEquals(7, ack["ack"])
+        self.assertTrue(ack["error"].startswith("ValueError"))
+
+    def testActingForAnotherPlayerIsAnError(self) :
+        self.request({"action" : "bid", "player" : "Ann", "bid" : [1, 2]}, 
+                     self.bob)
+        self.assertTrue(self.bob.messages[-1]["error"].startswith(
+            "ValueError"))
+        self.request({"action" : "bid", "player" : "Ann", "bid" : [1, 2]})
+        self.assertTrue(self.client.messages[-1]["error"].startswith(
+            "ValueError"))
+        self.assertEquals(game_state.FIRST_BID, 
+            self.server.table(self.game_id).game.get_state())
+
+    def testJoiningTakenOrUnknownSeatIsAnError(self) :
+        other = FakeClient()
+        self.request({"action" : "join", "player" : "Ann"}, other)
+        self.assertTrue("error" in other.messages[-1])
+        self.request({"action" : "join", "player" : "Cat"}, other)
+        self.assertTrue("error" in other.messages[-1])
+        self.request({"action" : "join", "player" : "Bob"}, self.ann)
+        self.assertTrue("error" in self.ann.messages[-1])
+
+    def testIllegalActionsAreErrors(self) :
+        self.request({"action" : "challenge"}, self.ann)
+        self.assertTrue(self.ann.messages[-1]["error"].startswith(
+            "IllegalStateChangeError"))
+        self.request({"action" : "bid", "bid" : [2, 2]}, self.ann)
+        self.request({"action" : "bid", "bid" : [1, 2]}, self.bob)
+        self.assertTrue(self.bob.messages[-1]["error"].startswith(
+            "IllegalBidError"))
+        self.request({"action" : "dance"})
+        self.assertTrue("error" in self.client.messages[-1])
+        self.request({"action" : "start", "game" : 99})
+        self.assertTrue("error" in self.client.messages[-1])
+
+    def testMalformedRequestsAreErrors(self) :
+        for players in ([], ["Ann"], ["Ann", "Ann"], None) :
+            self.request({"action" : "create", "players" : players})
+            self.assertTrue(self.client.messages[-1]["error"].startswith(
+                "ValueError"))
+        self.request({"action" : "bid", "bid" : 3}, self.ann)
+        self.assertTrue("error" in self.ann.messages[-1])
+        for request in ([1, 2], "start", None) :
+            self.server.handle_request(self.client, request)
+            self.assertEquals(None, self.client.messages[-1]["ack"])
+            self.assertTrue("error" in self.client.messages[-1])
+
+    def testChallengingAndWatching(self) :
+        watcher = FakeClient()
+        views = self.server.handle_request(watcher, 
+            {"id" : 1, "action" : "watch", "game" : self.game_id})
+        self.request({"action" : "bid", "bid" : [1, 2]}, self.ann)
+        self.request({"action" : "challenge"}, self.bob)
+        events = [event for event, args in watcher.messages[-1]["events"]]
+        self.assertTrue("on_challenge" in events)
+        self.assertFalse("on_set_dice" in events)
+        self.server.unwatch(views[0])
+        count = len(watcher.messages)
+        table = self.server.table(self.game_id)
+        player = table.game.get_current_player()
+        self.request({"action" : "bid", "bid" : [1, 2]}, 
+                     table.seats[player])
+        self.assertEquals(count, len(watcher.messages))
+
+    def testLeavingFreesSeat(self) :
+        router = self.server.table(self.game_id).router
+        view = router.player_views["Bob"][0]
+        self.server.unwatch(view)
+        other = FakeClient()
+        self.request({"action" : "join", "player" : "Bob"}, other)
+        self.assertTrue("error" not in other.messages[-1])
+
+    def testClosingGame(self) :
+        self.request({"action" : "close"}, self.ann)
+        self.assertTrue("error" in self.ann.messages[-1])
+        self.request({"action" : "close"})
+        self.assertTrue("error" not in self.client.messages[-1])
+        self.assertRaises(ValueError, self.server.table, self.game_id)
+        self.assertEquals({}, self.server.owned)
+
+    def testOwnerLeavingClosesGames(self) :
+        self.request({"action" : "create", "players" : ["Cat", "Dan"]})
+        other = FakeClient()
+        self.request({"action" : "create", "players" : ["Eve", "Fay"]}, 
+                     other)
+        self.assertEquals(3, len(self.server.tables))
+        self.server.disconnect(self.client)
+        self.assertEquals([other.messages[-1]["game"]], 
+                          list(self.server.tables))
+        self.server.disconnect(self.ann)
+        self.assertEquals(1, len(self.server.tables))
+
+
+class LineProtocolTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.server = game_server.GameServer()
+        self.protocol = game_server.GameProtocol(self.server)
+        self.transport = FakeTransport()
+        self.protocol.connection_made(self.transport)
+
+    def last_written(self) :
+        return json.loads(self.transport.written[-1].decode("utf-8"))
+
+    def testMessagesSplitAcrossReads(self) :
+        self.protocol.data_received(b'{"id" : 1, "action" : "cre')
+        self.assertEquals([], self.transport.written)
+        self.protocol.data_received(b'ate", "players" : ["A", "B"]}\n\n')
+        self.assertEquals({"ack" : 1, "game" : 0}, self.last_written())
+        router = self.server.table(0).router
+        self.assertEquals([router], self.server.table(0).data.get_game_views())
+        self.assertEquals(1, len(router.spectators))
+        self.protocol.connection_lost(None)
+        self.assertEquals(0, len(router.spectators))
+        self.assertEquals({}, self.server.tables)
+
+    def testInvalidJsonIsAnError(self) :
+        self.protocol.data_received(b'{"id" : 1, "act\n')
+        self.assertEquals(None, self.last_written()["ack"])
+        self.assertTrue(self.last_written()["error"].startswith(
+            "ValueError"))
+        self.protocol.data_received(b'{"id" : 2, "action" : "dance"}\n')
+        self.assertEquals(2, self.last_written()["ack"])
+
+    def testOverlongLineClosesConnection(self) :
+        chunk = b"x" * 1024
+        for _ in range(self.protocol.max_line // len(chunk)) :
+            self.protocol.data_received(chunk)
+        self.assertFalse(self.transport.closed)
+        self.protocol.data_received(chunk)
+        self.assertTrue(self.transport.closed)
+        self.assertEquals(b"", self.protocol.buffer)
+
+
+@unittest.skipIf(game_server.asyncio is None, "asyncio is not available")
+class LoadTest(unittest.TestCase) :
+
+    def testPlayingOverNetwork(self) :
+        result = game_server.run_load(games=20, actions=300, in_flight=5, 
+                                      seed=1)
+        self.assertEquals(0, result["errors"])
+        self.assertTrue(result["actions"] >= 300)
+        self.assertTrue(0 < result["p50"] <= result["p99"])
+
+
+def suite() :
+    """Return a test suite of all tests defined in this module"""
+    test_suite = unittest.TestSuite()
+    loader = unittest.TestLoader()
+    test_suite.addTests(loader.loadTestsFromTestCase(GameServerTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(LineProtocolTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(LoadTest))
+    return test_suite
+
+if __name__ == "__main__" :
+    unittest.TextTestRunner().run(suite())
@@ -0,0 +1,336 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+
+
+This module provides a headless engine for playing many games quickly, for
+example to tune bots and house rules.
+Games are played by a SimulatedGame, which deals and settles challenges on
+plain lists indexed by seat rather than going through the Game object and
+the transition engine, and generates no events. It follows the same rules
+and draws the same dice as a Game, and Simulator.play_game plays the same
+game through Game for comparison.
+Every round every die is rolled again, so once the rules run on lists most
+of the time left is spent drawing dice, see game_common.roll_hands"""
+
+from functools import partial
+import random
+import time
+
+import game
+import game_common
+import game_data
+import game_state
+from game_common import IllegalBidError, IllegalStateChangeError
+
+def policy_seed(seed) :
+    """Return the seed for the generator policies draw from in a game whose
+dice are rolled from seed, so that the choices of the policies are not 
+drawn from the same stream as the dice. A seed of None is returned as it
+is so that both generators are seeded from the OS"""
+    if seed is None :
+        return None
+    return (seed * 0x9E3779B1 + 0x7F4A7C15) & 0xFFFFFFFF
+
+def next_face_bid(bid, lowest, highest) :
+    """Return the bid with the next face up, wrapping round to the lowest
+face and raising the number of dice when the highest face is passed"""
+    count, face = bid
+    if face >= highest :
+        return (count + 1, lowest)
+    return (count, face + 1)
+
+def random_policy(game_obj, rand) :
+    """Play in the same way as the robot player in game_sample.
+Open with one of the lowest face, then challenge three times in ten or 
+when the bid reaches the number of starting dice, otherwise raise either
+the number of dice or the face at random.
+A policy returns the bid to make or None to challenge"""
+    previous = game_obj.get_previous_bid()
+    lowest, highest = game_obj.get_face_values()
+    if previous is None :
+        return (1, lowest)
+    if rand.random() < 0.3 or \
+        previous[0] >= game_obj.number_of_starting_dice() :
+        return None
+    if rand.random() < 0.5 :
+        return (previous[0] + 1, previous[1])
+    return next_face_bid(previous, lowest, highest)
+
+def cautious_policy(game_obj, rand) :
+    """Open with the face this player holds most of, then challenge when 
+the previous bid is for more dice than this player holds plus the number 
+expected among everyone else's dice, otherwise raise the number of dice"""
+    previous = game_obj.get_previous_bid()
+    lowest, highest = game_obj.get_face_values()
+    own = game_obj.get_dice(game_obj.get_current_player())
+    if previous is None :
+        face = max(own, key=own.count)
+        return (own.count(face), face)
+    total = 0
+    for player in game_obj.get_players() :
+        total = total + game_obj.num_of_dice(player)
+    expected = own.count(previous[1]) + \
+        float(total - len(own)) / (highest - lowest + 1)
+    if previous[0] > expected :
+        return None
+    return (previous[0] + 1, previous[1])
+
+class SimulationConfig(object) :
+    """The settings for simulated games"""
+
+    def __init__(self, players=8, starting_dice=8, lowest_face=1, 
+                 highest_face=20, seed=None) :
+        self.players = players
+        self.starting_dice = starting_dice
+        self.lowest_face = lowest_face
+        self.highest_face = highest_face
+        self.seed = seed
+
+
+class SimulationResult(object) :
+    """The outcome of a run of simulated games, wins holds the number of
+games won by each seat"""
+
+    def __init__(self, games, seconds, wins) :
+        self.games = games
+        self.seconds = seconds
+        self.wins = wins
+
+    def games_per_second(self) :
+        """Return the number of games played per second"""
+        if self.seconds <= 0 :
+            return float("inf")
+        return self.games / self.seconds
+
+
+class SimulatedGame(object) :
+    """A game played on lists indexed by seat. It provides the parts of the
+Game interface that policies read, with players named by seats, and plays
+by the rules of game_state: the bid before a challenge is checked against 
+the face counts, the loser gives up a die, every active player rerolls 
+and the loser starts the next round unless they are out, in which case 
+the winner does. Dice are rolled with the roll_hands method of 
+dice_roller in the same order a Game rolls them"""
+
+    def __init__(self, seats, starting_dice, face_values, dice_roller) :
+        self.seats = seats
+        self.seat_of = dict((p, i) for i, p in enumerate(seats))
+        self.starting = starting_dice
+        self.faces = face_values
+        self.roll_hands = dice_roller.roll_hands
+        self.hands = [list() for _ in seats]
+        self.counts = [0] * len(seats)
+        # The seats of the active players in turn order, with their names
+        self.active = list()
+        self.players = list()
+        # The index in active of the player whose turn it is
+        self.position = 0
+        self.bid = None
+
+    def get_current_player(self) :
+        """Return the player whose turn it is"""
+        return self.seats[self.active[self.position]]
+
+    def get_previous_bid(self) :
+        """Return the bid to beat, None at the start of a round"""
+        return self.bid
+
+    def get_face_values(self) :
+        """Return the lowest and highest faces on the dice"""
+        return self.faces
+
+    def number_of_starting_dice(self) :
+        """Return the number of dice each player starts with"""
+        return self.starting
+
+    def get_players(self) :
+        """Return the active players, the list should not be modified"""
+        return self.players
+
+    def get_dice(self, player) :
+        """Return the dice player holds"""
+        return self.hands[self.seat_of[player]]
+
+    def num_of_dice(self, player) :
+        """Return the number of dice player holds"""
+        return self.counts[self.seat_of[player]]
+
+    def _deal(self) :
+        """Roll the dice of every active player"""
+        active = self.active
+        counts = self.counts
+        hands = self.hands
+        rolled = self.roll_hands([counts[seat] for seat in active], 
+                                 self.faces)
+        for seat, hand in zip(active, rolled) :
+            hands[seat] = hand
+
+    def play(self, policies, rand) :
+        """Play one game to the end with policies holding the policy for 
+each seat, drawing from rand. Returns the seat of the winner. If a policy
+makes a bid that does not beat the previous bid then raise an 
+IllegalBidError, if it challenges before any bid then raise an 
+IllegalStateChangeError"""
+        self.active = list(range(len(self.seats)))
+        self.players = list(self.seats)
+        self.counts = [self.starting] * len(self.seats)
+        self.position = 0
+        self.bid = None
+        self._deal()
+        active = self.active
+        while True :
+            bid = policies[active[self.position]](self, rand)
+            if bid is None :
+                winner = self._challenge()
+                if winner is not None :
+                    return winner
+                continue
+            previous = self.bid
+            if previous is not None and not (bid[0] > previous[0] or 
+                (bid[0] == previous[0] and bid[1] > previous[1])) :
+                raise IllegalBidError((bid, previous))
+            self.bid = bid
+            self.position = self.position + 1
+            if self.position == len(active) :
+                self.position = 0
+
+    def _challenge(self) :
+        """Settle a challenge by the current player of the previous bid and
+start the next round. Returns the seat of the winner once only one player
+has dice left, otherwise None"""
+        active = self.active
+        if self.bid is None :
+            raise IllegalStateChangeError("%s trying to challenge with no bid"
+                                          % (self.get_current_player(),))
+        count, face = self.bid
+        hands = self.hands
+        total = 0
+        for seat in active :
+            total = total + hands[seat].count(face)
+        challenger = self.position
+        challenged = challenger - 1 if challenger else len(active) - 1
+        if total >= count :
+            winner, loser = challenged, challenger
+        else :
+            winner, loser = challenger, challenged
+        self.bid = None
+        loser_seat = active[loser]
+        self.counts[loser_seat] = self.counts[loser_seat] - 1
+        self._deal()
+        if self.counts[loser_seat] :
+            self.position = loser
+            return None
+        del active[loser]
+        self.players = [self.seats[seat] for seat in active]
+        if winner > loser :
+            winner = winner - 1
+        self.position = winner
+        if len(active) == 1 :
+            return active[0]
+        return None
+
+
+class Simulator(object) :
+    """Holds a game wired for headless play. The same game is reused for
+every game played, starting a game resets the dice and active players
+each time. play plays a game with a SimulatedGame, play_game plays it 
+through a Game wired to a shared transition engine"""
+
+    def __init__(self, config) :
+        self.config = config
+        self.rand = random.Random(policy_seed(config.seed))
+        self.dice = game_common.DiceRNG(config.seed)
+        self.data = game_data.GameData(config.starting_dice, 
+                                       config.lowest_face, 
+                                       config.highest_face)
+        self.seats = ["Player %i" % x for x in range(0, config.players)]
+        for player in self.seats :
+            self.data.add_player(player)
+        self.seat_of = dict((p, i) for i, p in enumerate(self.seats))
+
+        self.game = game.Game(self.data, 
+                              engine=game_state.TransitionEngine(self.dice))
+        self.game.win_handler = partial(game.on_win, game=self.game)
+        self.game.bid_reset = partial(game.bid_reset, game=self.game)
+        self.game.reshuffle = partial(game.reshuffle_dice, game=self.game,
+                                      dice_roller=self.dice)
+        self.game.set_state(game_state.START)
+        self.table = SimulatedGame(self.seats, config.starting_dice, 
+                                   (config.lowest_face, config.highest_face),
+                                   self.dice)
+
+    def seed(self, seed) :
+        """Reseed the generators used for dice and policies so that the
+next game played is repeatable"""
+        self.rand.seed(policy_seed(seed))
+        self.dice.seed(seed)
+
+    def play(self, policies) :
+        """Play one game to the end with policies holding the policy for 
+each seat. Returns the seat of the winner"""
+        return self.table.play(policies, self.rand)
+
+    def play_game(self, policies) :
+        """Play one game as play does, but through the Game object"""
+        game_obj = self.game
+        rand = self.rand
+        seat_of = self.seat_of
+        game_obj.set_current_player(None)
+        game_obj.start_game()
+        while game_obj.get_state() != game_state.START :
+            policy = policies[seat_of[game_obj.get_current_player()]]
+            bid = policy(game_obj, rand)
+            if bid is None :
+                game_obj.make_challenge()
+            else :
+                game_obj.make_bid(bid)
+        return seat_of[game_obj.get_winning_player()]
+
+
+def simulate(n_games, config=None, policy=random_policy) :
+    """Play n_games headless games with every seat using policy, policy may
+also be a sequence holding a policy for each seat. 
+Returns a SimulationResult"""
+    if config is None :
+        config = SimulationConfig()
+    if callable(policy) :
+        policies = [policy] * config.players
+    else :
+        policies = list(policy)
+    simulator = Simulator(config)
+    wins = [0] * config.players
+    start = time.time()
+    for _ in range(n_games) :
+        wins[simulator.play(policies)] += 1
+    return SimulationResult(n_games, time.time() - start, wins)
+
+def main() :
+    result = simulate(2000)
+    print("%i games in %.2f seconds, %.1f games per second" % 
+          (result.games, result.seconds, result.games_per_second()))
+    print("Wins by seat %s" % result.wins)
+
+if __name__ == "__main__" :
+    main()
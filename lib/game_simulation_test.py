@@ -0,0 +1,164 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+Tests for the headless simulation engine
+This module relies on the mock library for mocking of dependencies."""
+
+import unittest
+import random
+
+from mock import Mock
+
+import game
+import game_common
+import game_simulation
+
+class PolicyTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.game = Mock(spec=game.Game)
+        self.game.get_face_values.return_value = (1, 6)
+        self.game.number_of_starting_dice.return_value = 5
+        self.rand = Mock(spec=random.Random)
+
+    def testNextFaceBid(self) :
+        self.assertEquals((2, 4), game_simulation.next_face_bid((2, 3), 1, 6))
+        self.assertEquals((3, 1), game_simulation.next_face_bid((2, 6), 1, 6))
+
+    def testOpeningBid(self) :
+        self.game.get_previous_bid.return_value = None
+        self.assertEquals((1, 1), 
+            game_simulation.random_policy(self.game, self.rand))
+
+    def testChallengingAtStartingDice(self) :
+        self.game.get_previous_bid.return_value = (5, 2)
+        self.rand.random.return_value = 0.9
+        self.assertTrue(
+            game_simulation.random_policy(self.game, self.rand) is None)
+
+    def testRaisingBid(self) :
+        self.game.get_previous_bid.return_value = (2, 6)
+        self.rand.random.side_effect = [0.9, 0.1]
+        self.assertEquals((3, 6), 
+            game_simulation.random_policy(self.game, self.rand))
+        self.rand.random.side_effect = [0.9, 0.9]
+        self.assertEquals((3, 1), 
+            game_simulation.random_policy(self.game, self.rand))
+
+
+    def testCautiousOpeningBid(self) :
+        self.game.get_previous_bid.return_value = None
+        self.game.get_dice.return_value = [2, 5, 5, 1]
+        self.assertEquals((2, 5), 
+            game_simulation.cautious_policy(self.game, self.rand))
+
+    def testCautiousPolicy(self) :
+        self.game.get_dice.return_value = [2, 5, 5]
+        self.game.get_players.return_value = ["a", "b", "c"]
+        self.game.num_of_dice.return_value = 3
+        self.game.get_previous_bid.return_value = (3, 5)
+        self.assertEquals((4, 5), 
+            game_simulation.cautious_policy(self.game, self.rand))
+        self.game.get_previous_bid.return_value = (4, 5)
+        self.assertTrue(
+            game_simulation.cautious_policy(self.game, self.rand) is None)
+
+
+class SimulateTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.config = game_simulation.SimulationConfig(players=4, 
+            starting_dice=3, highest_face=6, seed=7)
+
+    def testPlayingGames(self) :
+        result = game_simulation.simulate(20, self.config)
+        self.assertEquals(20, result.games)
+        self.assertEquals(20, sum(result.wins))
+        self.assertEquals(4, len(result.wins))
+        self.assertTrue(result.games_per_second() > 0)
+
+    def testSameSeedGivesSameResults(self) :
+        result1 = game_simulation.simulate(20, self.config)
+        result2 = game_simulation.simulate(20, self.config)
+        self.assertEquals(result1.wins, result2.wins)
+
+    def testPoliciesAndDiceDrawFromDifferentStreams(self) :
+        simulator = game_simulation.Simulator(self.config)
+        dice = simulator.dice(10, (1, 20))
+        choices = [simulator.rand.randint(1, 20) for _ in xrange(0, 10)]
+        self.assertNotEquals(dice, choices)
+
+    def testReseedingKeepsStreamsApart(self) :
+        simulator = game_simulation.Simulator(self.config)
+        simulator.seed(11)
+        dice = simulator.dice(10, (1, 20))
+        choices = [simulator.rand.randint(1, 20) for _ in xrange(0, 10)]
+        self.assertNotEquals(dice, choices)
+
+    def testSimulatedGameMatchesGame(self) :
+        for policy in (game_simulation.random_policy, 
+                       game_simulation.cautious_policy) :
+            fast = game_simulation.Simulator(self.config)
+            full = game_simulation.Simulator(self.config)
+            policies = [policy] * 4
+            self.assertEquals([fast.play(policies) for _ in xrange(0, 20)],
+                              [full.play_game(policies) 
+                               for _ in xrange(0, 20)])
+
+    def testSimulatedGameRefusesIllegalActions(self) :
+        simulator = game_simulation.Simulator(self.config)
+        def challenge(game_obj, rand) :
+            return None
+        self.assertRaises(game_common.IllegalStateChangeError, 
+                          simulator.play, [challenge] * 4)
+        def repeat(game_obj, rand) :
+            return (1, 2)
+        self.assertRaises(game_common.IllegalBidError, 
+                          simulator.play, [repeat] * 4)
+
+    def testPolicyForEachSeat(self) :
+        calls = [0] * 4
+        def seat_policy(seat) :
+            def policy(game_obj, rand) :
+                calls[seat] += 1
+                return game_simulation.random_policy(game_obj, rand)
+            return policy
+        policies = [seat_policy(seat) for seat in xrange(0, 4)]
+
+        result = game_simulation.simulate(5, self.config, policies)
+
+        self.assertEquals(5, sum(result.wins))
+        self.assertTrue(all([count > 0 for count in calls]))
+
+
+def suite() :
+    """Return a test suite of all tests defined in this module"""
+    test_suite = unittest.TestSuite()
+    loader = unittest.TestLoader()
+    test_suite.addTests(loader.loadTestsFromTestCase(PolicyTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(SimulateTest))
+    return test_suite
+
+if __name__ == "__main__" :
+    unittest.TextTestRunner().run(suite())
@@ -0,0 +1,151 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+
+
+This module saves a game in progress to a compact binary snapshot and
+restores it again, so that a game can be moved between processes or kept
+on disk. A snapshot holds the players, their dice and bids, which players
+are inactive, the current player, the state id, the range of faces and 
+the number of starting dice. Only state ids, as used by the transition 
+engine, can be saved, not state objects.
+
+A snapshot is laid out as a header followed by a record for each player,
+all little endian:
+
+    header  magic "LDSN", version, starting dice, lowest face, highest 
+            face, state id (255 for none), number of players, index of the
+            current player (65535 for none)
+    player  length of the name, flags, number of dice, bid count, bid 
+            face, then the name in UTF-8 and the dice as one byte each"""
+
+import struct
+
+import game_data
+
+MAGIC = b"LDSN"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sBBBBBHH")
+_PLAYER = struct.Struct("<HBBIB")
+
+_NO_STATE = 0xFF
+_NO_PLAYER = 0xFFFF
+
+_ACTIVE = 1
+_HAS_DICE = 2
+_HAS_BID = 4
+
+def is_state_id(state) :
+    """Return if state is a state id that can be saved"""
+    return isinstance(state, int) and 0 <= state < _NO_STATE
+
+def snapshot(data, keep_state=True) :
+    """Return a snapshot of the game held by the data store data. If the 
+current state is not a state id, or the current player is not in the 
+game, then raise a ValueError. If keep_state is False then the current
+state is left out"""
+    players = data.get_all_players()
+    state = data.get_current_state()
+    if state is None or not keep_state :
+        state = _NO_STATE
+    elif not is_state_id(state) :
+        raise ValueError("Only state ids can be saved, not %r" % (state,))
+    current = data.get_current_player()
+    if current is None :
+        current = _NO_PLAYER
+    else :
+        current = players.index(current)
+    parts = [_HEADER.pack(MAGIC, VERSION, data.get_num_of_starting_dice(),
+                          data.get_lowest_dice(), data.get_highest_dice(),
+                          state, len(players), current)]
+    pack_player = _PLAYER.pack
+    for player in players :
+        name = player.encode("utf-8")
+        dice = data.get_dice(player)
+        bid = data.get_bid(player)
+        flags = 0
+        if data.is_active(player) :
+            flags = _ACTIVE
+        if dice is None :
+            dice = ()
+        else :
+            flags = flags | _HAS_DICE
+        if bid is None :
+            bid = (0, 0)
+        else :
+            flags = flags | _HAS_BID
+        parts.append(pack_player(len(name), flags, len(dice), 
+                                 bid[0], bid[1]))
+        parts.append(name)
+        parts.append(bytes(bytearray(dice)))
+    return b"".join(parts)
+
+def restore(blob, data_class=game_data.GameData) :
+    """Return a new data store of type data_class holding the game saved 
+in blob. If blob is not a snapshot, or was written by an unknown version,
+then raise a ValueError"""
+    if len(blob) < _HEADER.size :
+        raise ValueError("Snapshot is too short")
+    magic, version, starting, low, high, state, count, current = \
+        _HEADER.unpack_from(blob)
+    if magic != MAGIC :
+        raise ValueError("Not a game snapshot")
+    if version != VERSION :
+        raise ValueError("Unknown snapshot version %i" % version)
+    data = data_class(starting, low, high)
+    unpack_player = _PLAYER.unpack_from
+    player_size = _PLAYER.size
+    offset = _HEADER.size
+    players = list()
+    try :
+        for _ in range(count) :
+            length, flags, num_dice, bid_count, bid_face = \
+                unpack_player(blob, offset)
+            offset = offset + player_size
+            player = blob[offset:offset + length].decode("utf-8")
+            offset = offset + length
+            data.add_player(player)
+            players.append(player)
+            if flags & _HAS_DICE :
+                data.set_dice(player, 
+                              list(bytearray(blob[offset:offset + num_dice])))
+            offset = offset + num_dice
+            if flags & _HAS_BID :
+                data.set_bid(player, (bid_count, bid_face))
+            if not flags & _ACTIVE :
+                data.mark_inactive(player)
+    except struct.error :
+        raise ValueError("Snapshot is truncated")
+    if offset != len(blob) :
+        raise ValueError("Snapshot is the wrong length")
+    if current != _NO_PLAYER :
+        data.set_current_player(players[current])
+    if state != _NO_STATE :
+        data.set_current_state(state)
+    return data
+
+
+if __name__ == "__main__" :
+    pass
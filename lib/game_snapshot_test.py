@@ -0,0 +1,146 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+Test saving games to snapshots and restoring them"""
+
+import unittest
+
+import game_compact_data
+import game_data
+import game_simulation
+import game_snapshot
+import game_state
+import game_table_store_test
+
+class SnapshotTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.data = game_data.GameData(5, 1, 6)
+        for player in ["player1", "player2", "player3"] :
+            self.data.add_player(player)
+
+    def assertSameGame(self, expected, actual) :
+        self.assertEquals(expected.get_all_players(), 
+                          actual.get_all_players())
+        self.assertEquals(expected.get_players(), actual.get_players())
+        for player in expected.get_all_players() :
+            self.assertEquals(expected.get_dice(player), 
+                              actual.get_dice(player))
+            self.assertEquals(expected.get_bid(player), 
+                              actual.get_bid(player))
+        self.assertEquals(expected.get_current_player(), 
+                          actual.get_current_player())
+        self.assertEquals(expected.get_current_state(), 
+                          actual.get_current_state())
+        self.assertEquals(expected.get_num_of_starting_dice(), 
+                          actual.get_num_of_starting_dice())
+        self.assertEquals(expected.get_lowest_dice(), 
+                          actual.get_lowest_dice())
+        self.assertEquals(expected.get_highest_dice(), 
+                          actual.get_highest_dice())
+
+    def testRoundTripOfNewGame(self) :
+        restored = game_snapshot.restore(game_snapshot.snapshot(self.data))
+        self.assertSameGame(self.data, restored)
+        self.assertTrue(restored.get_dice("player1") is None)
+        self.assertTrue(restored.get_current_state() is None)
+
+    def testRoundTripOfGameInPlay(self) :
+        self.data.set_dice("player1", [1, 2, 6])
+        self.data.set_dice("player2", [])
+        self.data.set_dice("player3", [4])
+        self.data.set_bid("player1", (1000, 6))
+        self.data.mark_inactive("player2")
+        self.data.set_current_player("player3")
+        self.data.set_current_state(game_state.BID)
+        restored = game_snapshot.restore(game_snapshot.snapshot(self.data))
+        self.assertSameGame(self.data, restored)
+        self.assertEquals(1, restored.get_face_count(6))
+        self.assertEquals("player3", restored.get_next_player("player1"))
+
+    def testRoundTripOfSimulatedGames(self) :
+        config = game_simulation.SimulationConfig(players=6, seed=4)
+        simulator = game_simulation.Simulator(config)
+        game_obj = simulator.game
+        game_obj.start_game()
+        policy = game_simulation.random_policy
+        while game_obj.get_state() != game_state.START :
+            blob = game_snapshot.snapshot(simulator.data)
+            self.assertSameGame(simulator.data, game_snapshot.restore(blob))
+            bid = policy(game_obj, simulator.rand)
+            if bid is None :
+                game_obj.make_challenge()
+            else :
+                game_obj.make_bid(bid)
+
+    def testRestoringToOtherDataStores(self) :
+        self.data.set_dice("player1", [3, 3])
+        self.data.set_bid("player2", (2, 3))
+        self.data.mark_inactive("player3")
+        blob = game_snapshot.snapshot(self.data)
+        for data_class in (game_compact_data.CompactGameData, 
+                           game_table_store_test.table_data) :
+            restored = game_snapshot.restore(blob, data_class)
+            self.assertSameGame(self.data, restored)
+            self.assertEquals(blob, game_snapshot.snapshot(restored))
+
+    def testNamesAreUnicode(self) :
+        data = game_data.GameData()
+        data.add_player(u"Jos\u00e9")
+        restored = game_snapshot.restore(game_snapshot.snapshot(data))
+        self.assertEquals([u"Jos\u00e9"], restored.get_all_players())
+
+    def testStateObjectsCannotBeSaved(self) :
+        self.data.set_current_state(object())
+        self.assertRaises(ValueError, game_snapshot.snapshot, self.data)
+
+    def testLeavingOutState(self) :
+        self.data.set_current_state(object())
+        blob = game_snapshot.snapshot(self.data, keep_state=False)
+        self.assertTrue(game_snapshot.restore(blob).get_current_state() 
+                        is None)
+
+    def testCurrentPlayerMustBeInGame(self) :
+        self.data.set_current_player("stranger")
+        self.assertRaises(ValueError, game_snapshot.snapshot, self.data)
+
+    def testRestoringBadSnapshotsThrowsException(self) :
+        blob = game_snapshot.snapshot(self.data)
+        self.assertRaises(ValueError, game_snapshot.restore, b"")
+        self.assertRaises(ValueError, game_snapshot.restore, b"X" + blob[1:])
+        self.assertRaises(ValueError, game_snapshot.restore, 
+                          blob[:4] + b"\x09" + blob[5:])
+        self.assertRaises(ValueError, game_snapshot.restore, blob[:-3])
+        self.assertRaises(ValueError, game_snapshot.restore, blob + b"\x00")
+
+
+def suite() :
+    """Return a test suite of all tests defined in this module"""
+    test_suite = unittest.TestSuite()
+    loader = unittest.TestLoader()
+    test_suite.addTests(loader.loadTestsFromTestCase(SnapshotTest))
+    return test_suite
+
+if __name__ == "__main__" :
+    unittest.TextTestRunner().run(suite())
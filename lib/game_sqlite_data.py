@@ -0,0 +1,276 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+
+
+This module contains a data store for the game kept in an SQLite database,
+so that games can be kept on disk and loaded again when needed rather than
+all being held in memory. The whole of a loaded game is also held in 
+memory as for GameData, so reading is as fast as for GameData. Changes 
+are collected and written in one transaction when the current player or
+state changes, so the dice rolled for a round are written together, or
+when flush is called. Connections to the database are shared between 
+games through a ConnectionPool."""
+
+import sqlite3
+import threading
+
+try :
+    from Queue import Queue, Empty
+except ImportError :
+    from queue import Queue, Empty
+
+from game_data import GameData
+import game_snapshot
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    starting INTEGER NOT NULL,
+    low INTEGER NOT NULL,
+    high INTEGER NOT NULL,
+    current_player TEXT,
+    state INTEGER
+);
+CREATE TABLE IF NOT EXISTS players (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    name TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    active INTEGER NOT NULL,
+    dice BLOB,
+    bid_count INTEGER,
+    bid_face INTEGER,
+    PRIMARY KEY (game_id, name)
+);
+"""
+
+class ConnectionPool(object) :
+    """Hands out up to size connections to the database at path, creating
+the tables on first use. Connections may be used from any thread but only
+by one thread at a time"""
+
+    def __init__(self, path, size=4) :
+        self.path = path
+        self.size = size
+        self.idle = Queue()
+        self.lock = threading.Lock()
+        self.created = 0
+        connection = self.acquire()
+        try :
+            connection.executescript(_SCHEMA)
+        finally :
+            self.release(connection)
+
+    def acquire(self) :
+        """Return an idle connection, opening a new one if fewer than size
+are open, otherwise waiting for one to be released"""
+        try :
+            return self.idle.get_nowait()
+        except Empty :
+            pass
+        with self.lock :
+            opening = self.created < self.size
+            if opening :
+                self.created = self.created + 1
+        if opening :
+            return sqlite3.connect(self.path, check_same_thread=False)
+        return self.idle.get()
+
+    def release(self, connection) :
+        """Return a connection to the pool"""
+        self.idle.put(connection)
+
+    def close(self) :
+        """Close the idle connections. Connections are opened again if the
+pool is used after closing"""
+        while True :
+            try :
+                connection = self.idle.get_nowait()
+            except Empty :
+                return
+            connection.close()
+            with self.lock :
+                self.created = self.created - 1
+
+
+def _pack_dice(dice) :
+    if dice is None :
+        return None
+    return sqlite3.Binary(bytes(bytearray(dice)))
+
+def _unpack_dice(blob) :
+    if blob is None :
+        return None
+    return list(bytearray(blob))
+
+
+class SQLiteGameData(GameData) :
+    """A GameData stored in the database of pool. If game_id is None a new
+game is created in the database, use load to read an existing game.
+Only state ids are stored, other states are held in memory only"""
+
+    def __init__(self, pool, starting_dice=5, lowest_face=1, 
+                 highest_face=6, game_id=None) :
+        GameData.__init__(self, starting_dice, lowest_face, highest_face)
+        self.pool = pool
+        self.seqs = dict()
+        self.next_seq = 0
+        self.changed = set()
+        self.removed = set()
+        self.game_changed = False
+        if game_id is None :
+            connection = pool.acquire()
+            try :
+                with connection :
+                    game_id = connection.execute(
+                        "INSERT INTO games (starting, low, high) "
+                        "VALUES (?, ?, ?)", 
+                        (starting_dice, lowest_face, highest_face)
+                        ).lastrowid
+            finally :
+                pool.release(connection)
+        self.game_id = game_id
+
+    @classmethod
+    def load(cls, pool, game_id) :
+        """Read the game game_id from the database of pool. If there is no
+such game raise a ValueError"""
+        connection = pool.acquire()
+        try :
+            game = connection.execute(
+                "SELECT starting, low, high, current_player, state "
+                "FROM games WHERE id = ?", (game_id,)).fetchone()
+            if game is None :
+                raise ValueError(game_id)
+            players = connection.execute(
+                "SELECT name, seq, active, dice, bid_count, bid_face "
+                "FROM players WHERE game_id = ? ORDER BY seq", 
+                (game_id,)).fetchall()
+        finally :
+            pool.release(connection)
+        starting, low, high, current, state = game
+        data = cls(pool, starting, low, high, game_id)
+        for name, seq, active, dice, bid_count, bid_face in players :
+            GameData.add_player(data, name)
+            GameData.set_dice(data, name, _unpack_dice(dice))
+            if bid_count is not None :
+                GameData.set_bid(data, name, (bid_count, bid_face))
+            if not active :
+                GameData.mark_inactive(data, name)
+            data.seqs[name] = seq
+            data.next_seq = seq + 1
+        data.cur_player = current
+        data.cur_state = state
+        return data
+
+    def flush(self) :
+        """Write all changes made since the last flush in one transaction"""
+        if not (self.changed or self.removed or self.game_changed) :
+            return
+        rows = list()
+        for player in self.changed :
+            index = self.slots[player]
+            bid = self.bids[index] or (None, None)
+            rows.append((self.game_id, player, self.seqs[player], 
+                         player not in self.inactive, 
+                         _pack_dice(self.dice[index]), bid[0], bid[1]))
+        state = self.cur_state
+        if not game_snapshot.is_state_id(state) :
+            state = None
+        connection = self.pool.acquire()
+        try :
+            with connection :
+                if self.game_changed :
+                    connection.execute(
+                        "UPDATE games SET current_player = ?, state = ? "
+                        "WHERE id = ?", (self.cur_player, state, 
+                                         self.game_id))
+                connection.executemany(
+                    "DELETE FROM players WHERE game_id = ? AND name = ?",
+                    [(self.game_id, player) for player in self.removed])
+                connection.executemany(
+                    "INSERT OR REPLACE INTO players (game_id, name, seq, "
+                    "active, dice, bid_count, bid_face) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        finally :
+            self.pool.release(connection)
+        self.changed.clear()
+        self.removed.clear()
+        self.game_changed = False
+
+    def set_current_state(self, state) :
+        """Set the current state of the game and write all changes"""
+        GameData.set_current_state(self, state)
+        self.game_changed = True
+        self.flush()
+
+    def set_current_player(self, player) :
+        """Set the player whose current turn it is and write all changes"""
+        GameData.set_current_player(self, player)
+        self.game_changed = True
+        self.flush()
+
+    def add_player(self, player) :
+        """Add a player, see GameData.add_player"""
+        GameData.add_player(self, player)
+        self.seqs[player] = self.next_seq
+        self.next_seq = self.next_seq + 1
+        self.changed.add(player)
+
+    def remove_player(self, player) :
+        """Remove player from the game"""
+        GameData.remove_player(self, player)
+        del self.seqs[player]
+        self.changed.discard(player)
+        self.removed.add(player)
+
+    def make_all_active(self) :
+        """Mark all players as active"""
+        GameData.make_all_active(self)
+        self.changed.update(self.players)
+
+    def mark_inactive(self, player) :
+        """Mark a player as being inactive"""
+        GameData.mark_inactive(self, player)
+        if player in self.slots :
+            self.changed.add(player)
+
+    def set_dice(self, player, dice) :
+        """Set the dice a particular player has in their hand"""
+        GameData.set_dice(self, player, dice)
+        self.changed.add(player)
+
+    def remove_dice(self, player) :
+        """Remove the last dice from a players hand"""
+        GameData.remove_dice(self, player)
+        self.changed.add(player)
+
+    def set_bid(self, player, bid) :
+        """Set the bid for a particular player has made"""
+        GameData.set_bid(self, player, bid)
+        self.changed.add(player)
+
+
+if __name__ == "__main__" :
+    pass
@@ -0,0 +1,160 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+Test the SQLite data store against the same tests as the game data object,
+plus its writing to and loading from the database"""
+
+from functools import partial
+import os
+import shutil
+import tempfile
+import unittest
+
+import game_data_test
+import game_integration_test
+import game_sqlite_data
+import game_state
+
+class SQLiteGameDataTest(game_data_test.GameDataTest) :
+
+    def setUp(self) :
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "games.db")
+        self.pool = game_sqlite_data.ConnectionPool(self.path, 2)
+        self.starting = 3
+        self.subject = game_sqlite_data.SQLiteGameData(self.pool, 
+                                                       self.starting)
+
+    def tearDown(self) :
+        self.pool.close()
+        shutil.rmtree(self.directory)
+
+    def load(self) :
+        return game_sqlite_data.SQLiteGameData.load(self.pool, 
+                                                    self.subject.game_id)
+
+    def testChangesAreWrittenWhenTurnChanges(self) :
+        self.subject.add_player("player1")
+        self.subject.add_player("player2")
+        self.subject.set_dice("player1", [1, 2, 3])
+        self.subject.set_dice("player2", [4, 5, 6])
+        self.assertEquals([], self.load().get_all_players())
+        self.subject.set_current_player("player1")
+        loaded = self.load()
+        self.assertEquals(["player1", "player2"], loaded.get_all_players())
+        self.assertEquals([4, 5, 6], loaded.get_dice("player2"))
+        self.assertEquals("player1", loaded.get_current_player())
+
+    def testLoadingGameInPlay(self) :
+        for player in ["player1", "player2", "player3", "player4"] :
+            self.subject.add_player(player)
+            self.subject.set_dice(player, [2, 6])
+        self.subject.remove_player("player2")
+        self.subject.add_player("player2")
+        self.subject.remove_dice("player1")
+        self.subject.set_bid("player3", (3, 6))
+        self.subject.mark_inactive("player4")
+        self.subject.set_current_state(game_state.BID)
+        loaded = self.load()
+        self.assertEquals(self.subject.get_all_players(), 
+                          loaded.get_all_players())
+        self.assertEquals(self.subject.get_players(), loaded.get_players())
+        self.assertEquals(self.subject.get_dice_map(), loaded.get_dice_map())
+        self.assertEquals((3, 6), loaded.get_bid("player3"))
+        self.assertTrue(loaded.get_bid("player1") is None)
+        self.assertEquals(2, loaded.get_face_count(6))
+        self.assertEquals(game_state.BID, loaded.get_current_state())
+        self.assertEquals(3, loaded.get_num_of_starting_dice())
+        loaded.add_player("player5")
+        self.assertEquals("player5", loaded.get_all_players()[-1])
+
+    def testRemovedPlayersAreDeleted(self) :
+        self.subject.add_player("player1")
+        self.subject.add_player("player2")
+        self.subject.flush()
+        self.subject.remove_player("player1")
+        self.subject.flush()
+        self.assertEquals(["player2"], self.load().get_all_players())
+
+    def testStateObjectsAreNotWritten(self) :
+        self.subject.set_current_state(object())
+        self.assertTrue(self.load().get_current_state() is None)
+
+    def testGamesShareConnections(self) :
+        games = [game_sqlite_data.SQLiteGameData(self.pool) 
+                 for _ in range(5)]
+        for number, data in enumerate(games) :
+            data.add_player("player%i" % number)
+            data.flush()
+        self.assertEquals(1, self.pool.created)
+        for number, data in enumerate(games) :
+            loaded = game_sqlite_data.SQLiteGameData.load(self.pool, 
+                                                          data.game_id)
+            self.assertEquals(["player%i" % number], 
+                              loaded.get_all_players())
+
+    def testPoolCanBeUsedAfterClosing(self) :
+        self.subject.add_player("player1")
+        self.subject.flush()
+        first = self.pool.acquire()
+        second = self.pool.acquire()
+        self.pool.release(first)
+        self.pool.close()
+        self.assertEquals(1, self.pool.created)
+        self.pool.release(second)
+        self.pool.close()
+        self.assertEquals(0, self.pool.created)
+        self.assertEquals(["player1"], self.load().get_all_players())
+
+    def testLoadingMissingGameThrowsException(self) :
+        self.assertRaises(ValueError, game_sqlite_data.SQLiteGameData.load,
+                          self.pool, self.subject.game_id + 1)
+
+
+class SQLiteGameIntegrationTest(game_integration_test.GameIntegrationTest) :
+
+    def setUp(self) :
+        self.directory = tempfile.mkdtemp()
+        self.pool = game_sqlite_data.ConnectionPool(
+            os.path.join(self.directory, "games.db"))
+        self.data_class = partial(game_sqlite_data.SQLiteGameData, 
+                                  self.pool)
+        game_integration_test.GameIntegrationTest.setUp(self)
+
+    def tearDown(self) :
+        self.pool.close()
+        shutil.rmtree(self.directory)
+
+
+def suite() :
+    """Return a test suite of all tests defined in this module"""
+    test_suite = unittest.TestSuite()
+    loader = unittest.TestLoader()
+    test_suite.addTests(loader.loadTestsFromTestCase(SQLiteGameDataTest))
+    test_suite.addTests(
+        loader.loadTestsFromTestCase(SQLiteGameIntegrationTest))
+    return test_suite
+
+if __name__ == "__main__" :
+    unittest.TextTestRunner().run(suite())
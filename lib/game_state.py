@@ -23,18 +23,96 @@ Contributor(s):
      
 ***** END LICENSE BLOCK *****
 
-This module holds the states used by the application"""
+This module holds the states used by the application.
+There are two ways of running the states. The state classes each hold the
+game and the state that follows, so every game builds its own set of 
+states. Alternatively a single TransitionEngine can be shared by any 
+number of games, the current state is then kept in the game data as one
+of the state ids START, FIRST_BID or BID"""
 
 
 from game_common import IllegalStateChangeError,  \
                         IllegalBidError, \
                         roll_set_of_dice
 
+START = 0
+FIRST_BID = 1
+BID = 2
+
+def deal(game, dice_roll) :
+    """Activate every player, roll their dice and make the first active 
+player the current player. The dice roller may be a plain function or a 
+DiceRNG, in which case the dice for all players are rolled in one batch"""
+    game.activate_players()
+    max_dice = game.number_of_starting_dice()
+    face = game.get_face_values()
+    players = game.get_players()
+    roll_hands = getattr(dice_roll, "roll_hands", None)
+    if roll_hands is not None :
+        hands = roll_hands([max_dice] * len(players), face)
+        for player, dice in zip(players, hands) :
+            game.set_dice(player, dice)
+    else :
+        for player in players :
+            game.set_dice(player, dice_roll(max_dice, face))
+    game.set_current_player(players[0])
+
+def raise_bid(game, player, bid) :
+    """Check a bid beats the previous bid then set the bid and move to the
+next player. If it does not then raise an IllegalBidError"""
+    cur_bid = game.get_previous_bid()
+    if cur_bid is None or \
+        (bid[0] > cur_bid[0] or \
+        (bid[0] == cur_bid[0] and bid[1] > cur_bid[1])) :
+        game.set_bid(player, bid)
+        game.set_current_player(game.get_next_player())
+    else :
+        raise IllegalBidError((bid, cur_bid))
+
+def settle_challenge(game, challenger, challenged) :
+    """Decide a challenge against the previous bid and end the game if
+only one player is left. Returns True if the game has ended"""
+    bid = game.get_previous_bid()
+    if game.true_bid(bid) :
+        game.on_win(challenged, challenger, bid)
+    else :
+        game.on_win(challenger, challenged, bid)
+    if game.finished() :
+        game.end_game(game.get_winning_player())
+        return True
+    return False
+
+def refuse_game_start() :
+    """Illegal state transition, throw an exception"""
+    raise IllegalStateChangeError(
+        "Attempt to start an already started game")
+
+def refuse_early_bid(player, bid) :
+    """Illegal state transition, throw an exception"""
+    raise IllegalStateChangeError(
+        "%s attempted to bid %s before game started" 
+           % (player, bid))
+
+def refuse_early_challenge(challenger, challenged) :
+    """Illegal state transition, throw an exception"""
+    raise IllegalStateChangeError(
+         "%s trying to challenge %s before game started" %
+             (challenger, challenged))
+
+def refuse_first_challenge(challenger, challenged) :
+    """Illegal state transition, throw an exception"""
+    raise IllegalStateChangeError(
+         "%s trying to challenge %s before first bid" %
+             (challenger, challenged))
+
+
 class GameStartState(object) :
     """This state is the state the game first enters in after the players 
 have been added to the game. 
 At this point the dice are shuffled and the first player for 
-the round is chosen"""
+the round is chosen.
+The dice roller may be a plain function or a DiceRNG, in which case the
+dice for all players are rolled in one batch"""
     
     def __init__(self, game, enter_state, dice_roller=roll_set_of_dice) :
         self.game = game
@@ -48,25 +126,16 @@ Currently the game starts with the first active player taking the current
 player position"""
         #Could also add logic to do random number generation 
         # to work out who  goes first
-        self.game.activate_players()
-        max_dice = self.game.number_of_starting_dice()
-        face = self.game.get_face_values()
-        for player in self.game.get_players() :
-            self.game.set_dice(player, self.dice_roll(max_dice, face))
-        self.game.set_current_player(self.game.get_players()[0])
+        deal(self.game, self.dice_roll)
         self.game.set_state(self.first)
     
     def on_bid(self, player, bid) :
         """Illegal state transition, throw an exception"""
-        raise IllegalStateChangeError(
-            "%s attempted to bid %s before game started" 
-               % (player, bid))
+        refuse_early_bid(player, bid)
    
     def on_challenge(self, challenger, challenged) :
         """Illegal state transition, throw an exception"""
-        raise IllegalStateChangeError(
-             "%s trying to challenge %s before game started" %
-                 (challenger, challenged))
+        refuse_early_challenge(challenger, challenged)
 
 
 class FirstBidState(object) :
@@ -79,8 +148,7 @@ validity) then setting the next player"""
 
     def on_game_start(self) :
         """Illegal state transition, throw an exception"""
-        raise IllegalStateChangeError(
-              "Attempt to start an already started game")
+        refuse_game_start()
 
     def on_bid(self, player, bid) :
         """Accept the bid from the player without validation"""
@@ -90,9 +158,7 @@ validity) then setting the next player"""
 
     def on_challenge(self, challenger, challenged) :
         """Illegal state transition, throw an exception"""
-        raise IllegalStateChangeError(
-             "%s trying to challenge %s before first bid" %
-                 (challenger, challenged))
+        refuse_first_challenge(challenger, challenged)
 
 
 class BidState(object) :
@@ -104,31 +170,73 @@ It accepts bids and challenge and modifies game state accordingly"""
     
     def on_game_start(self) :
         """Illegal state transition, throw an exception"""
-        raise IllegalStateChangeError(
-            "Attempt to start an already started game")
+        refuse_game_start()
 
     def on_bid(self, player, bid) :
         """Take a bid, validate it against the previous bid then set the
 bid as the current bid and set the next player"""
-        cur_bid = self.game.get_previous_bid()
-        if cur_bid is None or \
-            (bid[0] > cur_bid[0] or \
-            (bid[0] == cur_bid[0] and bid[1] > cur_bid[1])) :
-            self.game.set_bid(player, bid)
-            self.game.set_current_player(self.game.get_next_player())
-        else :
-            raise IllegalBidError((bid, cur_bid))
+        raise_bid(self.game, player, bid)
     
     def on_challenge(self, challenger, challenged) :
         """Handle a challenge, and end the game if finished"""
-        bid = self.game.get_previous_bid()
-        if self.game.true_bid(bid) :
-            self.game.on_win(challenged, challenger, bid)
-        else :
-            self.game.on_win(challenger, challenged, bid)
-        if self.game.finished() :
-            self.game.end_game(self.game.get_winning_player())
+        if settle_challenge(self.game, challenger, challenged) :
             self.game.set_state(self.next)
+
+
+class TransitionEngine(object) :
+    """Runs the game rules for any number of games, holding nothing about 
+any one game. The game is passed to each call and its current state is 
+one of START, FIRST_BID or BID, a state of None being taken as START.
+The game passed is the object the rules act upon, usually a 
+ProxyDispatcher so that game views are told of the changes"""
+
+    def __init__(self, dice_roller=roll_set_of_dice) :
+        self.dice_roll = dice_roller
+        # The handlers for game start, bid and challenge in each state
+        self.transitions = (
+            (self._start, self._early_bid, self._early_challenge),
+            (self._late_start, self._first_bid, self._first_challenge),
+            (self._late_start, raise_bid, self._challenge))
+
+    def on_game_start(self, game) :
+        """Start a new game, if the game has already started then raise an
+IllegalStateChangeError"""
+        self.transitions[game.get_state() or START][0](game)
+
+    def on_bid(self, game, player, bid) :
+        """Make a bid for player"""
+        self.transitions[game.get_state() or START][1](game, player, bid)
+
+    def on_challenge(self, game, challenger, challenged) :
+        """Have challenger challenge the bid made by challenged"""
+        self.transitions[game.get_state() or START][2](
+            game, challenger, challenged)
+
+    def _start(self, game) :
+        deal(game, self.dice_roll)
+        game.set_state(FIRST_BID)
+
+    def _late_start(self, game) :
+        refuse_game_start()
+
+    def _early_bid(self, game, player, bid) :
+        refuse_early_bid(player, bid)
+
+    def _early_challenge(self, game, challenger, challenged) :
+        refuse_early_challenge(challenger, challenged)
+
+    def _first_bid(self, game, player, bid) :
+        game.set_bid(player, bid)
+        game.set_state(BID)
+        game.set_current_player(game.get_next_player())
+
+    def _first_challenge(self, game, challenger, challenged) :
+        refuse_first_challenge(challenger, challenged)
+
+    def _challenge(self, game, challenger, challenged) :
+        if settle_challenge(game, challenger, challenged) :
+            game.set_state(START)
+
         
 if __name__ == "__main__" :
     pass
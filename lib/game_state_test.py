@@ -79,6 +79,29 @@ class GameStartStateTest(unittest.TestCase) :
         full_call_args = self.game.set_dice.call_args_list
         for x in players :
             self.assertTrue(((x, ret_dice), {}) in full_call_args)
+
+    def testOnGameStartRollsAllHandsInOneBatch(self) :
+        players = ["player%i" % i for i in xrange(1, 4)]
+        self.game.get_players.return_value = players
+        hands = [[i] * 6 for i in xrange(1, 4)]
+        face = (1, 6)
+        max_dice = 6
+        dice_roll = Mock(spec=game_common.DiceRNG)
+        dice_roll.roll_hands.return_value = hands
+        self.game.number_of_starting_dice.return_value = max_dice
+        self.game.get_face_values.return_value = face
+        subject = game_state.GameStartState(self.game, 
+            self.next_state, dice_roll)
+
+        subject.on_game_start()
+
+        dice_roll.roll_hands.assert_called_with([max_dice] * len(players),
+                                                face)
+        self.assertTrue(not dice_roll.called)
+        full_call_args = self.game.set_dice.call_args_list
+        for player, hand in zip(players, hands) :
+            self.assertTrue(((player, hand), {}) in full_call_args)
+        self.game.set_current_player.assert_called_with(players[0])
      
     def testOnChallenge(self) :
         player = "player"
@@ -243,6 +266,90 @@ class BidGameStateTest(unittest.TestCase) :
         self.game.end_game.assert_called_with(player2)
 
 
+class TransitionEngineTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.game = Mock(spec=game.Game)
+        self.dice_roll = Mock(spec=game_common.roll_set_of_dice)
+        self.subject = game_state.TransitionEngine(self.dice_roll)
+
+    def testStartingFromNoState(self) :
+        players = ["player1", "player2"]
+        self.game.get_state.return_value = None
+        self.game.get_players.return_value = players
+        self.game.number_of_starting_dice.return_value = 2
+        self.game.get_face_values.return_value = (1, 6)
+        self.dice_roll.return_value = [1, 2]
+        self.subject.on_game_start(self.game)
+        self.game.activate_players.assert_called_with()
+        self.assertEquals(2, self.game.set_dice.call_count)
+        self.game.set_current_player.assert_called_with(players[0])
+        self.game.set_state.assert_called_with(game_state.FIRST_BID)
+
+    def testFirstBid(self) :
+        bid = (1, 2)
+        self.game.get_state.return_value = game_state.FIRST_BID
+        self.game.get_next_player.return_value = "player2"
+        self.subject.on_bid(self.game, "player1", bid)
+        self.game.set_bid.assert_called_with("player1", bid)
+        self.game.set_state.assert_called_with(game_state.BID)
+        self.game.set_current_player.assert_called_with("player2")
+
+    def testBidMustBeatPreviousBid(self) :
+        self.game.get_state.return_value = game_state.BID
+        self.game.get_previous_bid.return_value = (4, 4)
+        self.assertRaises(IllegalBidError, self.subject.on_bid, 
+                          self.game, "player", (4, 3))
+        self.subject.on_bid(self.game, "player", (4, 5))
+        self.game.set_bid.assert_called_with("player", (4, 5))
+        self.assertTrue(not self.game.set_state.called)
+
+    def testChallengeToFinalState(self) :
+        cur_bid = (3, 4)
+        self.game.get_state.return_value = game_state.BID
+        self.game.true_bid.return_value = False
+        self.game.get_previous_bid.return_value = cur_bid
+        self.game.finished.return_value = True
+        self.game.get_winning_player.return_value = "player1"
+        self.subject.on_challenge(self.game, "player1", "player2")
+        self.game.on_win.assert_called_with("player1", "player2", cur_bid)
+        self.game.end_game.assert_called_with("player1")
+        self.game.set_state.assert_called_with(game_state.START)
+
+    def testChallengeWithGameLeftToPlay(self) :
+        self.game.get_state.return_value = game_state.BID
+        self.game.true_bid.return_value = True
+        self.game.finished.return_value = False
+        self.subject.on_challenge(self.game, "player1", "player2")
+        self.assertTrue(not self.game.set_state.called)
+
+    def testIllegalTransitions(self) :
+        for state in (game_state.FIRST_BID, game_state.BID) :
+            self.game.get_state.return_value = state
+            self.assertRaises(IllegalStateChangeError, 
+                              self.subject.on_game_start, self.game)
+        for state in (None, game_state.START) :
+            self.game.get_state.return_value = state
+            self.assertRaises(IllegalStateChangeError, self.subject.on_bid, 
+                              self.game, "player", (1, 2))
+        for state in (game_state.START, game_state.FIRST_BID) :
+            self.game.get_state.return_value = state
+            self.assertRaises(IllegalStateChangeError, 
+                              self.subject.on_challenge, 
+                              self.game, "player1", "player2")
+        self.assertTrue(not self.game.set_state.called)
+
+    def testEngineIsSharedBetweenGames(self) :
+        other = Mock(spec=game.Game)
+        self.game.get_state.return_value = game_state.FIRST_BID
+        other.get_state.return_value = game_state.BID
+        other.get_previous_bid.return_value = (1, 2)
+        self.subject.on_bid(self.game, "player", (1, 2))
+        self.assertRaises(IllegalBidError, self.subject.on_bid, 
+                          other, "player", (1, 1))
+        self.game.set_state.assert_called_with(game_state.BID)
+
+
 def suite() :
     """Return a test suite of all tests defined in this module"""
     test_suite = unittest.TestSuite()
@@ -250,6 +357,7 @@ def suite() :
     test_suite.addTests(loader.loadTestsFromTestCase(GameStartStateTest))
     test_suite.addTests(loader.loadTestsFromTestCase(FirstBidGameStateTest))
     test_suite.addTests(loader.loadTestsFromTestCase(BidGameStateTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(TransitionEngineTest))
     return test_suite
 
 if __name__ == "__main__" :
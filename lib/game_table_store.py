@@ -0,0 +1,448 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+
+
+This module contains a data store holding many tables in one process.
+A TableStore keeps the state of every table in shared columns, one array
+each for the dice, the number of dice, the bids and so on, rather than a
+set of objects per table. A TableHandle gives a single table the same
+methods as game_data.GameData so it can be used with Game, ProxyGame and
+the game states. The columns also allow work across many tables at once,
+such as reshuffling the dice of every table that has finished a round"""
+
+from array import array
+
+import game_common
+from game_compact_data import pack_bid, unpack_bid
+
+_NO_BID = pack_bid(None)
+_NO_VIEWS = ()
+
+_ACTIVE = 1
+_HAS_DICE = 2
+
+class TableStore(object) :
+    """Holds any number of tables, each with up to seats players and up to
+max_dice dice per player. max_dice defaults to the number of starting 
+dice. Dice values must fit in a byte"""
+
+    def __init__(self, seats, starting_dice=5, lowest_face=1, 
+                 highest_face=6, max_dice=None) :
+        if max_dice is None :
+            max_dice = starting_dice
+        self.seats = seats
+        self.max_dice = max_dice
+        self.starting = starting_dice
+        self.low = lowest_face
+        self.high = highest_face
+        self.tables = 0
+        self.free = list()
+        # Columns indexed by table
+        self.occupied = array("B")
+        self.current = list()
+        self.state = array("I")
+        # The column index of each player at each table, by name
+        self.slots = list()
+        # Columns indexed by table * seats + seat
+        self.names = list()
+        self.counts = array("B")
+        self.flags = array("B")
+        self.bids = array("i")
+        # Indexed by (table * seats + seat) * max_dice + die
+        self.dice = array("B")
+        # States are stored by number, 0 being no state. A state is 
+        # forgotten once no table is in it and its number used again
+        self.states = [None]
+        self.state_ids = dict()
+        self.state_uses = [0]
+        self.free_states = list()
+        self.views = dict()
+
+    def new_table(self) :
+        """Create a table with no players and return its number, tables that
+have been released are reused first"""
+        if self.free :
+            table = self.free.pop()
+            self._clear_table(table)
+            return table
+        table = self.tables
+        self.tables = self.tables + 1
+        self.occupied.append(0)
+        self.current.append(None)
+        self.state.append(0)
+        self.slots.append(dict())
+        self.names.extend([None] * self.seats)
+        self.counts.extend([0] * self.seats)
+        self.flags.extend([0] * self.seats)
+        self.bids.extend([_NO_BID] * self.seats)
+        self.dice.extend([0] * (self.seats * self.max_dice))
+        return table
+
+    def _clear_table(self, table) :
+        """Reset a table to having no players"""
+        self.occupied[table] = 0
+        self.current[table] = None
+        self._release_state(self.state[table])
+        self.state[table] = 0
+        self.slots[table] = dict()
+        base = table * self.seats
+        for index in range(base, base + self.seats) :
+            self.names[index] = None
+            self.counts[index] = 0
+            self.flags[index] = 0
+            self.bids[index] = _NO_BID
+        self.views.pop(table, None)
+
+    def release_table(self, table) :
+        """Release a table so its space can be used by a new table"""
+        self._clear_table(table)
+        self.free.append(table)
+
+    def table(self, table) :
+        """Return a handle for a table"""
+        return TableHandle(self, table)
+
+    def state_id(self, state) :
+        """Return the number stored for a state, registering the state the
+first time it is seen"""
+        if state is None :
+            return 0
+        try :
+            return self.state_ids[state]
+        except KeyError :
+            if self.free_states :
+                number = self.free_states.pop()
+                self.states[number] = state
+            else :
+                number = len(self.states)
+                self.states.append(state)
+                self.state_uses.append(0)
+            self.state_ids[state] = number
+            return number
+
+    def set_state(self, table, state) :
+        """Set the state of a table, forgetting the state it was in if no
+other table is in that state"""
+        number = self.state_id(state)
+        if number :
+            self.state_uses[number] = self.state_uses[number] + 1
+        self._release_state(self.state[table])
+        self.state[table] = number
+
+    def _release_state(self, number) :
+        """Note that a table has left the state numbered number"""
+        if not number :
+            return
+        self.state_uses[number] = self.state_uses[number] - 1
+        if not self.state_uses[number] :
+            del self.state_ids[self.states[number]]
+            self.states[number] = None
+            self.free_states.append(number)
+
+    def find_tables(self, state) :
+        """Return the tables currently in state"""
+        number = self.state_ids.get(state)
+        if number is None :
+            return []
+        column = self.state
+        return [table for table in range(self.tables) 
+                if column[table] == number]
+
+    def reshuffle(self, tables, dice_roller=None) :
+        """Roll new dice for the active players of every table in tables
+with one batched draw. dice_roller should provide roll_hands, such as a 
+DiceRNG, by default the shared generator is used.
+This updates the columns directly so no game view events are sent"""
+        seats = self.seats
+        slots = list()
+        for table in tables :
+            base = table * seats
+            for index in range(base, base + self.occupied[table]) :
+                if self.flags[index] & _ACTIVE :
+                    slots.append(index)
+        counts = [self.counts[index] for index in slots]
+        face_vals = (self.low, self.high)
+        if dice_roller is None :
+            hands = game_common.roll_hands(counts, face_vals)
+        else :
+            hands = dice_roller.roll_hands(counts, face_vals)
+        max_dice = self.max_dice
+        for index, hand in zip(slots, hands) :
+            start = index * max_dice
+            self.dice[start:start + len(hand)] = array("B", hand)
+            self.flags[index] = self.flags[index] | _HAS_DICE
+
+
+class TableHandle(object) :
+    """A single table in a TableStore, with the methods of GameData"""
+    __slots__ = ("store", "table")
+
+    def __init__(self, store, table) :
+        self.store = store
+        self.table = table
+
+    def _index(self, player) :
+        """Return the column index of a player. If the player is not at the
+table then raise a ValueError"""
+        try :
+            return self.store.slots[self.table][player]
+        except KeyError :
+            raise ValueError(player)
+
+    def add_game_view(self, view) :
+        """Add a game view to the list of game views"""
+        self.store.views.setdefault(self.table, list()).append(view)
+
+    def get_game_views(self) :
+        """Return a list of game views"""
+        return self.store.views.get(self.table, _NO_VIEWS)
+
+    def set_current_state(self, state) :
+        """Set the current state of the game"""
+        self.store.set_state(self.table, state)
+
+    def get_current_state(self) :
+        """Return the current state of the game"""
+        return self.store.states[self.store.state[self.table]]
+
+    def get_current_player(self) :
+        """Return the player whose turn it currently is"""
+        return self.store.current[self.table]
+
+    def set_current_player(self, player) :
+        """Set the player whose current turn it is"""
+        self.store.current[self.table] = player
+
+    def add_player(self, player) :
+        """Add a player to the table, the player is active on adding. If the
+player has already been added or the table is full then raise a 
+ValueError"""
+        store = self.store
+        occupied = store.occupied[self.table]
+        base = self.table * store.seats
+        slots = store.slots[self.table]
+        if occupied >= store.seats or player in slots :
+            raise ValueError(player)
+        index = base + occupied
+        slots[player] = index
+        store.names[index] = player
+        store.counts[index] = 0
+        store.flags[index] = _ACTIVE
+        store.bids[index] = _NO_BID
+        store.occupied[self.table] = occupied + 1
+
+    def remove_player(self, player) :
+        """Remove player from the table, later players move down a seat"""
+        store = self.store
+        index = self._index(player)
+        base = self.table * store.seats
+        last = base + store.occupied[self.table] - 1
+        max_dice = store.max_dice
+        slots = store.slots[self.table]
+        del slots[player]
+        for later in range(index, last) :
+            store.names[later] = store.names[later + 1]
+            slots[store.names[later]] = later
+            store.counts[later] = store.counts[later + 1]
+            store.flags[later] = store.flags[later + 1]
+            store.bids[later] = store.bids[later + 1]
+            store.dice[later * max_dice:(later + 1) * max_dice] = \
+                store.dice[(later + 1) * max_dice:(later + 2) * max_dice]
+        store.names[last] = None
+        store.flags[last] = 0
+        store.counts[last] = 0
+        store.bids[last] = _NO_BID
+        store.occupied[self.table] = store.occupied[self.table] - 1
+
+    def is_active(self, player) :
+        """Return if a player is active. Players not at the table are 
+considered active"""
+        try :
+            return bool(self.store.flags[self._index(player)] & _ACTIVE)
+        except ValueError :
+            return True
+
+    def get_players(self) :
+        """Return the players currently marked active"""
+        store = self.store
+        base = self.table * store.seats
+        return [store.names[index] 
+                for index in range(base, base + store.occupied[self.table])
+                if store.flags[index] & _ACTIVE]
+
+    def get_all_players(self) :
+        """Return all players, including those marked inactive"""
+        store = self.store
+        base = self.table * store.seats
+        return store.names[base:base + store.occupied[self.table]]
+
+    def _active_index(self, player) :
+        """Return the column index of an active player, if the player is
+not active then raise a ValueError"""
+        index = self._index(player)
+        if not self.store.flags[index] & _ACTIVE :
+            raise ValueError(player)
+        return index
+
+    def get_next_player(self, player) :
+        """Return the active player after player, wrapping around to the 
+first active player. If player is not active then raise a ValueError"""
+        store = self.store
+        base = self.table * store.seats
+        occupied = store.occupied[self.table]
+        index = self._active_index(player)
+        while True :
+            index = index + 1
+            if index >= base + occupied :
+                index = base
+            if store.flags[index] & _ACTIVE :
+                return store.names[index]
+
+    def get_previous_player(self, player) :
+        """Return the active player before player, wrapping around to the 
+last active player. If player is not active then raise a ValueError"""
+        store = self.store
+        base = self.table * store.seats
+        occupied = store.occupied[self.table]
+        index = self._active_index(player)
+        while True :
+            index = index - 1
+            if index < base :
+                index = base + occupied - 1
+            if store.flags[index] & _ACTIVE :
+                return store.names[index]
+
+    def make_all_active(self) :
+        """Mark all players as active"""
+        store = self.store
+        base = self.table * store.seats
+        for index in range(base, base + store.occupied[self.table]) :
+            store.flags[index] = store.flags[index] | _ACTIVE
+
+    def mark_inactive(self, player) :
+        """Mark a player as being inactive, an inactive player is not included
+in a call to get_players"""
+        try :
+            index = self._index(player)
+        except ValueError :
+            return
+        self.store.flags[index] = self.store.flags[index] & ~_ACTIVE
+
+    def get_dice(self, player) :
+        """Get the dice for a particular player"""
+        store = self.store
+        index = self._index(player)
+        if not store.flags[index] & _HAS_DICE :
+            return None
+        start = index * store.max_dice
+        return store.dice[start:start + store.counts[index]].tolist()
+
+    def get_bid(self, player) :
+        """Get the bid for a particular player"""
+        return unpack_bid(self.store.bids[self._index(player)])
+
+    def set_dice(self, player, dice) :
+        """Set the dice a particular player has in their hand. If player has 
+not been added, or there are more than max_dice dice, then raise a 
+ValueError"""
+        store = self.store
+        index = self._index(player)
+        if dice is None :
+            store.counts[index] = 0
+            store.flags[index] = store.flags[index] & ~_HAS_DICE
+            return
+        if len(dice) > store.max_dice :
+            raise ValueError(dice)
+        start = index * store.max_dice
+        store.dice[start:start + len(dice)] = array("B", dice)
+        store.counts[index] = len(dice)
+        store.flags[index] = store.flags[index] | _HAS_DICE
+
+    def remove_dice(self, player) :
+        """Remove the last dice from a players hand"""
+        index = self._index(player)
+        if self.store.counts[index] :
+            self.store.counts[index] = self.store.counts[index] - 1
+
+    def set_bid(self, player, bid) :
+        """Set the bid for a particular player has made. If player has not 
+been added then raise a ValueError"""
+        self.store.bids[self._index(player)] = pack_bid(bid)
+
+    def _hands(self) :
+        """Return the column index and number of dice of every player"""
+        store = self.store
+        base = self.table * store.seats
+        return [(index, store.counts[index]) for index in 
+                range(base, base + store.occupied[self.table])]
+
+    def get_face_count(self, face) :
+        """Return the number of dice across all players showing face"""
+        store = self.store
+        total = 0
+        for index, count in self._hands() :
+            start = index * store.max_dice
+            total = total + store.dice[start:start + count].count(face)
+        return total
+
+    def get_number_of_players_with_dice(self) :
+        """Return the number of players with at least one dice"""
+        return len([index for index, count in self._hands() if count])
+
+    def get_survivor(self) :
+        """Return the only player with any dice left. If more than one player,
+or no player, has dice then return None"""
+        holding = [index for index, count in self._hands() if count]
+        if len(holding) == 1 :
+            return self.store.names[holding[0]]
+        return None
+
+    def get_num_of_starting_dice(self) :
+        """Get the number of dice given to each player at the start of the
+game"""
+        return self.store.starting
+
+    def get_number_of_dice(self, player) :
+        """Return the number of dice a player has"""
+        return self.store.counts[self._index(player)]
+
+    def get_dice_map(self) :
+        """Create a dictionary with each player and the dice values"""
+        ret = dict()
+        for player in self.get_all_players() :
+            ret[player] = self.get_dice(player)
+        return ret
+
+    def get_lowest_dice(self) :
+        """Return the lowest possible face on a dice"""
+        return self.store.low
+    
+    def get_highest_dice(self) :
+        """Return the highest possible face on a dice"""
+        return self.store.high
+
+
+if __name__ == "__main__" :
+    pass
@@ -0,0 +1,158 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+Test the table store, running the game data tests against a table handle
+along with tests of the columns shared between tables"""
+
+import unittest
+
+import game_data_test
+import game_integration_test
+import game_table_store
+
+def table_data(starting_dice=5, lowest_face=1, highest_face=6) :
+    """Create a table handle in a new store with room for the players and
+dice used by the game data tests"""
+    store = game_table_store.TableStore(6, starting_dice, lowest_face,
+                                        highest_face, max_dice=4)
+    store.new_table()
+    return store.table(store.new_table())
+
+class TableHandleTest(game_data_test.GameDataTest) :
+
+    def setUp(self) :
+        self.starting = 3
+        self.subject = table_data(self.starting)
+
+    def testFullTableThrowsException(self) :
+        for i in range(6) :
+            self.subject.add_player("player%i" % i)
+        self.assertRaises(ValueError, self.subject.add_player, "player6")
+
+    def testTooManyDiceThrowsException(self) :
+        self.subject.add_player("player")
+        self.assertRaises(ValueError, self.subject.set_dice, "player", 
+                          [1, 2, 3, 4, 5])
+
+    def testHandleHasNoDictionary(self) :
+        self.assertTrue(not hasattr(self.subject, "__dict__"))
+
+
+class TableStoreTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.store = game_table_store.TableStore(3, 2, 1, 6)
+        self.tables = [self.store.table(self.store.new_table()) 
+                       for _ in range(3)]
+        for handle in self.tables :
+            for seat in range(3) :
+                handle.add_player("player%i" % seat)
+                handle.set_dice("player%i" % seat, [1, 1])
+
+    def testTablesAreIndependent(self) :
+        first, second, third = self.tables
+        first.set_dice("player0", [6])
+        first.set_bid("player1", (2, 3))
+        first.mark_inactive("player2")
+        first.add_game_view("view")
+        self.assertEquals([1, 1], second.get_dice("player0"))
+        self.assertTrue(second.get_bid("player1") is None)
+        self.assertEquals(3, len(second.get_players()))
+        self.assertEquals(["view"], list(first.get_game_views()))
+        self.assertEquals(0, len(third.get_game_views()))
+        self.assertEquals(6, second.get_face_count(1))
+        self.assertEquals(4, first.get_face_count(1))
+
+    def testReleasedTablesAreReusedEmpty(self) :
+        table = self.tables[1].table
+        self.tables[1].set_current_player("player0")
+        self.store.release_table(table)
+        self.assertEquals(table, self.store.new_table())
+        handle = self.store.table(table)
+        self.assertEquals([], handle.get_all_players())
+        self.assertTrue(handle.get_current_player() is None)
+        self.assertEquals(3, self.store.tables)
+
+    def testFindingTablesByState(self) :
+        state = object()
+        self.tables[0].set_current_state(state)
+        self.tables[2].set_current_state(state)
+        self.assertEquals([0, 2], self.store.find_tables(state))
+        self.assertEquals([], self.store.find_tables(object()))
+        self.assertTrue(self.tables[2].get_current_state() is state)
+        self.assertTrue(self.tables[1].get_current_state() is None)
+
+    def testStatesAreForgottenWhenNoTableIsInThem(self) :
+        first, second = object(), object()
+        self.tables[0].set_current_state(first)
+        self.tables[1].set_current_state(first)
+        self.tables[0].set_current_state(second)
+        self.assertTrue(self.tables[1].get_current_state() is first)
+        self.store.release_table(1)
+        self.assertEquals([], self.store.find_tables(first))
+        self.assertFalse(first in self.store.states)
+        self.tables[0].set_current_state(None)
+        self.assertEquals({}, self.store.state_ids)
+        self.tables[2].set_current_state(first)
+        self.assertEquals(3, len(self.store.states))
+        self.assertTrue(self.tables[2].get_current_state() is first)
+
+    def testReshufflingTables(self) :
+        first, second, third = self.tables
+        first.mark_inactive("player1")
+        first.remove_dice("player2")
+        self.store.reshuffle([0, 2], game_table_store.game_common.DiceRNG(1))
+        self.assertEquals([1, 1], first.get_dice("player1"))
+        self.assertEquals([1, 1], second.get_dice("player0"))
+        self.assertEquals(1, first.get_number_of_dice("player2"))
+        self.assertEquals(2, third.get_number_of_dice("player2"))
+        rolled = first.get_dice("player0") + first.get_dice("player2") + \
+            third.get_dice("player0")
+        self.assertTrue(all(1 <= face <= 6 for face in rolled))
+
+    def testReshufflingIsRepeatable(self) :
+        roller = game_table_store.game_common.DiceRNG
+        self.store.reshuffle(range(3), roller(7))
+        first = [handle.get_dice_map() for handle in self.tables]
+        self.store.reshuffle(range(3), roller(7))
+        second = [handle.get_dice_map() for handle in self.tables]
+        self.assertEquals(first, second)
+
+
+class TableIntegrationTest(game_integration_test.GameIntegrationTest) :
+
+    data_class = staticmethod(table_data)
+
+
+def suite() :
+    """Return a test suite of all tests defined in this module"""
+    test_suite = unittest.TestSuite()
+    loader = unittest.TestLoader()
+    test_suite.addTests(loader.loadTestsFromTestCase(TableHandleTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(TableStoreTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(TableIntegrationTest))
+    return test_suite
+
+if __name__ == "__main__" :
+    unittest.TextTestRunner().run(suite())
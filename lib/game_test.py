@@ -34,6 +34,7 @@ import game
 import game_views
 import game_data
 import game_common
+import game_state
 
 class GameObjectTest(unittest.TestCase) :
     
@@ -107,6 +108,25 @@ class GameObjectTest(unittest.TestCase) :
         self.state.on_game_start.assert_called_with()
         self.assertEquals(self.state, self.subject.get_state())
 
+    def testStartingAGameWithAnEngine(self) :
+        engine = Mock(spec=game_state.TransitionEngine)
+        self.subject.engine = engine
+        self.subject.start_game()
+        engine.on_game_start.assert_called_with(self.subject)
+        self.assertTrue(not self.state.on_game_start.called)
+
+    def testEngineActsUponTheFacade(self) :
+        engine = Mock(spec=game_state.TransitionEngine)
+        facade = Mock()
+        self.subject.engine = engine
+        self.subject.facade = facade
+        self.data.get_current_player.return_value = "player2"
+        self.data.get_previous_player.return_value = "player1"
+        self.subject.make_bid((1, 2))
+        engine.on_bid.assert_called_with(facade, "player2", (1, 2))
+        self.subject.make_challenge()
+        engine.on_challenge.assert_called_with(facade, "player2", "player1")
+
     def testSettingAState(self) :
         state1 = Mock()
         self.subject.set_state(state1)
@@ -147,13 +167,13 @@ class GameObjectTest(unittest.TestCase) :
     def testMakingAChallengeWithNoneAndNoneGrabsFromGame(self) :
         player1 = "player"
         player2 = "player"
-        self.data.get_players.return_value = [player1, player2]
+        self.data.get_previous_player.return_value = player1
         self.data.get_current_player.return_value = player2
         self.data.get_current_state.return_value = self.state
 
         self.subject.make_challenge()
         self.data.get_current_state.assert_called_with()
-        self.data.get_players.assert_called_with()
+        self.data.get_previous_player.assert_called_with(player2)
         self.state.on_challenge.assert_called_with(player2, player1)
         self.assertEquals(self.state, self.subject.get_state())
  
@@ -166,80 +186,40 @@ class GameObjectTest(unittest.TestCase) :
         self.subject.make_challenge(challenged=player1)
         self.data.get_current_state.assert_called_with()
         self.data.get_current_player.assert_called_with()
-        self.assertTrue(not self.data.get_players.called)
+        self.assertTrue(not self.data.get_previous_player.called)
         self.state.on_challenge.assert_called_with(player2, player1)
         self.assertEquals(self.state, self.subject.get_state())
     
     def testGettingNextPlayer(self) :
-        players = ["player" for x in xrange(0, 5)]
-        self.data.get_players.return_value = players
-        self.data.get_current_player.return_value = players[0]
+        player1 = "player1"
+        player2 = "player2"
+        self.data.get_current_player.return_value = player1
+        self.data.get_next_player.return_value = player2
 
         ret = self.subject.get_next_player()
 
-        self.assertTrue(ret is not None)
-        self.assertEquals(players[1], ret)
-        self.data.get_players.assert_called_with()
+        self.assertEquals(player2, ret)
+        self.data.get_next_player.assert_called_with(player1)
         self.data.get_current_player.assert_called_with()
-
-    def testGettingNextPlayerOnLastPlayer(self) :
-        players = ["player" for x in xrange(0, 5)]
-        self.data.get_players.return_value = players
-        self.data.get_current_player.return_value = players[4]
-
-        ret = self.subject.get_next_player()
-
-        self.assertTrue(ret is not None)
-        self.assertEquals(players[0], ret)
-        self.assertTrue(self.data.get_players.called)
+        self.assertTrue(not self.data.get_players.called)
     
     def testGettingPreviousPlayer(self) :
-        players = ["player" for x in xrange(0, 5)]
-        self.data.get_players.return_value = players
-        self.data.get_current_player.return_value = players[4]
-
-        ret = self.subject.get_previous_player()
-
-        self.assertTrue(ret is not None)
-        self.assertEquals(players[3], ret)
-        self.assertTrue(self.data.get_players.called)
-
-    def testGettingPreviousPlayerOnFirstPlayer(self) :
-        players = ["player" for x in xrange(0, 5)]
-        self.data.get_players.return_value = players
-        self.data.get_current_player.return_value = players[0]
-
-        ret = self.subject.get_previous_player()
-
-        self.assertTrue(ret is not None)
-        self.assertEquals(players[4], ret)
-        self.assertTrue(self.data.get_players.called)
-    
-    def testGettingNextPlayerWithOnePlayer(self) :
-        players = ["player"]
-        self.data.get_players.return_value = players
-        self.data.get_current_player.return_value = players[0]
-
-        ret = self.subject.get_next_player()
-        self.assertTrue(ret is not None)
-        self.assertEquals(players[0], ret)
-        self.assertTrue(self.data.get_players.called)
-
-    def testGettingPreviousPlayerWithOnePlayer(self) :
-        players = ["player"]
-        self.data.get_players.return_value = players
-        self.data.get_current_player.return_value = players[0]
+        player1 = "player1"
+        player2 = "player2"
+        self.data.get_current_player.return_value = player2
+        self.data.get_previous_player.return_value = player1
 
         ret = self.subject.get_previous_player()
 
-        self.assertTrue(ret is not None)
-        self.assertEquals(players[0], ret)
-        self.assertTrue(self.data.get_players.called)
+        self.assertEquals(player1, ret)
+        self.data.get_previous_player.assert_called_with(player2)
+        self.data.get_current_player.assert_called_with()
+        self.assertTrue(not self.data.get_players.called)
 
     def testGettingPreviousBid(self) :
         players = ["player" for x in xrange(0, 2)]
         bid = (1, 2)
-        self.data.get_players.return_value = players
+        self.data.get_previous_player.return_value = players[0]
         self.data.get_bid.return_value = bid
         self.data.get_current_player.return_value = players[1]
 
@@ -260,15 +240,30 @@ class GameObjectTest(unittest.TestCase) :
         self.assertTrue(self.data.get_dice_map.called)
         self.dice_check.assert_called_with(bid, dice_dict)
 
+    def testBidCheckingWithDefaultCheckerUsesFaceCounts(self) :
+        subject = game.Game(self.data)
+        self.data.get_face_count.return_value = 3
+        self.assertTrue(subject.true_bid((3, 2)))
+        self.assertTrue(not subject.true_bid((4, 2)))
+        self.data.get_face_count.assert_called_with(2)
+        self.assertTrue(not self.data.get_dice_map.called)
+
+    def testWinCheckingWithDefaultCheckerUsesSurvivor(self) :
+        player1 = "player"
+        subject = game.Game(self.data)
+        self.data.get_survivor.return_value = None
+        self.assertTrue(not subject.finished())
+        self.assertTrue(subject.get_winning_player() is None)
+        self.data.get_survivor.return_value = player1
+        self.assertTrue(subject.finished())
+        self.assertEquals(player1, subject.get_winning_player())
+        self.assertTrue(not self.data.get_dice_map.called)
+
     def testRemovingDice(self) :
-        length = 4
-        ret_list = [1 for x in xrange(0, length)]
         player = "player"
-        self.data.get_dice.return_value = ret_list
         self.subject.remove_dice(player)
-        self.data.get_dice.assert_called_with(player)
-        self.assertTrue(self.data.set_dice.called)
-        self.assertEquals(length - 1, len(self.data.set_dice.call_args[0][1]))
+        self.data.remove_dice.assert_called_with(player)
+        self.assertTrue(not self.data.set_dice.called)
 
     def testWinHandling(self) :
         player1 = "player"
@@ -343,6 +338,13 @@ class BidCheckerTest(unittest.TestCase) :
         self.assertTrue(ret is not None)
         self.assertTrue(not ret) 
 
+    def testCheckingBidCount(self) :
+        counts = {4 : 2, 2 : 1}
+        face_count = lambda face : counts.get(face, 0)
+        self.assertTrue(game.check_bid_count((2, 4), face_count))
+        self.assertTrue(not game.check_bid_count((3, 4), face_count))
+        self.assertTrue(not game.check_bid_count((1, 6), face_count))
+
 class WinCheckerTest(unittest.TestCase) :
     
     def testCheckingBidAllNone(self) :
@@ -427,6 +429,25 @@ class ReshuffleDiceTest(unittest.TestCase) :
         self.game_obj.set_dice.assert_called_with(player1, 
              return_dice)
 
+    def testShufflingDiceWithBatchRoller(self) :
+        player1 = "player1"
+        player2 = "player2"
+        players = [player1, player2]
+        face_vals = (1, 6)
+        num = 3
+        hands = [[1] * num, [2] * num]
+        dice_roller = Mock(spec=game_common.DiceRNG)
+        dice_roller.roll_hands.return_value = hands
+        self.game_obj.num_of_dice.return_value = num
+
+        self.subject(players, face_vals, self.game_obj, dice_roller)
+
+        dice_roller.roll_hands.assert_called_with([num, num], face_vals)
+        self.assertTrue(not dice_roller.called)
+        self.assertEquals([((player1, hands[0]), {}), 
+                           ((player2, hands[1]), {})],
+                          self.game_obj.set_dice.call_args_list)
+
 def suite() :
     """Return a test suite of all tests defined in this module"""
     test_suite = unittest.TestSuite()
@@ -0,0 +1,217 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+
+
+This module runs tournaments between bot policies, playing matches across a
+pool of worker processes.
+Matches are split into chunks which are handed to the workers, each worker
+holds its own Simulator so games are never shared between processes. Every
+match is played with its own seed so results do not depend on which worker
+played it. Wins are added up as chunks finish and can be saved to a 
+checkpoint file so an interrupted tournament can carry on where it left
+off"""
+
+import json
+import multiprocessing
+import os
+import time
+
+import game_simulation
+
+def match_seed(seed, match) :
+    """Return the seed used for a match in a tournament, kept to 32 bits so
+that it may seed any generator, including NumPy's"""
+    return (seed * 1000003 + match) & 0xFFFFFFFF
+
+def seat_policies(names, players, match) :
+    """Return the name of the policy in each seat for a match, the seating
+rotates from match to match so each policy takes each seat in turn"""
+    return [names[(seat + match) % len(names)] for seat in range(players)]
+
+_worker = dict()
+
+def _init_worker(config, policies) :
+    """Create the simulator used by a worker process"""
+    _worker["simulator"] = game_simulation.Simulator(config)
+    _worker["policies"] = policies
+
+def _play_chunk(task) :
+    """Play the matches in a chunk, returning the chunk number, the number
+of games played and the wins for each policy name"""
+    chunk, start, stop, seed = task
+    simulator = _worker["simulator"]
+    policies = _worker["policies"]
+    names = sorted(policies)
+    players = simulator.config.players
+    wins = dict((name, 0) for name in names)
+    for match in range(start, stop) :
+        seated = seat_policies(names, players, match)
+        simulator.seed(match_seed(seed, match))
+        winner = simulator.play([policies[name] for name in seated])
+        wins[seated[winner]] += 1
+    return chunk, stop - start, wins
+
+
+class TournamentResult(object) :
+    """The wins for each policy name over the games played"""
+
+    def __init__(self, games, wins, seconds) :
+        self.games = games
+        self.wins = wins
+        self.seconds = seconds
+
+    def win_rates(self) :
+        """Return the fraction of games won by each policy"""
+        if self.games == 0 :
+            return dict((name, 0.0) for name in self.wins)
+        return dict((name, float(won) / self.games) 
+                    for name, won in self.wins.items())
+
+    def games_per_second(self) :
+        """Return the number of games played per second in this run"""
+        if self.seconds <= 0 :
+            return float("inf")
+        return self.games / self.seconds
+
+
+class Tournament(object) :
+    """A tournament between the policies given as a dictionary of name to
+policy. Policies must be functions defined at the top level of a module so
+they can be sent to the worker processes.
+If a checkpoint path is given then progress is saved there after each
+chunk and a tournament with the same settings picks up from it"""
+
+    def __init__(self, policies, n_matches, config=None, seed=0, 
+                 chunk_size=500, checkpoint=None) :
+        if config is None :
+            config = game_simulation.SimulationConfig()
+        self.policies = policies
+        self.n_matches = n_matches
+        self.config = config
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.checkpoint = checkpoint
+        self.games = 0
+        self.wins = dict((name, 0) for name in policies)
+        self.done = set()
+
+    def _settings(self) :
+        """Return the settings a checkpoint must match to be resumed"""
+        return {"policies" : sorted(self.policies), 
+                "n_matches" : self.n_matches,
+                "players" : self.config.players,
+                "starting_dice" : self.config.starting_dice,
+                "faces" : [self.config.lowest_face, self.config.highest_face],
+                "seed" : self.seed, 
+                "chunk_size" : self.chunk_size}
+
+    def load_checkpoint(self) :
+        """Load progress from the checkpoint file if there is one. If the
+checkpoint was written by a tournament with other settings then raise a 
+ValueError"""
+        if self.checkpoint is None or not os.path.exists(self.checkpoint) :
+            return
+        with open(self.checkpoint) as source :
+            saved = json.load(source)
+        if saved["settings"] != self._settings() :
+            raise ValueError("Checkpoint %s is for a different tournament" 
+                             % self.checkpoint)
+        self.games = saved["games"]
+        self.wins = saved["wins"]
+        self.done = set(saved["done"])
+
+    def save_checkpoint(self) :
+        """Write progress to the checkpoint file. The file is replaced in 
+one step so a crash while saving leaves the previous checkpoint intact"""
+        if self.checkpoint is None :
+            return
+        saved = {"settings" : self._settings(), "games" : self.games,
+                 "wins" : self.wins, "done" : sorted(self.done)}
+        temp = self.checkpoint + ".tmp"
+        with open(temp, "w") as target :
+            json.dump(saved, target)
+            target.flush()
+            os.fsync(target.fileno())
+        os.rename(temp, self.checkpoint)
+
+    def _tasks(self) :
+        """Return the chunks of matches still to be played"""
+        tasks = list()
+        for chunk, start in enumerate(range(0, self.n_matches, 
+                                            self.chunk_size)) :
+            if chunk not in self.done :
+                stop = min(start + self.chunk_size, self.n_matches)
+                tasks.append((chunk, start, stop, self.seed))
+        return tasks
+
+    def run(self, processes=None, progress=None) :
+        """Play the remaining matches on a pool of processes, one per core
+by default. progress, if given, is called with the tournament after each
+chunk is added in. Returns a TournamentResult for the whole tournament"""
+        self.load_checkpoint()
+        tasks = self._tasks()
+        start = time.time()
+        played = 0
+        if tasks :
+            pool = multiprocessing.Pool(processes, _init_worker, 
+                                        (self.config, self.policies))
+            try :
+                for chunk, games, wins in \
+                    pool.imap_unordered(_play_chunk, tasks) :
+                    self.games = self.games + games
+                    played = played + games
+                    for name in wins :
+                        self.wins[name] = self.wins[name] + wins[name]
+                    self.done.add(chunk)
+                    self.save_checkpoint()
+                    if progress is not None :
+                        progress(self)
+                pool.close()
+            finally :
+                pool.terminate()
+                pool.join()
+        return TournamentResult(self.games, dict(self.wins), 
+                                time.time() - start)
+
+
+def run_tournament(policies, n_matches, config=None, processes=None, 
+                   seed=0, chunk_size=500, checkpoint=None) :
+    """Run a tournament between policies, see Tournament. 
+Returns a TournamentResult"""
+    tournament = Tournament(policies, n_matches, config, seed, 
+                            chunk_size, checkpoint)
+    return tournament.run(processes)
+
+def main() :
+    policies = {"random" : game_simulation.random_policy,
+                "cautious" : game_simulation.cautious_policy}
+    result = run_tournament(policies, 20000)
+    print("%i games, %.1f games per second" % 
+          (result.games, result.games_per_second()))
+    for name, rate in sorted(result.win_rates().items()) :
+        print("    %-10s %.3f" % (name, rate))
+
+if __name__ == "__main__" :
+    main()
@@ -0,0 +1,114 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+Tests for the tournament runner"""
+
+import unittest
+import json
+import os
+import shutil
+import tempfile
+
+import game_common
+import game_simulation
+import game_tournament
+
+class TournamentTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.config = game_simulation.SimulationConfig(players=4, 
+            starting_dice=3, highest_face=6)
+        self.policies = {"random" : game_simulation.random_policy,
+                         "cautious" : game_simulation.cautious_policy}
+        self.directory = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.directory, "checkpoint.json")
+
+    def tearDown(self) :
+        shutil.rmtree(self.directory)
+
+    def testSeatingRotates(self) :
+        names = ["a", "b"]
+        self.assertEquals(["a", "b", "a"], 
+                          game_tournament.seat_policies(names, 3, 0))
+        self.assertEquals(["b", "a", "b"], 
+                          game_tournament.seat_policies(names, 3, 1))
+
+    def testMatchSeedsFitInThirtyTwoBits(self) :
+        seed = game_tournament.match_seed(5000, 7)
+        self.assertTrue(0 <= seed < 2 ** 32)
+        game_common.DiceRNG(seed)
+
+    def testRunningTournament(self) :
+        result = game_tournament.run_tournament(self.policies, 40, 
+            self.config, processes=2, seed=3, chunk_size=7)
+        self.assertEquals(40, result.games)
+        self.assertEquals(40, sum(result.wins.values()))
+        self.assertAlmostEqual(1.0, sum(result.win_rates().values()))
+
+    def testResultsDoNotDependOnWorkers(self) :
+        result1 = game_tournament.run_tournament(self.policies, 40, 
+            self.config, processes=1, seed=3, chunk_size=40)
+        result2 = game_tournament.run_tournament(self.policies, 40, 
+            self.config, processes=3, seed=3, chunk_size=5)
+        self.assertEquals(result1.wins, result2.wins)
+
+    def testResumingFromCheckpoint(self) :
+        expected = game_tournament.run_tournament(self.policies, 30, 
+            self.config, processes=2, seed=5, chunk_size=10)
+        tournament = game_tournament.Tournament(self.policies, 30, 
+            self.config, seed=5, chunk_size=10, checkpoint=self.checkpoint)
+        class Crash(Exception) :
+            pass
+        def progress(tournament) :
+            raise Crash()
+        self.assertRaises(Crash, tournament.run, 1, progress)
+        with open(self.checkpoint) as source :
+            saved = json.load(source)
+        self.assertEquals(1, len(saved["done"]))
+        self.assertEquals(10, saved["games"])
+
+        tournament = game_tournament.Tournament(self.policies, 30, 
+            self.config, seed=5, chunk_size=10, checkpoint=self.checkpoint)
+        result = tournament.run(2)
+
+        self.assertEquals(30, result.games)
+        self.assertEquals(expected.wins, result.wins)
+
+    def testCheckpointForOtherTournamentIsRejected(self) :
+        game_tournament.run_tournament(self.policies, 10, self.config, 
+            processes=1, chunk_size=10, checkpoint=self.checkpoint)
+        tournament = game_tournament.Tournament(self.policies, 20, 
+            self.config, chunk_size=10, checkpoint=self.checkpoint)
+        self.assertRaises(ValueError, tournament.run, 1)
+
+
+def suite() :
+    """Return a test suite of all tests defined in this module"""
+    test_suite = unittest.TestSuite()
+    loader = unittest.TestLoader()
+    test_suite.addTests(loader.loadTestsFromTestCase(TournamentTest))
+    return test_suite
+
+if __name__ == "__main__" :
+    unittest.TextTestRunner().run(suite())
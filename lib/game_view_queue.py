@@ -0,0 +1,246 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+
+
+This module provides queued delivery of game view events so that slow game
+views do not hold up the game.
+A QueuedGameView wraps a game view and hands each event to a backend which
+delivers it later, either on a pool of worker threads or on an asyncio
+event loop. Events for any one view are always delivered in the order they
+were sent"""
+
+import threading
+
+try :
+    import Queue as queue
+except ImportError :
+    import queue
+
+try :
+    import asyncio
+except ImportError :
+    asyncio = None
+
+import game_views
+
+class ThreadPoolBackend(object) :
+    """Deliver queued events on a pool of worker threads.
+Each queued view is assigned to one worker when it is created so the events
+for a view are delivered in order, while different views can be delivered
+to in parallel. An error raised while delivering an event is dropped"""
+
+    def __init__(self, workers=4) :
+        self.queues = [queue.Queue() for _ in range(workers)]
+        self.threads = list()
+        self.next_lane = 0
+        self.lock = threading.Lock()
+        for events in self.queues :
+            thread = threading.Thread(target=self._work, args=(events,))
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def _work(self, events) :
+        """Deliver events from a queue until told to stop"""
+        while True :
+            item = events.get()
+            try :
+                if item is None :
+                    return
+                handler, args = item
+                try :
+                    handler(*args)
+                except Exception :
+                    # There is no one left to report the error to, it is
+                    # dropped so the worker carries on delivering its lane
+                    pass
+            finally :
+                events.task_done()
+
+    def assign(self) :
+        """Return the worker a newly queued view should use"""
+        with self.lock :
+            lane = self.next_lane
+            self.next_lane = (lane + 1) % len(self.queues)
+        return lane
+
+    def submit(self, lane, handler, args) :
+        """Queue handler to be called with args on the worker lane"""
+        self.queues[lane].put((handler, args))
+
+    def queue_depth(self) :
+        """Return the number of events waiting to be delivered"""
+        return sum([events.qsize() for events in self.queues])
+
+    def join(self) :
+        """Wait until all events submitted so far have been delivered"""
+        for events in self.queues :
+            events.join()
+
+    def shutdown(self) :
+        """Deliver the events already queued then stop the workers"""
+        for events in self.queues :
+            events.put(None)
+        for thread in self.threads :
+            thread.join()
+
+
+class AsyncioBackend(object) :
+    """Deliver queued events as callbacks on an asyncio event loop.
+The loop runs callbacks in the order they are scheduled so the events for
+a view are delivered in order. Events may be submitted from any thread"""
+
+    def __init__(self, loop=None) :
+        if loop is None :
+            if asyncio is None :
+                raise ImportError("asyncio is not available")
+            loop = asyncio.get_event_loop()
+        self.loop = loop
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def _run(self, handler, args) :
+        """Deliver a single event on the loop"""
+        try :
+            handler(*args)
+        finally :
+            with self.lock :
+                self.pending = self.pending - 1
+
+    def assign(self) :
+        """All views share the loop so there is no lane to assign"""
+        return None
+
+    def submit(self, lane, handler, args) :
+        """Schedule handler to be called with args on the loop"""
+        with self.lock :
+            self.pending = self.pending + 1
+        self.loop.call_soon_threadsafe(self._run, handler, args)
+
+    def queue_depth(self) :
+        """Return the number of events waiting to be delivered"""
+        return self.pending
+
+
+class QueuedGameView(game_views.GameView) :
+    """A game view that queues each event on a backend for delivery to the
+wrapped view rather than calling it directly.
+If the wrapped view raises an error while handling an event then the error
+is passed to its on_error method, since the caller has already moved on"""
+
+    def __init__(self, view, backend) :
+        self.view = view
+        self.backend = backend
+        self.lane = backend.assign()
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def _queue(self, handler, args) :
+        """Queue an event for the wrapped view"""
+        with self.lock :
+            self.pending = self.pending + 1
+        self.backend.submit(self.lane, self._deliver, (handler, args))
+
+    def _deliver(self, handler, args) :
+        """Deliver an event to the wrapped view"""
+        try :
+            handler(*args)
+        except Exception as error :
+            self.view.on_error(error)
+        finally :
+            with self.lock :
+                self.pending = self.pending - 1
+
+    def queue_depth(self) :
+        """Return the number of events waiting to be delivered to the 
+wrapped view"""
+        return self.pending
+
+    def on_game_start(self, starting_player, player_list) :
+        """Queue on_game_start, the player list is copied as it may change
+before delivery"""
+        self._queue(self.view.on_game_start, 
+                    (starting_player, list(player_list)))
+
+    def on_bid(self, player_name, bid) :
+        """Queue on_bid"""
+        self._queue(self.view.on_bid, (player_name, bid))
+
+    def on_challenge(self, winner, loser, old_dice_map, bid) :
+        """Queue on_challenge"""
+        self._queue(self.view.on_challenge, 
+                    (winner, loser, old_dice_map, bid))
+
+    def on_activation(self, player_name) :
+        """Queue on_activation"""
+        self._queue(self.view.on_activation, (player_name,))
+
+    def on_player_start_turn(self, player_name) :
+        """Queue on_player_start_turn"""
+        self._queue(self.view.on_player_start_turn, (player_name,))
+
+    def on_player_end_turn(self, player_name) :
+        """Queue on_player_end_turn"""
+        self._queue(self.view.on_player_end_turn, (player_name,))
+
+    def on_player_addition(self, player_name) :
+        """Queue on_player_addition"""
+        self._queue(self.view.on_player_addition, (player_name,))
+
+    def on_player_remove(self, player_name) :
+        """Queue on_player_remove"""
+        self._queue(self.view.on_player_remove, (player_name,))
+
+    def on_deactivate(self, player_name) :
+        """Queue on_deactivate"""
+        self._queue(self.view.on_deactivate, (player_name,))
+
+    def on_game_end(self, winner_name) :
+        """Queue on_game_end"""
+        self._queue(self.view.on_game_end, (winner_name,))
+
+    def on_set_dice(self, player_name, dice) :
+        """Queue on_set_dice"""
+        self._queue(self.view.on_set_dice, (player_name, dice))
+
+    def on_new_dice_amount(self, player_name, amount) :
+        """Queue on_new_dice_amount"""
+        self._queue(self.view.on_new_dice_amount, (player_name, amount))
+
+    def on_bid_reset(self) :
+        """Queue on_bid_reset"""
+        self._queue(self.view.on_bid_reset, ())
+
+    def on_error(self, value) :
+        """Queue on_error"""
+        self._queue(self.view.on_error, (value,))
+
+    def on_events(self, batch) :
+        """Queue on_events"""
+        self._queue(self.view.on_events, (batch,))
+
+
+if __name__ == "__main__" :
+    pass
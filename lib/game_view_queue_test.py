@@ -0,0 +1,172 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+Tests for the queued game view and its backends
+This module relies on the mock library for mocking of dependencies."""
+
+import unittest
+import threading
+
+from mock import Mock
+
+import game_views
+import game_view_queue
+
+class RecordingGameView(game_views.GameView) :
+    
+    def __init__(self) :
+        self.bids = list()
+
+    def on_bid(self, player_name, bid) :
+        self.bids.append((player_name, bid))
+
+
+class ThreadPoolBackendTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.backend = game_view_queue.ThreadPoolBackend(3)
+
+    def tearDown(self) :
+        self.backend.shutdown()
+
+    def testEventsAreDeliveredInOrderForEachView(self) :
+        views = [RecordingGameView() for _ in xrange(0, 5)]
+        queued = [game_view_queue.QueuedGameView(view, self.backend)
+                  for view in views]
+        bids = [("player", (i, 2)) for i in xrange(0, 200)]
+        for bid in bids :
+            for view in queued :
+                view.on_bid(*bid)
+
+        self.backend.join()
+
+        for view in views :
+            self.assertEquals(bids, view.bids)
+        self.assertEquals(0, self.backend.queue_depth())
+        for view in queued :
+            self.assertEquals(0, view.queue_depth())
+
+    def testReportingQueueDepth(self) :
+        release = threading.Event()
+        view = Mock(spec=game_views.GameView)
+        view.on_bid_reset.side_effect = lambda : release.wait()
+        backend = game_view_queue.ThreadPoolBackend(1)
+        subject = game_view_queue.QueuedGameView(view, backend)
+
+        for _ in xrange(0, 4) :
+            subject.on_bid_reset()
+
+        self.assertEquals(4, subject.queue_depth())
+        self.assertTrue(backend.queue_depth() >= 3)
+        release.set()
+        backend.join()
+        self.assertEquals(0, subject.queue_depth())
+        self.assertEquals(0, backend.queue_depth())
+        self.assertEquals(4, view.on_bid_reset.call_count)
+        backend.shutdown()
+
+    def testErrorIsPassedToView(self) :
+        error = ValueError("bad")
+        view = Mock(spec=game_views.GameView)
+        view.on_bid.side_effect = error
+        subject = game_view_queue.QueuedGameView(view, self.backend)
+
+        subject.on_bid("player", (1, 2))
+        subject.on_bid_reset()
+        self.backend.join()
+
+        view.on_error.assert_called_with(error)
+        view.on_bid_reset.assert_called_with()
+
+    def testWorkerSurvivesErrorFromOnError(self) :
+        view = Mock(spec=game_views.GameView)
+        view.on_bid.side_effect = ValueError("bad")
+        view.on_error.side_effect = ValueError("worse")
+        backend = game_view_queue.ThreadPoolBackend(1)
+        subject = game_view_queue.QueuedGameView(view, backend)
+
+        subject.on_bid("player", (1, 2))
+        subject.on_bid_reset()
+        backend.join()
+
+        view.on_bid_reset.assert_called_with()
+        self.assertEquals(0, subject.queue_depth())
+        backend.shutdown()
+
+    def testGameStartPlayerListIsCopied(self) :
+        view = Mock(spec=game_views.GameView)
+        subject = game_view_queue.QueuedGameView(view, self.backend)
+        players = ["player1"]
+
+        subject.on_game_start("player1", players)
+        players.append("player2")
+        self.backend.join()
+
+        view.on_game_start.assert_called_with("player1", ["player1"])
+
+
+class AsyncioBackendTest(unittest.TestCase) :
+
+    @unittest.skipIf(game_view_queue.asyncio is None, 
+                     "asyncio is not available")
+    def testEventsAreDeliveredOnLoop(self) :
+        loop = game_view_queue.asyncio.new_event_loop()
+        backend = game_view_queue.AsyncioBackend(loop)
+        view = RecordingGameView()
+        subject = game_view_queue.QueuedGameView(view, backend)
+        bids = [("player", (i, 2)) for i in range(0, 10)]
+        for bid in bids :
+            subject.on_bid(*bid)
+
+        self.assertEquals(10, backend.queue_depth())
+        self.assertEquals([], view.bids)
+        loop.call_soon(loop.stop)
+        loop.run_forever()
+        loop.close()
+
+        self.assertEquals(bids, view.bids)
+        self.assertEquals(0, backend.queue_depth())
+        self.assertEquals(0, subject.queue_depth())
+
+    def testUsesGivenLoop(self) :
+        loop = Mock()
+        backend = game_view_queue.AsyncioBackend(loop)
+        handler = Mock()
+
+        backend.submit(backend.assign(), handler, (1,))
+
+        self.assertTrue(loop.call_soon_threadsafe.called)
+        self.assertEquals(1, backend.queue_depth())
+
+
+def suite() :
+    """Return a test suite of all tests defined in this module"""
+    test_suite = unittest.TestSuite()
+    loader = unittest.TestLoader()
+    test_suite.addTests(loader.loadTestsFromTestCase(ThreadPoolBackendTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(AsyncioBackendTest))
+    return test_suite
+
+if __name__ == "__main__" :
+    unittest.TextTestRunner().run(suite())
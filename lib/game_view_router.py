@@ -0,0 +1,202 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+
+
+This module hides from each game view what its owner should not see. A 
+ViewRouter is added to a game as its only game view and passes each event
+on to its own spectator views and player views. Each player sees only 
+their own dice as they are rolled, and spectators see no dice until a 
+challenge. If dice are not revealed on a challenge then each player sees
+only their own hand in the dice map and spectators see none.
+The payload for spectators is worked out once per event and the payload
+for each player once per event however many views they have, so any 
+number of spectators cost no more than a call each."""
+
+import game_views
+
+class ViewRouter(game_views.GameView) :
+    """Routes events to spectator views, which see only public payloads,
+and player views, which also see the private payloads of their player"""
+
+    def __init__(self, reveal_on_challenge=True) :
+        self.reveal = reveal_on_challenge
+        self.spectators = list()
+        self.player_views = dict()
+        self.handlers = dict()
+        self.private_events = {"on_set_dice" : self._set_dice}
+        if not reveal_on_challenge :
+            self.private_events["on_challenge"] = self._challenge
+
+    def add_spectator(self, view) :
+        """Add a view that sees only what is public"""
+        self.spectators.append(view)
+        self.handlers.clear()
+
+    def add_player_view(self, player, view) :
+        """Add a view that also sees what is private to player"""
+        self.player_views.setdefault(player, list()).append(view)
+        self.handlers.clear()
+
+    def remove_view(self, view) :
+        """Stop routing events to a spectator or player view"""
+        if view in self.spectators :
+            self.spectators.remove(view)
+        for player, views in list(self.player_views.items()) :
+            if view in views :
+                views.remove(view)
+                if not views :
+                    del self.player_views[player]
+        self.handlers.clear()
+
+    def _get_handlers(self, event) :
+        """Return the handler for event of the spectators, of each player's 
+views and of all views together"""
+        try :
+            return self.handlers[event]
+        except KeyError :
+            spectators = [getattr(view, event) for view in self.spectators]
+            players = [(player, [getattr(view, event) for view in views])
+                       for player, views in self.player_views.items()]
+            everyone = spectators + [handler for player, handlers in players
+                                     for handler in handlers]
+            self.handlers[event] = (spectators, players, everyone)
+            return self.handlers[event]
+
+    def _set_dice(self, args) :
+        """Nobody else sees dice as they are set, the player sees their own"""
+        owner = args[0]
+        return None, lambda player : args if player == owner else None
+
+    def _challenge(self, args) :
+        """Hide the dice map except for each player's own hand"""
+        winner, loser, dice_map, bid = args
+        public = (winner, loser, dict.fromkeys(dice_map), bid)
+        def private(player) :
+            if player not in dice_map :
+                return public
+            hidden = dict.fromkeys(dice_map)
+            hidden[player] = dice_map[player]
+            return (winner, loser, hidden, bid)
+        return public, private
+
+    def _deliver(self, event, args) :
+        """Send an event to every view it should reach"""
+        spectators, players, everyone = self._get_handlers(event)
+        split = self.private_events.get(event)
+        if split is None :
+            for handler in everyone :
+                handler(*args)
+            return
+        public, private = split(args)
+        if public is not None :
+            for handler in spectators :
+                handler(*public)
+        for player, handlers in players :
+            player_args = private(player)
+            if player_args is not None :
+                for handler in handlers :
+                    handler(*player_args)
+
+    def on_events(self, batch) :
+        """Send one batch to each view, the batch for spectators and the
+batch for each player each being put together once"""
+        spectators, players, everyone = self._get_handlers("on_events")
+        private_events = self.private_events
+        splits = [(event, args, private_events.get(event)) 
+                  for event, args in batch]
+        if not [split for event, args, split in splits if split] :
+            for handler in everyone :
+                handler(batch)
+            return
+        public_batch = list()
+        private_batch = list()
+        for event, args, split in splits :
+            if split is None :
+                public_batch.append((event, args))
+                private_batch.append((event, args, None))
+            else :
+                public, private = split(args)
+                if public is not None :
+                    public_batch.append((event, public))
+                private_batch.append((event, public, private))
+        if public_batch :
+            for handler in spectators :
+                handler(public_batch)
+        for player, handlers in players :
+            player_batch = list()
+            for event, public, private in private_batch :
+                if private is not None :
+                    public = private(player)
+                if public is not None :
+                    player_batch.append((event, public))
+            if player_batch :
+                for handler in handlers :
+                    handler(player_batch)
+
+    def on_game_start(self, starting_player, player_list) :
+        self._deliver("on_game_start", (starting_player, player_list))
+
+    def on_bid(self, player_name, bid) :
+        self._deliver("on_bid", (player_name, bid))
+
+    def on_challenge(self, winner, loser, old_dice_map, bid) :
+        self._deliver("on_challenge", (winner, loser, old_dice_map, bid))
+
+    def on_activation(self, player_name) :
+        self._deliver("on_activation", (player_name,))
+
+    def on_player_start_turn(self, player_name) :
+        self._deliver("on_player_start_turn", (player_name,))
+
+    def on_player_end_turn(self, player_name) :
+        self._deliver("on_player_end_turn", (player_name,))
+
+    def on_player_addition(self, player_name) :
+        self._deliver("on_player_addition", (player_name,))
+
+    def on_player_remove(self, player_name) :
+        self._deliver("on_player_remove", (player_name,))
+
+    def on_deactivate(self, player_name) :
+        self._deliver("on_deactivate", (player_name,))
+
+    def on_game_end(self, winner_name) :
+        self._deliver("on_game_end", (winner_name,))
+
+    def on_set_dice(self, player_name, dice) :
+        self._deliver("on_set_dice", (player_name, dice))
+
+    def on_new_dice_amount(self, player_name, amount) :
+        self._deliver("on_new_dice_amount", (player_name, amount))
+
+    def on_bid_reset(self) :
+        self._deliver("on_bid_reset", ())
+
+    def on_error(self, value) :
+        self._deliver("on_error", (value,))
+
+
+if __name__ == "__main__" :
+    pass
@@ -0,0 +1,165 @@
+"""
+***** BEGIN LICENSE BLOCK *****
+Version: MPL 1.1
+
+The contents of this file are subject to the Mozilla Public License Version 
+1.1 (the "License"); you may not use this file except in compliance with 
+the License. You may obtain a copy of the License at 
+http://www.mozilla.org/MPL/
+
+Software distributed under the License is distributed on an "AS IS" basis,
+WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+for the specific language governing rights and limitations under the
+License.
+
+The Original Code is LiarsDiceLib.
+
+The Initial Developer of the Original Code is
+Andrew Morton <ahjmorton@gmail.com> .
+Portions created by the Initial Developer are Copyright (C) 2011
+the Initial Developer. All Rights Reserved.
+
+Contributor(s):
+     
+***** END LICENSE BLOCK *****
+Test routing events to spectator and player views"""
+
+import io
+import random
+import unittest
+
+from mock import Mock
+
+import game_log_test
+import game_state
+import game_view_router
+import game_views
+
+class ViewRouterTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.subject = game_view_router.ViewRouter()
+        self.spectator = Mock(spec=game_views.GameView)
+        self.ann = Mock(spec=game_views.GameView)
+        self.ann_phone = Mock(spec=game_views.GameView)
+        self.bob = Mock(spec=game_views.GameView)
+        self.subject.add_spectator(self.spectator)
+        self.subject.add_player_view("Ann", self.ann)
+        self.subject.add_player_view("Ann", self.ann_phone)
+        self.subject.add_player_view("Bob", self.bob)
+        self.dice_map = {"Ann" : [1, 2], "Bob" : [6]}
+
+    def testPublicEventsReachEveryone(self) :
+        bid = (2, 3)
+        self.subject.on_bid("Ann", bid)
+        for view in (self.spectator, self.ann, self.ann_phone, self.bob) :
+            view.on_bid.assert_called_with("Ann", bid)
+            self.assertTrue(view.on_bid.call_args[0][1] is bid)
+
+    def testDiceAreSeenOnlyByTheirOwner(self) :
+        self.subject.on_set_dice("Ann", [1, 2])
+        self.ann.on_set_dice.assert_called_with("Ann", [1, 2])
+        self.ann_phone.on_set_dice.assert_called_with("Ann", [1, 2])
+        self.assertTrue(not self.bob.on_set_dice.called)
+        self.assertTrue(not self.spectator.on_set_dice.called)
+
+    def testChallengesRevealDiceByDefault(self) :
+        self.subject.on_challenge("Ann", "Bob", self.dice_map, (2, 6))
+        for view in (self.spectator, self.ann, self.bob) :
+            view.on_challenge.assert_called_with("Ann", "Bob", 
+                                                 self.dice_map, (2, 6))
+
+    def testChallengesCanHideDice(self) :
+        subject = game_view_router.ViewRouter(reveal_on_challenge=False)
+        subject.add_spectator(self.spectator)
+        subject.add_player_view("Ann", self.ann)
+        subject.add_player_view("Ann", self.ann_phone)
+        subject.add_player_view("Bob", self.bob)
+        subject.on_challenge("Ann", "Bob", self.dice_map, (2, 6))
+        self.spectator.on_challenge.assert_called_with("Ann", "Bob", 
+            {"Ann" : None, "Bob" : None}, (2, 6))
+        self.ann.on_challenge.assert_called_with("Ann", "Bob", 
+            {"Ann" : [1, 2], "Bob" : None}, (2, 6))
+        self.bob.on_challenge.assert_called_with("Ann", "Bob", 
+            {"Ann" : None, "Bob" : [6]}, (2, 6))
+        # Worked out once for both of Ann's views
+        self.assertTrue(self.ann.on_challenge.call_args[0][2] is 
+                        self.ann_phone.on_challenge.call_args[0][2])
+
+    def testBatchesAreFilteredOncePerPlayer(self) :
+        batch = [("on_set_dice", ("Ann", [1, 2])), 
+                 ("on_set_dice", ("Bob", [6])),
+                 ("on_game_start", ("Ann", ["Ann", "Bob"]))]
+        self.subject.on_events(batch)
+        self.spectator.on_events.assert_called_with(
+            [("on_game_start", ("Ann", ["Ann", "Bob"]))])
+        self.ann.on_events.assert_called_with([batch[0], batch[2]])
+        self.bob.on_events.assert_called_with([batch[1], batch[2]])
+        self.assertTrue(self.ann.on_events.call_args[0][0] is 
+                        self.ann_phone.on_events.call_args[0][0])
+
+    def testPublicBatchesArePassedOn(self) :
+        batch = (("on_bid", ("Ann", (1, 2))),)
+        self.subject.on_events(batch)
+        for view in (self.spectator, self.ann, self.bob) :
+            self.assertTrue(view.on_events.call_args[0][0] is batch)
+
+    def testRemovingViews(self) :
+        self.subject.remove_view(self.spectator)
+        self.subject.remove_view(self.bob)
+        self.subject.on_bid("Ann", (1, 2))
+        self.assertTrue(not self.spectator.on_bid.called)
+        self.assertTrue(not self.bob.on_bid.called)
+        self.assertTrue(self.ann.on_bid.called)
+        self.assertEquals(["Ann"], list(self.subject.player_views))
+
+
+class RecordingView(game_views.GameView) :
+    """Keeps the dice each set_dice event shows"""
+
+    def __init__(self) :
+        self.dice = dict()
+
+    def on_set_dice(self, player_name, dice) :
+        self.dice[player_name] = dice
+
+
+class RoutedGameTest(unittest.TestCase) :
+
+    def playGame(self, batch_events) :
+        dispatcher, data, writer = game_log_test.logged_game(io.BytesIO(), 
+            players=3, batch_events=batch_events, fsync=False)
+        router = game_view_router.ViewRouter()
+        spectator = RecordingView()
+        players = dict((player, RecordingView()) 
+                       for player in data.get_all_players())
+        router.add_spectator(spectator)
+        for player, view in players.items() :
+            router.add_player_view(player, view)
+        dispatcher.add_game_view(router)
+        dispatcher.start_game()
+        rand = random.Random(1)
+        while dispatcher.get_state() != game_state.START :
+            self.assertEquals({}, spectator.dice)
+            for player, view in players.items() :
+                self.assertEquals([player], list(view.dice))
+                self.assertEquals(data.get_dice(player), view.dice[player])
+            game_log_test.play_turn(dispatcher, rand)
+
+    def testPlayersSeeOnlyTheirDice(self) :
+        self.playGame(False)
+
+    def testPlayersSeeOnlyTheirDiceInBatches(self) :
+        self.playGame(True)
+
+
+def suite() :
+    """Return a test suite of all tests defined in this module"""
+    test_suite = unittest.TestSuite()
+    loader = unittest.TestLoader()
+    test_suite.addTests(loader.loadTestsFromTestCase(ViewRouterTest))
+    test_suite.addTests(loader.loadTestsFromTestCase(RoutedGameTest))
+    return test_suite
+
+if __name__ == "__main__" :
+    unittest.TextTestRunner().run(suite())
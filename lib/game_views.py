@@ -92,6 +92,14 @@ a challenge"""
         """This method is called when there is an error with the remote"""
         pass
 
+    def on_events(self, batch) :
+        """This method is called with all the events caused by one action
+when the game is sending events in batches. The batch is a sequence of
+(method name, arguments) pairs in the order they happened, by default each
+one is passed on to the matching method of this view"""
+        for event, args in batch :
+            getattr(self, event)(*args)
+
 
 if __name__ == "__main__" : 
     pass
@@ -32,6 +32,21 @@ import game_proxy_test
 import game_state_test
 import game_integration_test
 import game_common_test
+import game_view_queue_test
+import game_simulation_test
+import game_tournament_test
+import game_probability_test
+import game_compact_data_test
+import game_table_store_test
+import game_snapshot_test
+import game_log_test
+import game_archive_test
+import game_sqlite_data_test
+import game_server_test
+import game_codec_test
+import game_view_router_test
+import game_benchmark_test
+import game_instrument_test
 
 def suite() :
     """Return all tests known about"""
@@ -40,7 +55,22 @@ def suite() :
            game_proxy_test.suite(),
            game_data_test.suite(),
            game_state_test.suite(),
-           game_common_test.suite()])
+           game_common_test.suite(),
+           game_view_queue_test.suite(),
+           game_simulation_test.suite(),
+           game_tournament_test.suite(),
+           game_probability_test.suite(),
+           game_compact_data_test.suite(),
+           game_table_store_test.suite(),
+           game_snapshot_test.suite(),
+           game_log_test.suite(),
+           game_archive_test.suite(),
+           game_sqlite_data_test.suite(),
+           game_server_test.suite(),
+           game_codec_test.suite(),
+           game_view_router_test.suite(),
+           game_benchmark_test.suite(),
+           game_instrument_test.suite()])
 
 if __name__ == "__main__" :
     unittest.TextTestRunner().run(suite())